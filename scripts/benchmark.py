@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the conversion pipeline of sqlitebiter with synthetic inputs.
+
+Each case is executed in a fresh process to measure the peak RSS of the case.
+
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+
+FORMAT_NAMES = ("csv", "tsv", "json", "ldjson", "excel", "ipynb")
+CONVERTER_NAMES = ("file", "text", "dict")
+TEXT_FORMAT_NAMES = ("csv", "tsv", "json", "ldjson", "ipynb")
+
+FORMAT_EXTENSIONS = {
+    "csv": "csv",
+    "tsv": "tsv",
+    "json": "json",
+    "ldjson": "ldjson",
+    "excel": "xlsx",
+    "ipynb": "ipynb",
+}
+
+
+def parse_option() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+        help="number of rows of the synthetic tables. defaults to %(default)s",
+    )
+    parser.add_argument(
+        "--cols",
+        type=int,
+        nargs="+",
+        default=[4, 32],
+        help="number of columns of the synthetic tables. defaults to %(default)s",
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=FORMAT_NAMES,
+        default=list(FORMAT_NAMES),
+        help="input formats to benchmark. defaults to %(default)s",
+    )
+    parser.add_argument(
+        "--converters",
+        nargs="+",
+        choices=CONVERTER_NAMES,
+        default=list(CONVERTER_NAMES),
+        help="""converters to benchmark: 'file' converts files, 'text' converts the file contents
+        as stdin, 'dict' converts nested JSON files that are processed by DictConverter.
+        defaults to %(default)s""",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="number of runs of each case. defaults to %(default)s"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="benchmark_results.json",
+        help="path to the output JSON file. defaults to %(default)s",
+    )
+
+    return parser.parse_args()
+
+
+def make_row(row_idx: int, num_cols: int) -> List[Any]:
+    row: List[Any] = []
+
+    for col_idx in range(num_cols):
+        kind = col_idx % 4
+        if kind == 0:
+            row.append(row_idx * num_cols + col_idx)
+        elif kind == 1:
+            row.append((row_idx + col_idx) * 0.25)
+        elif kind == 2:
+            row.append(f"text_{row_idx % 997}_{col_idx}")
+        else:
+            row.append("true" if (row_idx + col_idx) % 2 else "false")
+
+    return row
+
+
+def make_header(num_cols: int) -> List[str]:
+    return [f"col{col_idx}" for col_idx in range(num_cols)]
+
+
+def iter_records(num_rows: int, num_cols: int) -> Iterator[Dict[str, Any]]:
+    header = make_header(num_cols)
+
+    for row_idx in range(num_rows):
+        yield dict(zip(header, make_row(row_idx, num_cols)))
+
+
+def write_delimited(file_path: str, num_rows: int, num_cols: int, delimiter: str) -> None:
+    with open(file_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        writer.writerow(make_header(num_cols))
+        for row_idx in range(num_rows):
+            writer.writerow(make_row(row_idx, num_cols))
+
+
+def write_json(file_path: str, num_rows: int, num_cols: int) -> None:
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(list(iter_records(num_rows, num_cols)), f)
+
+
+def write_ldjson(file_path: str, num_rows: int, num_cols: int) -> None:
+    with open(file_path, "w", encoding="utf-8") as f:
+        for record in iter_records(num_rows, num_cols):
+            f.write(json.dumps(record))
+            f.write("\n")
+
+
+def write_nested_json(file_path: str, num_rows: int, num_cols: int) -> None:
+    # a top-level object that mixes a scalar map and a table is not a table format of
+    # pytablereader: such data is converted by DictConverter
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "meta": {"rows": num_rows, "cols": num_cols},
+                "records": list(iter_records(num_rows, num_cols)),
+            },
+            f,
+        )
+
+
+def write_excel(file_path: str, num_rows: int, num_cols: int) -> None:
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(file_path, {"constant_memory": True})
+    worksheet = workbook.add_worksheet("bench")
+    worksheet.write_row(0, 0, make_header(num_cols))
+    for row_idx in range(num_rows):
+        worksheet.write_row(row_idx + 1, 0, make_row(row_idx, num_cols))
+    workbook.close()
+
+
+def write_ipynb(file_path: str, num_rows: int, num_cols: int) -> None:
+    import nbformat
+
+    # num_rows is used as the number of cells
+    nb = nbformat.v4.new_notebook()
+    for row_idx in range(num_rows):
+        row = make_row(row_idx, num_cols)
+        if row_idx % 2:
+            nb.cells.append(nbformat.v4.new_markdown_cell(f"# section {row_idx}\n{row}"))
+            continue
+
+        nb.cells.append(
+            nbformat.v4.new_code_cell(
+                source=f"print({row})",
+                execution_count=row_idx,
+                outputs=[
+                    nbformat.v4.new_output("stream", name="stdout", text=f"{row}\n"),
+                    nbformat.v4.new_output(
+                        "execute_result", data={"text/plain": repr(row)}, execution_count=row_idx
+                    ),
+                ],
+            )
+        )
+
+    nbformat.write(nb, file_path)
+
+
+def write_input(file_path: str, format_name: str, num_rows: int, num_cols: int) -> None:
+    writers: Dict[str, Callable[[str, int, int], None]] = {
+        "json": write_json,
+        "ldjson": write_ldjson,
+        "excel": write_excel,
+        "ipynb": write_ipynb,
+    }
+
+    if format_name == "csv":
+        write_delimited(file_path, num_rows, num_cols, delimiter=",")
+    elif format_name == "tsv":
+        write_delimited(file_path, num_rows, num_cols, delimiter="\t")
+    else:
+        writers[format_name](file_path, num_rows, num_cols)
+
+
+def run_case(
+    converter_name: str, format_name: str, input_path: str, db_path: str
+) -> Dict[str, Any]:
+    from dataproperty import MatrixFormatting
+    from loguru import logger
+    from simplesqlite import SimpleSQLite
+
+    from sqlitebiter.converter import FileConverter, TextConverter
+
+    logger.remove()
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    con = SimpleSQLite(db_path, "w")
+    converter_params = dict(
+        logger=logger,
+        con=con,
+        symbol_replace_value="_",
+        add_pri_key_name=None,
+        convert_configs={},
+        index_list=["col0"],
+        is_type_inference=True,
+        is_type_hint_header=False,
+        matrix_formatting=MatrixFormatting.TRIM,
+        verbosity_level=0,
+        max_workers=1,
+        format_name=format_name if converter_name == "text" else None,
+    )
+
+    start_time = time.perf_counter()
+
+    if converter_name == "text":
+        converter = TextConverter(**converter_params)
+        with open(input_path, encoding="utf-8") as f:
+            converter.convert(f.read())
+    else:
+        converter = FileConverter(
+            encoding="utf-8",
+            exclude_pattern=None,
+            follow_symlinks=False,
+            **converter_params,
+        )
+        converter.convert_files([input_path], jobs=1)
+
+    converter.flush_source_info()
+    converter.create_deferred_index_list()
+
+    elapsed = time.perf_counter() - start_time
+    # stats include the database size that is fetched from the connection
+    stats = converter.get_stats().as_dict()
+    con.close()
+
+    try:
+        import resource
+
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss_bytes = max_rss if sys.platform == "darwin" else max_rss * 1024
+    except ImportError:
+        peak_rss_bytes = None
+
+    return {
+        "success": converter.get_success_count(),
+        "elapsed": elapsed,
+        "records": stats["rows"],
+        "peak_rss_bytes": peak_rss_bytes,
+        "stages": stats["stages"],
+        "db_bytes": os.path.getsize(db_path),
+    }
+
+
+def iter_cases(options: argparse.Namespace) -> Iterator[Tuple[str, str, int, int]]:
+    for converter_name in options.converters:
+        if converter_name == "dict":
+            format_names: Sequence[str] = ["json"]
+        elif converter_name == "text":
+            format_names = [name for name in options.formats if name in TEXT_FORMAT_NAMES]
+        else:
+            format_names = options.formats
+
+        for format_name in format_names:
+            for num_rows in options.rows:
+                for num_cols in options.cols:
+                    yield converter_name, format_name, num_rows, num_cols
+
+
+def get_environment() -> Dict[str, Any]:
+    import pytablereader
+    import simplesqlite
+
+    import sqlitebiter
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "sqlite": __import__("sqlite3").sqlite_version,
+        "sqlitebiter": sqlitebiter.__version__,
+        "pytablereader": pytablereader.__version__,
+        "simplesqlite": simplesqlite.__version__,
+    }
+
+
+def main() -> int:
+    options = parse_option()
+    results = []
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for converter_name, format_name, num_rows, num_cols in iter_cases(options):
+            input_path = os.path.join(
+                work_dir,
+                "{}_{}_{}x{}.{}".format(
+                    converter_name,
+                    format_name,
+                    num_rows,
+                    num_cols,
+                    FORMAT_EXTENSIONS[format_name],
+                ),
+            )
+            if converter_name == "dict":
+                write_nested_json(input_path, num_rows, num_cols)
+            else:
+                write_input(input_path, format_name, num_rows, num_cols)
+
+            db_path = os.path.join(work_dir, "out.sqlite")
+
+            for run_idx in range(options.repeat):
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    result = executor.submit(
+                        run_case, converter_name, format_name, input_path, db_path
+                    ).result()
+
+                result.update(
+                    {
+                        "converter": converter_name,
+                        "format": format_name,
+                        "rows": num_rows,
+                        "cols": num_cols,
+                        "run": run_idx,
+                        "input_bytes": os.path.getsize(input_path),
+                        "rows_per_sec": num_rows / result["elapsed"],
+                    }
+                )
+                results.append(result)
+
+                print(
+                    "{converter:>5s} {format:>7s} {rows:>8d}x{cols:<3d} "
+                    "{elapsed:8.3f}s {rps:>12s} rows/s  peak_rss={rss:>6s}MiB  {stages}".format(
+                        converter=converter_name,
+                        format=format_name,
+                        rows=num_rows,
+                        cols=num_cols,
+                        elapsed=result["elapsed"],
+                        rps="{:.0f}".format(result["rows_per_sec"]),
+                        rss="{:.1f}".format((result["peak_rss_bytes"] or 0) / 1024**2),
+                        stages=" ".join(
+                            f"{stage}={elapsed:.3f}" for stage, elapsed in result["stages"].items()
+                        ),
+                    )
+                )
+
+    with open(options.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": get_environment(), "results": results}, f, indent=4)
+
+    print(f"results written to {options.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
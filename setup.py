@@ -46,9 +46,10 @@ with open(os.path.join(REQUIREMENT_DIR, "docs_requirements.txt")) as f:
 build_exe_requires = ["pyinstaller>=5.13"]
 gs_requires = ["gspread", "oauth2client", "pyOpenSSL"]
 mediawiki_requires = ["pypandoc"]
+zstd_requires = ["zstandard>=0.15"]
 optional_requires = ["ujson>=1.33,<6"]
 
-all_requires = gs_requires + mediawiki_requires + optional_requires
+all_requires = gs_requires + mediawiki_requires + zstd_requires + optional_requires
 tests_requires = list(set(tests_requires + all_requires))
 
 setuptools.setup(
@@ -91,6 +92,7 @@ setuptools.setup(
         "gs": gs_requires,
         "mediawiki": mediawiki_requires,
         "test": tests_requires,
+        "zstd": zstd_requires,
     },
     classifiers=[
         "Development Status :: 4 - Beta",
@@ -3,9 +3,10 @@
 """
 
 import os
+import signal
 import sys
 from textwrap import dedent
-from typing import Any, List, Optional, Tuple, Union
+from typing import Any, Iterator, List, Optional, Tuple, Union
 
 import appconfigpy
 import click
@@ -22,14 +23,19 @@ from .__version__ import __version__
 from ._common import DEFAULT_DUP_COL_HANDLER
 from ._config import ConfigKey, app_config_mgr
 from ._const import IPYNB_FORMAT_NAME_LIST, PROGRAM_NAME, ExitCode
+from ._database import BulkLoadSQLite
 from ._enum import Context, DupDatabase
 from ._types import ConvertConfig
 from .converter import (
+    INFER_SAMPLE_METHODS,
+    IPYNB_IMAGE_STORAGES,
     FileConverter,
     GoogleSheetsConverter,
     TableConverter,
     TextConverter,
+    TypeInferenceSample,
     UrlConverter,
+    is_archive_file_path,
 )
 
 
@@ -56,7 +62,7 @@ class Default:
 
 
 def create_database(
-    database_path: str, dup_table: DupDatabase, max_workers: int
+    database_path: str, dup_table: DupDatabase, max_workers: int, is_bulk_load: bool = False
 ) -> Tuple[sqlite.SimpleSQLite, bool]:
     db_path = path.Path(database_path)
     dir_path = db_path.dirname()
@@ -65,11 +71,17 @@ def create_database(
         dir_path.makedirs_p()
 
     is_create_db = not db_path.isfile()
+    mode = "a" if dup_table == DupDatabase.APPEND else "w"
 
-    if dup_table == DupDatabase.APPEND:
-        return (sqlite.SimpleSQLite(db_path, "a", max_workers=max_workers), is_create_db)
+    if not is_bulk_load:
+        return (sqlite.SimpleSQLite(db_path, mode, max_workers=max_workers), is_create_db)
 
-    return (sqlite.SimpleSQLite(db_path, "w", max_workers=max_workers), is_create_db)
+    con = BulkLoadSQLite(db_path, mode, max_workers=max_workers)
+
+    # a rollback journal is not needed for a database that is created from scratch
+    con.begin_bulk_load(journal_mode="OFF" if is_create_db or mode == "w" else "WAL")
+
+    return (con, is_create_db)
 
 
 def initialize_logger(name: str, log_level: str) -> None:
@@ -94,8 +106,24 @@ def initialize_logger(name: str, log_level: str) -> None:
     appconfigpy.set_logger(True)
 
 
-def finalize(con: sqlite.SimpleSQLite, converter: TableConverter, is_create_db: bool) -> int:
+def finalize(
+    con: sqlite.SimpleSQLite,
+    converter: TableConverter,
+    is_create_db: bool,
+    stats_json_path: Optional[str] = None,
+) -> int:
+    converter.flush_source_info()
+    converter.create_deferred_index_list()
+
+    if isinstance(con, BulkLoadSQLite):
+        con.end_bulk_load()
+
+    converter.save_type_cache()
     converter.write_completion_message()
+
+    if stats_json_path:
+        converter.write_stats_json(stats_json_path)
+
     database_path = con.database_path
     con.close()
 
@@ -105,6 +133,34 @@ def finalize(con: sqlite.SimpleSQLite, converter: TableConverter, is_create_db:
     return converter.get_return_code()
 
 
+def iter_file_paths(
+    files: List[str], recursive: bool, pattern: str, follow_symlinks: bool
+) -> Iterator[str]:
+    for file_path in files:
+        dir_path_obj = path.Path(file_path)
+
+        if not follow_symlinks and dir_path_obj.islink() and dir_path_obj.isdir():
+            logger.debug(
+                "skip symlink to a directory: {} -> {}".format(
+                    dir_path_obj, dir_path_obj.readlink()
+                )
+            )
+            continue
+
+        if recursive and dir_path_obj.isdir():
+            for file_path_obj in dir_path_obj.walkfiles():
+                # the pattern is applied to the members of archive files
+                # instead of the archive files themselves
+                if pattern and not (
+                    file_path_obj.fnmatch(pattern) or is_archive_file_path(file_path_obj)
+                ):
+                    continue
+
+                yield file_path_obj
+        else:
+            yield file_path
+
+
 def load_convert_config(logger: Any, config_filepath: str, subcommand: str) -> ConvertConfig:
     if not config_filepath:
         return {}
@@ -158,7 +214,10 @@ def to_matrix_formatting_enum(
     help=dedent(
         """\
         [experimental]
-        Configurations for data conversion. The option can be used only for url subcommand.
+        Configurations for data conversion. The option can be used for url/file/stdin subcommands.
+        Type hints of url subcommand are applied to URLs that contain "target_url",
+        and type hints of file/stdin subcommands are applied to files that match
+        "target_path" glob patterns.
         """
     ),
 )
@@ -202,6 +261,62 @@ def to_matrix_formatting_enum(
         """
     ),
 )
+@click.option(
+    "--infer-sample-rows",
+    metavar="N",
+    type=click.IntRange(min=1),
+    help=dedent(
+        """\
+        [experimental]
+        Infer column types of a table from N rows of the table.
+        The rest of the rows are converted without type inference,
+        and columns are widened by values that do not fit the inferred types.
+        Type inference is applied to all of the rows in default.
+        """
+    ),
+)
+@click.option(
+    "--infer-sample-method",
+    type=click.Choice(INFER_SAMPLE_METHODS, case_sensitive=False),
+    default=INFER_SAMPLE_METHODS[0],
+    show_default=True,
+    help=dedent(
+        """\
+        head: sample the first --infer-sample-rows rows.
+        reservoir: sample --infer-sample-rows rows at random.
+        """
+    ),
+)
+@click.option(
+    "--type-cache",
+    "type_cache_path",
+    metavar="PATH",
+    help=dedent(
+        """\
+        [experimental]
+        Store column types of converted tables to a JSON file, and use the types instead of
+        type inference when tables that have the same name and headers are converted again.
+        Columns are widened by values that do not fit the stored types,
+        and the file is updated.
+        """
+    ),
+)
+@click.option(
+    "--ipynb-image-storage",
+    type=click.Choice(IPYNB_IMAGE_STORAGES, case_sensitive=False),
+    default=IPYNB_IMAGE_STORAGES[0],
+    show_default=True,
+    help=dedent(
+        """\
+        [experimental]
+        Storage of image outputs of Jupyter Notebooks.
+        inline: store base64 encoded images to the outputs table as they are.
+        dedup: store decoded images once to an images table keyed by SHA-256 digests,
+        and store the digests to the outputs table instead of the images.
+        dedup-zlib: same as dedup, and compress images with zlib.
+        """
+    ),
+)
 @click.option("--replace-symbol", "symbol_replace_value", help="Replace symbols in attributes.")
 @click.option("-v", "--verbose", "verbosity_level", count=True, help="Verbosity level.")
 @click.option(
@@ -215,6 +330,31 @@ def to_matrix_formatting_enum(
         """
     ),
 )
+@click.option(
+    "--bulk-load",
+    "is_bulk_load",
+    is_flag=True,
+    help=dedent(
+        """\
+        [experimental]
+        Write to the output database in a single transaction with
+        journal_mode=OFF (WAL when appending), synchronous=OFF, a large cache_size and
+        temp_store=MEMORY. The output database may be corrupted if the process is aborted.
+        """
+    ),
+)
+@click.option(
+    "--stats-json",
+    "stats_json_path",
+    metavar="PATH",
+    help=dedent(
+        """\
+        Write a report of the conversion to a JSON file: elapsed time of each stage
+        (load/normalize/create/index/log), and elapsed time, rows and bytes of each source
+        and table.
+        """
+    ),
+)
 @click.option("--debug", "log_level", flag_value="DEBUG", help="For debug print.")
 @click.option(
     "-q",
@@ -234,9 +374,15 @@ def cmd(
     no_type_inference: bool,
     is_type_hint_header: bool,
     matrix_formatting: MatrixFormatting,
+    infer_sample_rows: Optional[int],
+    infer_sample_method: str,
+    type_cache_path: Optional[str],
+    ipynb_image_storage: str,
     symbol_replace_value: Optional[str],
     verbosity_level: int,
     max_workers: int,
+    is_bulk_load: bool,
+    stats_json_path: Optional[str],
     log_level: str,
 ) -> None:
     ctx.obj[Context.OUTPUT_PATH] = output_path
@@ -248,8 +394,17 @@ def cmd(
     ctx.obj[Context.TYPE_INFERENCE] = not no_type_inference
     ctx.obj[Context.TYPE_HINT_HEADER] = is_type_hint_header
     ctx.obj[Context.MATRIX_FORMATTING] = matrix_formatting
+    ctx.obj[Context.INFER_SAMPLE] = (
+        TypeInferenceSample(infer_sample_rows, infer_sample_method.lower())
+        if infer_sample_rows
+        else None
+    )
+    ctx.obj[Context.TYPE_CACHE] = type_cache_path
+    ctx.obj[Context.IPYNB_IMAGE_STORAGE] = ipynb_image_storage.lower()
     ctx.obj[Context.VERBOSITY_LEVEL] = verbosity_level
     ctx.obj[Context.MAX_WORKERS] = max_workers
+    ctx.obj[Context.BULK_LOAD] = is_bulk_load
+    ctx.obj[Context.STATS_JSON] = stats_json_path
     ctx.obj[Context.LOG_LEVEL] = "INFO" if log_level is None else log_level
 
     sqlite.SimpleSQLite.dup_col_handler = DEFAULT_DUP_COL_HANDLER
@@ -279,8 +434,16 @@ def version(ctx: click.Context) -> None:
 @click.option(
     "-r", "--recursive", is_flag=True, help="Read all files under each directory, recursively."
 )
-@click.option("--pattern", metavar="PATTERN", help="Convert files matching PATTERN.")
-@click.option("--exclude", metavar="PATTERN", help="Exclude files matching PATTERN.")
+@click.option(
+    "--pattern",
+    metavar="PATTERN",
+    help="Convert files (and members of zip/tar archive files) matching PATTERN.",
+)
+@click.option(
+    "--exclude",
+    metavar="PATTERN",
+    help="Exclude files (and members of zip/tar archive files) matching PATTERN.",
+)
 @click.option("--follow-symlinks", is_flag=True, help="Follow symlinks.")
 @click.option(
     "-f",
@@ -296,6 +459,90 @@ def version(ctx: click.Context) -> None:
     metavar="ENCODING",
     help="Encoding to load files. Auto-detection from files in default.",
 )
+@click.option(
+    "--chunk-rows",
+    metavar="N",
+    type=click.IntRange(min=1),
+    help=dedent(
+        """\
+        [experimental]
+        Load CSV/TSV/LTSV/LDJSON files N rows at a time to limit memory usage.
+        Column types are inferred from the first N rows.
+        """
+    ),
+)
+@click.option(
+    "-j",
+    "--jobs",
+    metavar="N",
+    type=click.IntRange(min=1),
+    default=1,
+    help=dedent(
+        """\
+        [experimental]
+        Load files with N worker processes.
+        Tables are written to the database in the order of the input files.
+        With --chunk-rows, large CSV/TSV files are split into byte ranges
+        that are parsed in parallel.
+        Jupyter Notebook files are also parsed by the worker processes.
+        """
+    ),
+)
+@click.option(
+    "--fast-ipynb",
+    "is_fast_ipynb",
+    is_flag=True,
+    help=dedent(
+        """\
+        [experimental]
+        Load Jupyter Notebook files without validating the notebook format.
+        """
+    ),
+)
+@click.option(
+    "--incremental",
+    "is_incremental",
+    is_flag=True,
+    help=dedent(
+        """\
+        [experimental]
+        Skip files that are not modified since the last conversion to the output file.
+        Tables created from modified files are replaced.
+        The output file is opened with append mode.
+        """
+    ),
+)
+@click.option(
+    "--checksum",
+    "is_checksum",
+    is_flag=True,
+    help="Compare SHA-256 hashes of file contents instead of mtimes in --incremental mode.",
+)
+@click.option(
+    "--follow",
+    "is_follow",
+    is_flag=True,
+    help=dedent(
+        """\
+        [experimental]
+        Keep reading data appended to a CSV/TSV/LTSV/LDJSON file or a named pipe, and
+        append the rows to the table in batches of --chunk-rows rows
+        (defaults to {} rows) or at every --flush-interval seconds.
+        Named pipes are read until the writers close them.
+        Files are followed until the process is interrupted (SIGINT/SIGTERM).
+        """.format(
+            FileConverter.FOLLOW_CHUNK_ROWS
+        )
+    ),
+)
+@click.option(
+    "--flush-interval",
+    metavar="SECONDS",
+    type=click.FloatRange(min=0),
+    default=1.0,
+    show_default=True,
+    help="Maximum seconds to keep rows in memory before appending them in --follow mode.",
+)
 @click.pass_context
 def file(
     ctx: click.Context,
@@ -306,11 +553,22 @@ def file(
     follow_symlinks: bool,
     format_name: str,
     encoding: str,
+    chunk_rows: Optional[int],
+    jobs: int,
+    is_fast_ipynb: bool,
+    is_incremental: bool,
+    is_checksum: bool,
+    is_follow: bool,
+    flush_interval: float,
 ) -> None:
     """
     Convert tabular data within
     CSV/Excel/HTML/JSON/Jupyter Notebook/LDJSON/LTSV/Markdown/Mediawiki/SQLite/SSV/TSV
     file(s) or named pipes to a SQLite database file.
+    gzip/bzip2/xz/zstd compressed files are also accepted (e.g. data.csv.gz):
+    decompressed data is loaded in memory, except for CSV/TSV/LTSV/LDJSON files
+    with --chunk-rows that are decompressed as streams.
+    zip/tar archive files are read as directories.
     """
 
     initialize_logger(f"{PROGRAM_NAME:s} file", ctx.obj[Context.LOG_LEVEL])
@@ -319,13 +577,20 @@ def file(
         logger.error(f"require at least one file specification.\n\n{ctx.get_help()}")
         sys.exit(ExitCode.NO_INPUT)
 
+    if is_follow and (len(files) > 1 or recursive):
+        logger.error("--follow option accepts only one file")
+        sys.exit(ExitCode.FAILED_CONVERT)
+
     convert_configs = load_convert_config(
         logger, ctx.obj[Context.CONVERT_CONFIG], subcommand="file"
     )
 
     max_workers = ctx.obj.get(Context.MAX_WORKERS)
     con, is_create_db = create_database(
-        ctx.obj[Context.OUTPUT_PATH], ctx.obj[Context.DUP_DATABASE], max_workers=max_workers
+        ctx.obj[Context.OUTPUT_PATH],
+        DupDatabase.APPEND if is_incremental else ctx.obj[Context.DUP_DATABASE],
+        max_workers=max_workers,
+        is_bulk_load=ctx.obj[Context.BULK_LOAD],
     )
     converter = FileConverter(
         logger=logger,
@@ -337,32 +602,39 @@ def file(
         is_type_inference=ctx.obj[Context.TYPE_INFERENCE],
         is_type_hint_header=ctx.obj[Context.TYPE_HINT_HEADER],
         matrix_formatting=ctx.obj[Context.MATRIX_FORMATTING],
+        infer_sample=ctx.obj[Context.INFER_SAMPLE],
+        type_cache_path=ctx.obj[Context.TYPE_CACHE],
+        ipynb_image_storage=ctx.obj[Context.IPYNB_IMAGE_STORAGE],
         verbosity_level=ctx.obj.get(Context.VERBOSITY_LEVEL),
         max_workers=max_workers,
         format_name=format_name,
         encoding=encoding,
         exclude_pattern=exclude,
         follow_symlinks=follow_symlinks,
+        chunk_rows=chunk_rows,
+        is_incremental=is_incremental,
+        is_checksum=is_checksum,
+        is_follow=is_follow,
+        flush_interval=flush_interval,
+        pattern=pattern,
+        is_fast_ipynb=is_fast_ipynb,
     )
 
-    for file_path in files:
-        dir_path_obj = path.Path(file_path)
+    if is_follow:
+        # finalize the output database also at SIGTERM to keep the appended rows
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
 
-        if not follow_symlinks and dir_path_obj.islink() and dir_path_obj.isdir():
-            logger.debug(
-                "skip symlink to a directory: {} -> {}".format(
-                    dir_path_obj, dir_path_obj.readlink()
-                )
-            )
-            continue
+    try:
+        converter.convert_files(
+            iter_file_paths(files, recursive, pattern, follow_symlinks), jobs=jobs
+        )
+    except KeyboardInterrupt:
+        if not is_follow:
+            raise
 
-        if recursive and dir_path_obj.isdir():
-            for file_path_obj in dir_path_obj.walkfiles(pattern):
-                converter.convert(file_path_obj)
-        else:
-            converter.convert(file_path)
+        logger.info("stop following")
 
-    sys.exit(finalize(con, converter, is_create_db))
+    sys.exit(finalize(con, converter, is_create_db, ctx.obj[Context.STATS_JSON]))
 
 
 @cmd.command(epilog=COMMAND_EPILOG)
@@ -372,8 +644,20 @@ def file(
         ptr.TableTextLoader.get_format_names() + IPYNB_FORMAT_NAME_LIST, case_sensitive=False
     ),
 )
+@click.option(
+    "--chunk-rows",
+    metavar="N",
+    type=click.IntRange(min=1),
+    help=dedent(
+        """\
+        [experimental]
+        Load CSV/TSV/LTSV/LDJSON data from the standard input N rows at a time, instead of
+        reading the whole input into memory. Column types are inferred from the first N rows.
+        """
+    ),
+)
 @click.pass_context
-def stdin(ctx: click.Context, format_name: str) -> None:
+def stdin(ctx: click.Context, format_name: str, chunk_rows: Optional[int]) -> None:
     """
     Convert tabular data within
     CSV/HTML/JSON/Jupyter Notebook/LDJSON/LTSV/Markdown/Mediawiki/SSV/TSV
@@ -388,7 +672,10 @@ def stdin(ctx: click.Context, format_name: str) -> None:
 
     max_workers = ctx.obj.get(Context.MAX_WORKERS)
     con, is_create_db = create_database(
-        ctx.obj[Context.OUTPUT_PATH], ctx.obj[Context.DUP_DATABASE], max_workers=max_workers
+        ctx.obj[Context.OUTPUT_PATH],
+        ctx.obj[Context.DUP_DATABASE],
+        max_workers=max_workers,
+        is_bulk_load=ctx.obj[Context.BULK_LOAD],
     )
     converter = TextConverter(
         logger=logger,
@@ -400,14 +687,17 @@ def stdin(ctx: click.Context, format_name: str) -> None:
         is_type_inference=ctx.obj[Context.TYPE_INFERENCE],
         is_type_hint_header=ctx.obj[Context.TYPE_HINT_HEADER],
         matrix_formatting=ctx.obj[Context.MATRIX_FORMATTING],
+        infer_sample=ctx.obj[Context.INFER_SAMPLE],
+        type_cache_path=ctx.obj[Context.TYPE_CACHE],
+        ipynb_image_storage=ctx.obj[Context.IPYNB_IMAGE_STORAGE],
         verbosity_level=ctx.obj.get(Context.VERBOSITY_LEVEL),
         max_workers=max_workers,
         format_name=format_name,
     )
 
-    converter.convert(sys.stdin.read())
+    converter.convert_stream(sys.stdin, chunk_rows=chunk_rows)
 
-    sys.exit(finalize(con, converter, is_create_db))
+    sys.exit(finalize(con, converter, is_create_db, ctx.obj[Context.STATS_JSON]))
 
 
 @cmd.command(epilog=COMMAND_EPILOG)
@@ -463,7 +753,10 @@ def url(ctx: click.Context, url: str, format_name: str, encoding: str, proxy: st
 
     max_workers = ctx.obj.get(Context.MAX_WORKERS)
     con, is_create_db = create_database(
-        ctx.obj[Context.OUTPUT_PATH], ctx.obj[Context.DUP_DATABASE], max_workers=max_workers
+        ctx.obj[Context.OUTPUT_PATH],
+        ctx.obj[Context.DUP_DATABASE],
+        max_workers=max_workers,
+        is_bulk_load=ctx.obj[Context.BULK_LOAD],
     )
     converter = UrlConverter(
         logger=logger,
@@ -475,6 +768,9 @@ def url(ctx: click.Context, url: str, format_name: str, encoding: str, proxy: st
         is_type_inference=ctx.obj[Context.TYPE_INFERENCE],
         is_type_hint_header=ctx.obj[Context.TYPE_HINT_HEADER],
         matrix_formatting=ctx.obj[Context.MATRIX_FORMATTING],
+        infer_sample=ctx.obj[Context.INFER_SAMPLE],
+        type_cache_path=ctx.obj[Context.TYPE_CACHE],
+        ipynb_image_storage=ctx.obj[Context.IPYNB_IMAGE_STORAGE],
         verbosity_level=ctx.obj.get(Context.VERBOSITY_LEVEL),
         max_workers=max_workers,
         format_name=format_name,
@@ -484,7 +780,7 @@ def url(ctx: click.Context, url: str, format_name: str, encoding: str, proxy: st
 
     converter.convert(url)
 
-    sys.exit(finalize(con, converter, is_create_db))
+    sys.exit(finalize(con, converter, is_create_db, ctx.obj[Context.STATS_JSON]))
 
 
 @cmd.command(epilog=COMMAND_EPILOG)
@@ -503,7 +799,10 @@ def gs(ctx: click.Context, credentials: click.Path, title: str) -> None:
 
     max_workers = ctx.obj.get(Context.MAX_WORKERS)
     con, is_create_db = create_database(
-        ctx.obj[Context.OUTPUT_PATH], ctx.obj[Context.DUP_DATABASE], max_workers=max_workers
+        ctx.obj[Context.OUTPUT_PATH],
+        ctx.obj[Context.DUP_DATABASE],
+        max_workers=max_workers,
+        is_bulk_load=ctx.obj[Context.BULK_LOAD],
     )
     convert_configs = load_convert_config(
         logger, ctx.obj[Context.CONVERT_CONFIG], subcommand="file"
@@ -519,6 +818,9 @@ def gs(ctx: click.Context, credentials: click.Path, title: str) -> None:
         is_type_inference=ctx.obj[Context.TYPE_INFERENCE],
         is_type_hint_header=ctx.obj[Context.TYPE_HINT_HEADER],
         matrix_formatting=ctx.obj[Context.MATRIX_FORMATTING],
+        infer_sample=ctx.obj[Context.INFER_SAMPLE],
+        type_cache_path=ctx.obj[Context.TYPE_CACHE],
+        ipynb_image_storage=ctx.obj[Context.IPYNB_IMAGE_STORAGE],
         verbosity_level=ctx.obj.get(Context.VERBOSITY_LEVEL),
         max_workers=max_workers,
         format_name="google sheets",
@@ -526,7 +828,7 @@ def gs(ctx: click.Context, credentials: click.Path, title: str) -> None:
 
     converter.convert(credentials, title)
 
-    sys.exit(finalize(con, converter, is_create_db))
+    sys.exit(finalize(con, converter, is_create_db, ctx.obj[Context.STATS_JSON]))
 
 
 @cmd.command()
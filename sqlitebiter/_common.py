@@ -2,13 +2,17 @@
 .. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
 """
 
-from typing import Any, Union
+from typing import TYPE_CHECKING, Any, Union
 
 from path import Path
-from sqliteschema import SQLiteSchemaExtractor
 from tcolorpy import tcolor
 
 from ._counter import ResultCounter
+from ._stats import ConversionStats, Stage
+
+
+if TYPE_CHECKING:
+    from .converter._schema_catalog import SchemaCatalog  # noqa
 
 
 DEFAULT_DUP_COL_HANDLER = "rename"
@@ -22,29 +26,33 @@ class ResultLogger:
     def __init__(
         self,
         logger: Any,
-        schema_extractor: SQLiteSchemaExtractor,
+        schema_catalog: "SchemaCatalog",
         result_counter: ResultCounter,
         verbosity_level: int,
+        stats: ConversionStats,
     ) -> None:
         self.__logger = logger
-        self.__schema_extractor = schema_extractor
+        self.__schema_catalog = schema_catalog
         self.__result_counter = result_counter
         self.__verbosity_level = verbosity_level
+        self.__stats = stats
 
     def logging_success(
         self, source: Union[str, Path], table_name: str, is_create_table: bool
     ) -> None:
-        table_schema = self.__schema_extractor.fetch_table_schema(table_name.strip())
-
         self.__result_counter.inc_success(is_create_table)
-        self.__logger.info(
-            "convert '{source:s}' to '{table_info:s}' table".format(
-                source=tcolor(source, color="cyan"),
-                table_info=tcolor(
-                    table_schema.dumps(
-                        output_format="text", verbosity_level=self.__verbosity_level
+
+        with self.__stats.measure(Stage.LOG):
+            table_schema = self.__schema_catalog.fetch_table_schema(table_name.strip())
+
+            self.__logger.info(
+                "convert '{source:s}' to '{table_info:s}' table".format(
+                    source=tcolor(source, color="cyan"),
+                    table_info=tcolor(
+                        table_schema.dumps(
+                            output_format="text", verbosity_level=self.__verbosity_level
+                        ),
+                        color="light_green",
                     ),
-                    color="light_green",
-                ),
+                )
             )
-        )
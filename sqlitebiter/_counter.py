@@ -18,9 +18,13 @@ class ResultCounter:
     def skip_count(self) -> int:
         return self.__skip_count
 
+    @property
+    def unchanged_count(self) -> int:
+        return self.__unchanged_count
+
     @property
     def total_count(self) -> int:
-        return self.success_count + self.fail_count + self.skip_count
+        return self.success_count + self.fail_count + self.skip_count + self.unchanged_count
 
     @property
     def created_table_count(self) -> int:
@@ -31,6 +35,7 @@ class ResultCounter:
         self.__success_count = 0
         self.__fail_count = 0
         self.__skip_count = 0
+        self.__unchanged_count = 0
 
     def __repr__(self) -> str:
         return "results: " + ", ".join(
@@ -38,6 +43,7 @@ class ResultCounter:
                 f"success={self.__success_count:d}",
                 f"failed={self.__fail_count:d}",
                 f"skip={self.__skip_count:s}",
+                f"unchanged={self.__unchanged_count:d}",
                 f"return_code={self.get_return_code():d}",
             ]
         )
@@ -54,8 +60,11 @@ class ResultCounter:
     def inc_skip(self) -> None:
         self.__skip_count += 1
 
+    def inc_unchanged(self) -> None:
+        self.__unchanged_count += 1
+
     def get_return_code(self) -> int:
-        if self.__success_count > 0:
+        if self.__success_count > 0 or self.__unchanged_count > 0:
             return ExitCode.SUCCESS
 
         if self.__fail_count > 0:
@@ -0,0 +1,75 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+from typing import Any, Dict, Optional
+
+from simplesqlite import SimpleSQLite
+
+
+class BulkLoadSQLite(SimpleSQLite):
+    """
+    SimpleSQLite class that writes all of the changes in a single transaction
+    with unsafe but fast pragmas until :py:meth:`.end_bulk_load` is called.
+    """
+
+    CACHE_SIZE_KIB = 256 * 1024
+
+    @property
+    def is_bulk_loading(self) -> bool:
+        return self.__is_bulk_loading
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.__is_bulk_loading = False
+        self.__stash_pragmas: Dict[str, Any] = {}
+
+        super().__init__(*args, **kwargs)
+
+    def begin_bulk_load(self, journal_mode: str) -> None:
+        if self.__is_bulk_loading:
+            return
+
+        bulk_load_pragmas = {
+            "journal_mode": journal_mode,
+            "synchronous": "OFF",
+            "cache_size": -self.CACHE_SIZE_KIB,
+            "temp_store": "MEMORY",
+        }
+
+        for name, value in bulk_load_pragmas.items():
+            self.__stash_pragmas[name] = self.__fetch_pragma(name)
+            self.execute_query(f"PRAGMA {name} = {value}")
+
+        self.__is_bulk_loading = True
+
+    def end_bulk_load(self) -> None:
+        if not self.__is_bulk_loading:
+            return
+
+        self.__is_bulk_loading = False
+        self.commit()
+
+        for name, value in self.__stash_pragmas.items():
+            self.execute_query(f"PRAGMA {name} = {value}")
+
+        self.__stash_pragmas.clear()
+
+    def commit(self) -> None:
+        # commits in the middle of a bulk load are deferred to the end of the load
+        if self.__is_bulk_loading:
+            return
+
+        super().commit()
+
+    def close(self) -> None:
+        if self.is_connected():
+            self.end_bulk_load()
+
+        super().close()
+
+    def __fetch_pragma(self, name: str) -> Optional[Any]:
+        result = self.execute_query(f"PRAGMA {name}")
+        if result is None:
+            return None
+
+        return result.fetchone()[0]
@@ -14,10 +14,15 @@ class Context(Enum):
     TYPE_INFERENCE = auto()
     TYPE_HINT_HEADER = auto()
     MATRIX_FORMATTING = auto()
+    INFER_SAMPLE = auto()
+    TYPE_CACHE = auto()
+    IPYNB_IMAGE_STORAGE = auto()
     LOG_LEVEL = auto()
     OUTPUT_PATH = auto()
     VERBOSITY_LEVEL = auto()
     MAX_WORKERS = auto()
+    BULK_LOAD = auto()
+    STATS_JSON = auto()
     SYMBOL_REPLACE_VALUE = auto()
 
 
@@ -0,0 +1,164 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+class Stage:
+    LOAD = "load"
+    NORMALIZE = "normalize"
+    CREATE = "create"
+    INDEX = "index"
+    LOG = "log"
+
+    LIST = (LOAD, NORMALIZE, CREATE, INDEX, LOG)
+
+
+class ConversionStats:
+    """
+    Elapsed time of each stage of conversions, and rows/bytes of each source and table.
+    The time of a nested stage is excluded from the time of the outer stage.
+    """
+
+    @property
+    def record_count(self) -> int:
+        return self.__record_count
+
+    def __init__(self, fetch_db_size: Optional[Callable[[], int]] = None) -> None:
+        self.__fetch_db_size = fetch_db_size
+        self.__elapsed_map: Dict[str, float] = {stage: 0.0 for stage in Stage.LIST}
+        self.__record_count = 0
+        self.__stack: List[List[Any]] = []
+        self.__source_stats_list: List[Dict[str, Any]] = []
+        self.__table_stats_map: Dict[str, Dict[str, Any]] = {}
+        self.__current_source_stats: Optional[Dict[str, Any]] = None
+        self.__start_time = time.perf_counter()
+        self.__start_db_size = self.__get_db_size()
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        now = time.perf_counter()
+
+        if self.__stack:
+            parent_stage, start_time = self.__stack[-1]
+            self.__elapsed_map[parent_stage] += now - start_time
+
+        self.__stack.append([stage, now])
+
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            _stage, start_time = self.__stack.pop()
+            self.__elapsed_map[stage] = self.__elapsed_map.get(stage, 0.0) + now - start_time
+
+            if self.__stack:
+                self.__stack[-1][1] = now
+
+    def iter_measure(self, stage: str, iterable_func: Callable[[], Iterable[T]]) -> Iterator[T]:
+        # iterable_func is called in the stage: some of the loaders do their work at the call
+        with self.measure(stage):
+            iterator = iter(iterable_func())
+
+        while True:
+            with self.measure(stage):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+
+            yield item
+
+    @contextmanager
+    def measure_source(self, source: str, bytes_read: Optional[int]) -> Iterator[Dict[str, Any]]:
+        source_stats: Dict[str, Any] = {
+            "source": source,
+            "elapsed": 0.0,
+            "rows": 0,
+            "bytes_read": bytes_read,
+            "bytes_written": None,
+            "tables": [],
+        }
+        db_size = self.__get_db_size()
+        start_time = time.perf_counter()
+        self.__current_source_stats = source_stats
+
+        try:
+            yield source_stats
+        finally:
+            self.__current_source_stats = None
+            source_stats["elapsed"] = time.perf_counter() - start_time
+            end_db_size = self.__get_db_size()
+            if db_size is not None and end_db_size is not None:
+                source_stats["bytes_written"] = end_db_size - db_size
+
+            self.__source_stats_list.append(source_stats)
+
+    @contextmanager
+    def measure_table(self, table_name: str, key: str = "elapsed") -> Iterator[None]:
+        table_stats = self.__get_table_stats(table_name)
+        start_time = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            table_stats[key] += time.perf_counter() - start_time
+
+    def add_record_count(self, table_name: str, count: int) -> None:
+        self.__record_count += count
+        self.__get_table_stats(table_name)["rows"] += count
+
+        source_stats = self.__current_source_stats
+        if source_stats is not None:
+            source_stats["rows"] += count
+
+    def as_dict(self, table_sizes: Optional[Mapping[str, int]] = None) -> Dict[str, Any]:
+        if table_sizes is None:
+            table_sizes = {}
+
+        db_size = self.__get_db_size()
+
+        return {
+            "elapsed": time.perf_counter() - self.__start_time,
+            "rows": self.__record_count,
+            "bytes_read": sum(
+                source_stats["bytes_read"]
+                for source_stats in self.__source_stats_list
+                if source_stats["bytes_read"] is not None
+            ),
+            "bytes_written": (
+                None
+                if db_size is None or self.__start_db_size is None
+                else db_size - self.__start_db_size
+            ),
+            "stages": {stage: elapsed for stage, elapsed in self.__elapsed_map.items()},
+            "sources": self.__source_stats_list,
+            "tables": [
+                dict(table_stats, bytes=table_sizes.get(table_name))
+                for table_name, table_stats in self.__table_stats_map.items()
+            ],
+        }
+
+    def __get_table_stats(self, table_name: str) -> Dict[str, Any]:
+        table_stats = self.__table_stats_map.get(table_name)
+        if table_stats is None:
+            table_stats = {"table": table_name, "rows": 0, "elapsed": 0.0, "index_elapsed": 0.0}
+            self.__table_stats_map[table_name] = table_stats
+
+        source_stats = self.__current_source_stats
+        if source_stats is not None and table_name not in source_stats["tables"]:
+            source_stats["tables"].append(table_name)
+
+        return table_stats
+
+    def __get_db_size(self) -> Optional[int]:
+        if self.__fetch_db_size is None:
+            return None
+
+        return self.__fetch_db_size()
@@ -2,17 +2,24 @@
 .. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
 """
 
+from ._archive import is_archive_file_path
 from ._base import TableConverter
 from ._file import FileConverter
 from ._gs import GoogleSheetsConverter
+from ._ipynb_converter import IPYNB_IMAGE_STORAGES
+from ._table_creator import INFER_SAMPLE_METHODS, TypeInferenceSample
 from ._text import TextConverter
 from ._url import UrlConverter
 
 
 __all__ = (
+    "INFER_SAMPLE_METHODS",
+    "IPYNB_IMAGE_STORAGES",
     "FileConverter",
     "GoogleSheetsConverter",
     "TableConverter",
     "TextConverter",
+    "TypeInferenceSample",
     "UrlConverter",
+    "is_archive_file_path",
 )
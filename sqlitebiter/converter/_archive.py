@@ -0,0 +1,165 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+import abc
+import hashlib
+import io
+import posixpath
+import tarfile
+import time
+import zipfile
+from fnmatch import fnmatch
+from typing import IO, Dict, Iterator, NamedTuple, Optional, Tuple, Type
+
+from path import Path
+
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+_HASH_BLOCK_SIZE = 1024 * 1024
+_DEFAULT_ENCODING = "utf-8"
+
+# exceptions raised while reading broken archive files
+ARCHIVE_ERRORS: Tuple[Type[Exception], ...] = (
+    zipfile.BadZipFile,
+    zipfile.LargeZipFile,
+    tarfile.TarError,
+    EOFError,
+)
+
+
+class ArchiveMember(NamedTuple):
+    name: str
+    size: int
+    mtime: int
+
+    @property
+    def basename(self) -> str:
+        return posixpath.basename(self.name)
+
+
+def is_archive_file_path(file_path: str) -> bool:
+    return str(file_path).lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+class ArchiveReader(metaclass=abc.ABCMeta):
+    """
+    Read members of an archive file as a virtual directory.
+    """
+
+    @property
+    def file_path(self) -> Path:
+        return self._file_path
+
+    def __init__(self, file_path: str) -> None:
+        self._file_path = Path(file_path)
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def iter_members(
+        self, pattern: Optional[str] = None, exclude_pattern: Optional[str] = None
+    ) -> Iterator[ArchiveMember]:
+        # patterns are matched with base names of members as same as files of directories
+        for member in self._iter_members():
+            if pattern and not fnmatch(member.basename, pattern):
+                continue
+            if exclude_pattern and fnmatch(member.basename, exclude_pattern):
+                continue
+
+            yield member
+
+    def open_text(self, member: ArchiveMember, encoding: Optional[str]) -> IO[str]:
+        return io.TextIOWrapper(
+            self.open(member), encoding=encoding or _DEFAULT_ENCODING, newline=""
+        )
+
+    def read_text(self, member: ArchiveMember, encoding: Optional[str]) -> str:
+        with self.open_text(member, encoding) as f:
+            return f.read()
+
+    def calc_sha256(self, member: ArchiveMember) -> str:
+        sha256 = hashlib.sha256()
+
+        with self.open(member) as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+                sha256.update(block)
+
+        return sha256.hexdigest()
+
+    @abc.abstractmethod
+    def open(self, member: ArchiveMember) -> IO[bytes]:  # pragma: no cover
+        pass
+
+    @abc.abstractmethod
+    def close(self) -> None:  # pragma: no cover
+        pass
+
+    @abc.abstractmethod
+    def _iter_members(self) -> Iterator[ArchiveMember]:  # pragma: no cover
+        pass
+
+
+class ZipArchiveReader(ArchiveReader):
+    def __init__(self, file_path: str) -> None:
+        super().__init__(file_path)
+
+        self.__zip_file = zipfile.ZipFile(file_path)
+
+    def open(self, member: ArchiveMember) -> IO[bytes]:
+        return self.__zip_file.open(member.name)
+
+    def close(self) -> None:
+        self.__zip_file.close()
+
+    def _iter_members(self) -> Iterator[ArchiveMember]:
+        for info in self.__zip_file.infolist():
+            if info.is_dir():
+                continue
+
+            yield ArchiveMember(
+                name=info.filename,
+                size=info.file_size,
+                mtime=int(time.mktime(info.date_time + (0, 0, -1))),
+            )
+
+
+class TarArchiveReader(ArchiveReader):
+    def __init__(self, file_path: str) -> None:
+        super().__init__(file_path)
+
+        # compressed tar files are decompressed as streams
+        self.__tar_file = tarfile.open(file_path, "r:*")
+        self.__info_map: Dict[str, tarfile.TarInfo] = {}
+
+    def open(self, member: ArchiveMember) -> IO[bytes]:
+        # looking up members by names reads the whole archive
+        f = self.__tar_file.extractfile(self.__info_map.get(member.name, member.name))
+        if f is None:
+            raise tarfile.TarError(f"not a regular file: {member.name}")
+
+        return f
+
+    def close(self) -> None:
+        self.__tar_file.close()
+
+    def _iter_members(self) -> Iterator[ArchiveMember]:
+        # members are read in the order of the archive to avoid rewinding compressed streams
+        for info in self.__tar_file:
+            if not info.isfile():
+                continue
+
+            # e.g. "./a.csv" -> "a.csv"
+            name = posixpath.normpath(info.name)
+            self.__info_map[name] = info
+            yield ArchiveMember(name=name, size=info.size, mtime=int(info.mtime))
+
+
+def open_archive(file_path: str) -> ArchiveReader:
+    if str(file_path).lower().endswith(".zip"):
+        return ZipArchiveReader(file_path)
+
+    return TarArchiveReader(file_path)
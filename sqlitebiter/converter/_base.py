@@ -2,25 +2,46 @@
 .. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
 """
 
+import json
 import os.path
+import re
+from contextlib import contextmanager
+from copy import deepcopy
 from textwrap import indent
-from typing import Any, Optional, Sequence, Set, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 import nbformat
+import pytablereader as ptr
 from dataproperty import MatrixFormatting
 from path import Path
-from pytablereader.interface import AbstractTableReader
-from simplesqlite import SimpleSQLite
+from simplesqlite import OperationalError, SimpleSQLite
 from simplesqlite.model import Integer, Model, Text
+from simplesqlite.query import Attr, Table
 from tabledata import TableData
 from tcolorpy import tcolor
 
 from .._common import DEFAULT_DUP_COL_HANDLER, ResultLogger
 from .._const import MAX_VERBOSITY_LEVEL, PROGRAM_NAME, TABLE_NOT_FOUND_MSG_FORMAT
 from .._counter import ResultCounter
-from .._types import ConvertConfig
+from .._stats import ConversionStats, Stage
+from .._types import ConvertConfig, TypeHintRules
+from ._chunked_loader import ChunkedTableFileLoader
+from ._common import TYPE_HINT_FROM_HEADER_RULES, normalize_type_hint
 from ._ipynb_converter import convert_nb
-from ._table_creator import TableCreator
+from ._schema_catalog import SchemaCatalog
+from ._table_creator import TableCreator, TableRecords, TypeInferenceSample
+from ._type_cache import TypeCache, TypeCacheMap
 
 
 class SourceInfo(Model):
@@ -31,6 +52,7 @@ class SourceInfo(Model):
     dst_table = Text(not_null=True)
     size = Integer()
     mtime = Integer()
+    sha256 = Text()
 
     def get_name(self, verbosity_level: int) -> str:
         if verbosity_level == 0 or self.dir_name is None:
@@ -39,7 +61,52 @@ class SourceInfo(Model):
         return os.path.join(self.dir_name, self.base_name)
 
 
+def normalize_table(
+    table_data: TableData,
+    matrix_formatting: MatrixFormatting,
+    is_type_inference: bool,
+    symbol_replace_value: Optional[str],
+    max_workers: int,
+    dup_col_handler: Optional[str] = None,
+) -> TableData:
+    from pathvalidate import replace_symbol, replace_unprintable_char
+    from simplesqlite import SQLiteTableDataSanitizer
+
+    if dup_col_handler is None:
+        dup_col_handler = DEFAULT_DUP_COL_HANDLER
+    assert dup_col_handler
+
+    table_data.dp_extractor.matrix_formatting = matrix_formatting
+    normalized_table_data = SQLiteTableDataSanitizer(
+        table_data,
+        dup_col_handler=dup_col_handler,
+        is_type_inference=is_type_inference,
+        max_workers=max_workers,
+    ).normalize()
+
+    if symbol_replace_value is None:
+        return normalized_table_data
+
+    return TableData(
+        normalized_table_data.table_name,
+        [
+            replace_symbol(
+                replace_unprintable_char(header),
+                symbol_replace_value,
+                is_replace_consecutive_chars=True,
+                is_strip=True,
+            )
+            for header in normalized_table_data.headers
+        ],
+        normalized_table_data.rows,
+        dp_extractor=normalized_table_data.dp_extractor,
+        type_hints=table_data.dp_extractor.column_type_hints,
+    )
+
+
 class TableConverter:
+    SOURCE_INFO_BATCH_SIZE = 1000
+
     def __init__(
         self,
         logger: Any,
@@ -55,6 +122,9 @@ class TableConverter:
         max_workers: int,
         format_name: str,
         encoding: Optional[str] = None,
+        infer_sample: Optional[TypeInferenceSample] = None,
+        type_cache_path: Optional[str] = None,
+        ipynb_image_storage: str = "inline",
     ) -> None:
         self._logger = logger
         self._con = con
@@ -68,32 +138,124 @@ class TableConverter:
         self._max_workers = max_workers
         self._format_name = format_name
         self._encoding = encoding
+        self._infer_sample = infer_sample
+        self._type_cache = TypeCache(logger, type_cache_path) if type_cache_path else None
+        self._ipynb_image_storage = ipynb_image_storage
 
         self._result_counter = ResultCounter()
+        self._stats = ConversionStats(fetch_db_size=self.__fetch_db_size)
+        self._schema_catalog = SchemaCatalog(con)
         self._result_logger = ResultLogger(
-            logger, self._con.schema_extractor, self._result_counter, self._verbosity_level
+            logger,
+            self._schema_catalog,
+            self._result_counter,
+            self._verbosity_level,
+            stats=self._stats,
         )
         self._table_creator = TableCreator(
             logger=self._logger,
             dst_con=con,
+            schema_catalog=self._schema_catalog,
+            stats=self._stats,
             add_pri_key_name=add_pri_key_name,
             result_logger=self._result_logger,
             verbosity_level=verbosity_level,
             max_workers=self._max_workers,
+            infer_sample=infer_sample,
+            type_cache=self._type_cache,
         )
 
         SourceInfo.attach(con, is_hidden=True)
         SourceInfo.create()
+        self.__migrate_source_info()
+        self.__next_source_id: Optional[int] = None
+        self.__source_info_records: List[SourceInfo] = []
+
+    @property
+    def _type_cache_map(self) -> Optional[TypeCacheMap]:
+        return self._type_cache.types if self._type_cache else None
+
+    def _extract_type_hint_rules(
+        self, is_target: Callable[[Dict[str, Any]], bool]
+    ) -> TypeHintRules:
+        if self._is_type_hint_header:
+            return TYPE_HINT_FROM_HEADER_RULES
+
+        type_hint_rules = {}
+
+        for config in self._convert_configs or []:
+            if not isinstance(config, dict):
+                self._logger.debug(f"unexpected config value: {config}")
+                continue
+
+            if not is_target(config):
+                continue
+
+            for pattern, params in config["rules"].items():
+                if not params.get("type hint"):
+                    continue
+
+                type_hint_rules[re.compile(pattern, re.IGNORECASE)] = normalize_type_hint(
+                    params["type hint"]
+                )
+
+        return type_hint_rules
 
     def _fetch_next_source_id(self) -> int:
+        if self.__next_source_id is not None:
+            return self.__next_source_id
+
         source_id = self._con.fetch_value(
             select="MAX({})".format("source_id"), table_name=SourceInfo.get_table_name()
         )
 
         if source_id is None:
-            return 1
+            self.__next_source_id = 1
+        else:
+            self.__next_source_id = source_id + 1
+
+        return self.__next_source_id
+
+    def _insert_source_info(self, record: SourceInfo) -> None:
+        self.__source_info_records.append(record)
+        self.__next_source_id = max(self._fetch_next_source_id(), record.source_id + 1)
 
-        return source_id + 1
+        if len(self.__source_info_records) >= self.SOURCE_INFO_BATCH_SIZE:
+            self.flush_source_info()
+
+    def flush_source_info(self) -> None:
+        if not self.__source_info_records:
+            return
+
+        attr_names = SourceInfo.get_attr_names()
+        self._con.insert_many(
+            SourceInfo.get_table_name(),
+            [
+                [getattr(record, attr_name) for attr_name in attr_names]
+                for record in self.__source_info_records
+            ],
+            attr_names=[SourceInfo.attr_to_column(attr_name) for attr_name in attr_names],
+        )
+        self.__source_info_records.clear()
+
+    def __migrate_source_info(self) -> None:
+        # add columns to the source info table of databases created by older versions
+        table_name = SourceInfo.get_table_name()
+        attr_names = self._con.fetch_attr_names(table_name)
+
+        for attr_name in SourceInfo.get_attr_names():
+            if attr_name in attr_names:
+                continue
+
+            col = SourceInfo._get_col(attr_name, validate_name=False)
+            self._con.execute_query(
+                "ALTER TABLE {} ADD COLUMN {} {}".format(
+                    Table(table_name), Attr(attr_name), col.get_desc()
+                )
+            )
+
+    def create_deferred_index_list(self) -> None:
+        self._table_creator.create_deferred_index_list()
 
     def get_return_code(self) -> int:
         return self._result_counter.get_return_code()
@@ -101,43 +263,46 @@ class TableConverter:
     def get_success_count(self) -> int:
         return self._result_counter.success_count
 
-    def normalize_table(
-        self, table_data: TableData, dup_col_handler: Optional[str] = None
-    ) -> TableData:
-        from pathvalidate import replace_symbol, replace_unprintable_char
-        from simplesqlite import SQLiteTableDataSanitizer
-
-        if dup_col_handler is None:
-            dup_col_handler = DEFAULT_DUP_COL_HANDLER
-        assert dup_col_handler
-
-        table_data.dp_extractor.matrix_formatting = self._matrix_formatting
-        normalized_table_data = SQLiteTableDataSanitizer(
-            table_data,
-            dup_col_handler=dup_col_handler,
-            is_type_inference=self._is_type_inference,
-            max_workers=self._max_workers,
-        ).normalize()
+    def get_stats(self) -> ConversionStats:
+        return self._stats
 
-        if self._symbol_replace_value is None:
-            return normalized_table_data
+    def save_type_cache(self) -> None:
+        if self._type_cache:
+            self._type_cache.save()
 
-        return TableData(
-            normalized_table_data.table_name,
-            [
-                replace_symbol(
-                    replace_unprintable_char(header),
-                    self._symbol_replace_value,
-                    is_replace_consecutive_chars=True,
-                    is_strip=True,
-                )
-                for header in normalized_table_data.headers
-            ],
-            normalized_table_data.rows,
-            dp_extractor=normalized_table_data.dp_extractor,
-            type_hints=table_data.dp_extractor.column_type_hints,
+    def write_stats_json(self, file_path: str) -> None:
+        stats = self._stats.as_dict(table_sizes=self.__fetch_table_sizes())
+
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=4)
+
+        self._logger.debug(f"write stats to '{file_path}'")
+
+    @contextmanager
+    def _measure_source(self, source: str, bytes_read: Optional[int]) -> Iterator[None]:
+        with self._stats.measure_source(source, bytes_read) as source_stats:
+            yield
+
+        self._logger.debug(
+            "stats: source={source}, elapsed={elapsed:.3f}s, rows={rows}, "
+            "bytes_read={bytes_read}, bytes_written={bytes_written}, tables={tables}".format(
+                **source_stats
+            )
         )
 
+    def normalize_table(
+        self, table_data: TableData, dup_col_handler: Optional[str] = None
+    ) -> TableData:
+        with self._stats.measure(Stage.NORMALIZE):
+            return normalize_table(
+                table_data,
+                matrix_formatting=self._matrix_formatting,
+                is_type_inference=self._is_type_inference,
+                symbol_replace_value=self._symbol_replace_value,
+                max_workers=self._max_workers,
+                dup_col_handler=dup_col_handler,
+            )
+
     def write_completion_message(self) -> None:
         logger = self._logger
 
@@ -166,6 +331,11 @@ class TableConverter:
                 tcolor("fail=", color="red")
                 + tcolor(str(self._result_counter.fail_count), color="light_red"),
             )
+        if self._result_counter.unchanged_count > 0:
+            log_list.append(
+                tcolor("unchanged=", color="white")
+                + tcolor(str(self._result_counter.unchanged_count), color="light_white"),
+            )
         if self._result_counter.skip_count > 0:
             log_list.append(
                 tcolor("skip=", color="yellow")
@@ -178,6 +348,14 @@ class TableConverter:
             )
 
         logger.info("converted results: {}".format(", ".join(log_list)))
+        logger.debug(
+            "stage elapsed: {}".format(
+                ", ".join(
+                    f"{stage}={elapsed:.3f}s"
+                    for stage, elapsed in self._stats.as_dict()["stages"].items()
+                )
+            )
+        )
         database_path_msg = "database path: {:s}".format(
             tcolor(Path(self._con.database_path).relpath(), color="light_white"),
         )
@@ -203,15 +381,102 @@ class TableConverter:
         else:
             logger.debug(database_path_msg)
 
+    def _convert_chunks(
+        self,
+        loader: ChunkedTableFileLoader,
+        source: str,
+        source_info_record_base: SourceInfo,
+        is_follow: bool = False,
+    ) -> None:
+        def iter_table_records() -> Iterator[TableRecords]:
+            for table_data in self._stats.iter_measure(Stage.LOAD, loader.load):
+                self._logger.debug(f"loaded chunk: {str(table_data)}")
+
+                sqlite_tabledata = self.normalize_table(table_data)
+                with self._stats.measure(Stage.NORMALIZE):
+                    table_records = TableRecords.from_tabledata(
+                        sqlite_tabledata, self._infer_sample, self._type_cache_map
+                    )
+
+                yield table_records
+
+        self._write_chunks(
+            loader.format_name,
+            iter_table_records(),
+            source,
+            source_info_record_base,
+            is_follow=is_follow,
+        )
+
+    def _write_chunks(
+        self,
+        format_name: str,
+        table_records_list: Iterable[TableRecords],
+        source: str,
+        source_info_record_base: SourceInfo,
+        is_follow: bool = False,
+    ) -> None:
+        # write chunks of a source to a table: the schema of the table is fixed by
+        # the first chunk, and records of the rest of the chunks are appended to it
+        logger = self._logger
+        result_counter = self._result_counter
+        dst_table_name = None
+
+        source_info_record_base.format_name = format_name
+
+        try:
+            for table_records in table_records_list:
+                try:
+                    if dst_table_name is None:
+                        dst_table_name = self._table_creator.create_from_records(
+                            table_records, self._index_list, source_info=source_info_record_base
+                        )
+
+                        record = deepcopy(source_info_record_base)
+                        record.dst_table = dst_table_name
+                        self._insert_source_info(record)
+
+                        if is_follow:
+                            # written before the rest of chunks: loading a followed file
+                            # ends with an interruption
+                            self.flush_source_info()
+                            self._con.commit()
+                    else:
+                        self._table_creator.append_records(dst_table_name, table_records)
+                except (ValueError, OSError) as e:
+                    logger.debug(f"exception={type(e).__name__:s}, path={source}, message={e}")
+                    result_counter.inc_fail()
+                    break
+        except ptr.ValidationError as e:
+            logger.error(
+                "{:s}: invalid {} data format: path={}, message={}".format(
+                    e.__class__.__name__, format_name, source, str(e)
+                )
+            )
+            result_counter.inc_fail()
+        except ptr.DataError as e:
+            logger.error(
+                "{:s}: invalid {} data: path={}, message={}".format(
+                    e.__class__.__name__, format_name, source, str(e)
+                )
+            )
+            result_counter.inc_fail()
+        except OverflowError as e:
+            logger.error(f"{source}: {e}")
+            result_counter.inc_fail()
+
     def _convert_nb(self, nb: nbformat.NotebookNode, source_info: SourceInfo) -> Set[str]:
         success_count = self._result_counter.success_count
-        created_table_set = convert_nb(
-            logger=self._logger,
-            source_info=source_info,
-            con=self._con,
-            result_logger=self._result_logger,
-            nb=nb,
-        )
+
+        with self._stats.measure(Stage.CREATE):
+            created_table_set = convert_nb(
+                logger=self._logger,
+                source_info=source_info,
+                con=self._con,
+                result_logger=self._result_logger,
+                nb=nb,
+                image_storage=self._ipynb_image_storage,
+            )
 
         if self._result_counter.success_count == success_count:
             self._logger.warning(TABLE_NOT_FOUND_MSG_FORMAT.format(source_info.base_name))
@@ -219,9 +484,7 @@ class TableConverter:
 
         return created_table_set
 
-    def _convert_complex_json(
-        self, json_loader: AbstractTableReader, source_info: SourceInfo
-    ) -> Set[str]:
+    def _convert_complex_json(self, json_data: Any, source_info: SourceInfo) -> Set[str]:
         from ._dict_converter import DictConverter
 
         dict_converter = DictConverter(
@@ -231,15 +494,38 @@ class TableConverter:
             index_list=self._index_list,
             matrix_formatting=self._matrix_formatting,
             max_workers=self._max_workers,
+            stats=self._stats,
         )
 
-        try:
-            dict_converter.to_sqlite_table(json_loader.load_dict(), [])
-        except AttributeError:
-            pass
+        dict_converter.to_sqlite_table(json_data, [])
 
         return dict_converter.converted_table_name_set
 
+    def __fetch_db_size(self) -> int:
+        db_size = 1
+
+        for pragma in ("page_count", "page_size"):
+            result = self._con.execute_query(f"PRAGMA {pragma}")
+            if result is None:
+                return 0
+
+            db_size *= result.fetchone()[0]
+
+        return db_size
+
+    def __fetch_table_sizes(self) -> Dict[str, int]:
+        try:
+            result = self._con.execute_query("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")
+        except OperationalError as e:
+            # dbstat virtual table is not available in some of SQLite builds
+            self._logger.debug(f"failed to fetch table sizes: {e}")
+            return {}
+
+        if result is None:
+            return {}
+
+        return dict(result.fetchall())
+
     def __get_dump_param(self) -> Tuple[str, int]:
         found_ptw = True
         try:
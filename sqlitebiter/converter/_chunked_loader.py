@@ -0,0 +1,491 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+import abc
+import csv
+import os
+import stat
+import threading
+import time
+from contextlib import nullcontext
+from itertools import islice
+from queue import Empty, Queue
+from typing import (
+    IO,
+    Any,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
+
+import pytablereader as ptr
+import typepy
+from mbstrdecoder import detect_file_encoding
+from path import Path
+from tabledata import TableData
+
+from .._types import TypeHintRules
+from ._compression import (
+    DECOMPRESSION_ERRORS,
+    detect_compression,
+    open_decompressed,
+    strip_compression_ext,
+)
+from ._mmap_reader import MmapLineReader, is_mmap_encoding, split_byte_ranges
+
+
+try:
+    import ujson as json
+except ImportError:
+    import json  # type: ignore
+
+
+CHUNKABLE_FORMAT_NAMES = ("csv", "tsv", "ltsv", "json_lines")
+RANGE_SPLITTABLE_FORMAT_NAMES = ("csv", "tsv")
+_DEFAULT_ENCODING = "utf-8"
+_END_OF_RECORDS = object()
+
+
+class ChunkedTableFileLoader(metaclass=abc.ABCMeta):
+    @property
+    @abc.abstractmethod
+    def format_name(self) -> str:  # pragma: no cover
+        pass
+
+    def __init__(
+        self,
+        source: Union[Path, IO[str]],
+        encoding: Optional[str],
+        chunk_rows: int,
+        type_hint_rules: Optional[TypeHintRules],
+        flush_interval: Optional[float] = None,
+        poll_interval: float = 0.2,
+        table_name: Optional[str] = None,
+    ) -> None:
+        if chunk_rows <= 0:
+            raise ValueError(f"chunk_rows must be greater than zero: actual={chunk_rows}")
+
+        # source is either a file path or a text stream (e.g. stdin)
+        self.__file_path: Optional[Path] = None
+        self.__stream: Optional[IO[str]] = None
+        self.__compression: Optional[str] = None
+        if isinstance(source, str):
+            self.__file_path = Path(source)
+            self.__compression = detect_compression(self.__file_path)
+        else:
+            self.__stream = source
+
+        self.__encoding = encoding
+        self.__detected_encoding: Optional[str] = None
+        self.__chunk_rows = chunk_rows
+        self.__table_name = table_name
+        self.__type_hint_rules = type_hint_rules
+
+        # follow mode: keep reading data appended to the source until the writers of
+        # a FIFO/stream close it (regular files are followed until interrupted).
+        # a chunk is also yielded when flush_interval seconds elapsed since
+        # the first record of the chunk is read.
+        self.__flush_interval = flush_interval
+        self.__poll_interval = poll_interval
+
+    def load(self) -> Iterator[TableData]:
+        if self.__flush_interval is not None:
+            yield from self.__to_tables(self.__iter_follow_chunks(self.__flush_interval))
+            return
+
+        with self.__open_lines() as lines:
+            try:
+                yield from self.__to_tables(self.__iter_chunks(self._iter_records(lines)))
+            except DECOMPRESSION_ERRORS as e:
+                if self.__compression is None:
+                    raise
+
+                raise ptr.DataError(f"failed to decompress {self.__compression} data: {e}")
+
+    def split_ranges(self, num_ranges: int) -> Optional[List[Tuple[int, int]]]:
+        """
+        Split the source file into byte ranges that can be loaded by :py:meth:`load_range`
+        in parallel. Return None if the source is not a local file that can be mapped.
+        """
+
+        if self.__flush_interval is not None or not self.__is_mmap_source():
+            return None
+
+        return split_byte_ranges(
+            cast(Path, self.__file_path), num_ranges, quotechar=self._quotechar
+        )
+
+    def load_headers(self) -> List[str]:
+        with self.__open_lines() as lines:
+            chunk = list(islice(self._iter_records(lines), 1))
+
+        if not chunk:
+            raise ptr.DataError("data row must be greater or equal than one")
+
+        headers, _ = self._split_headers(chunk)
+
+        return headers
+
+    def load_range(self, start: int, end: int, headers: List[str]) -> Iterator[TableData]:
+        # executed in worker processes: the header row is included in the range that
+        # starts at the beginning of the file
+        table_name = self.__make_table_name()
+        type_hints = self.__extract_type_hints(headers)
+
+        with MmapLineReader(
+            cast(Path, self.__file_path), self.__get_encoding(), start=start, end=end
+        ) as lines:
+            records = self._iter_records(lines)
+            if start == 0:
+                next(records, None)
+
+            for chunk in self.__iter_chunks(records):
+                yield TableData(table_name, headers, chunk, type_hints=type_hints)
+
+    @property
+    def _quotechar(self) -> Optional[str]:
+        return None
+
+    @abc.abstractmethod
+    def _iter_records(self, lines: Iterable[str]) -> Iterator[Any]:  # pragma: no cover
+        pass
+
+    @abc.abstractmethod
+    def _split_headers(self, chunk: List[Any]) -> Tuple[List[str], List[Any]]:  # pragma: no cover
+        pass
+
+    def _extend_headers(self, headers: List[str], chunk: List[Any]) -> List[str]:
+        return headers
+
+    def __to_tables(self, chunks: Iterator[List[Any]]) -> Iterator[TableData]:
+        table_name = self.__make_table_name()
+        headers: Optional[List[str]] = None
+        type_hints: List[Any] = []
+        is_loaded = False
+
+        for chunk in chunks:
+            if headers is None:
+                headers, chunk = self._split_headers(chunk)
+                type_hints = self.__extract_type_hints(headers)
+            else:
+                # records of a chunk may have keys that are not in the preceding chunks
+                extended_headers = self._extend_headers(headers, chunk)
+                if extended_headers != headers:
+                    headers = extended_headers
+                    type_hints = self.__extract_type_hints(headers)
+
+            if not chunk:
+                continue
+
+            is_loaded = True
+            yield TableData(table_name, headers, chunk, type_hints=type_hints)
+
+        if not is_loaded:
+            raise ptr.DataError("data row must be greater or equal than one")
+
+    def __iter_chunks(self, records: Iterator[Any]) -> Iterator[List[Any]]:
+        chunk = []
+
+        for record in records:
+            chunk.append(record)
+
+            if len(chunk) >= self.__chunk_rows:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    def __iter_follow_chunks(self, flush_interval: float) -> Iterator[List[Any]]:
+        # records are read by a thread to flush chunks at the interval while
+        # waiting for new data. the queue size bounds the number of unflushed records.
+        record_queue: "Queue[Any]" = Queue(maxsize=self.__chunk_rows)
+        reader = threading.Thread(target=self.__read_records, args=(record_queue,), daemon=True)
+        reader.start()
+
+        chunk: List[Any] = []
+        flush_time = 0.0
+
+        while True:
+            timeout = max(0.0, flush_time - time.monotonic()) if chunk else None
+
+            try:
+                record = record_queue.get(timeout=timeout)
+            except Empty:
+                yield chunk
+                chunk = []
+                continue
+            except KeyboardInterrupt:
+                if chunk:
+                    yield chunk
+                raise
+
+            if record is _END_OF_RECORDS:
+                break
+            if isinstance(record, Exception):
+                raise record
+
+            if not chunk:
+                flush_time = time.monotonic() + flush_interval
+
+            chunk.append(record)
+
+            if len(chunk) >= self.__chunk_rows:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    def __read_records(self, record_queue: "Queue[Any]") -> None:
+        try:
+            with self.__open() as fp:
+                for record in self._iter_records(self.__follow_lines(fp)):
+                    record_queue.put(record)
+        except Exception as e:
+            record_queue.put(e)
+            return
+
+        record_queue.put(_END_OF_RECORDS)
+
+    def __follow_lines(self, fp: IO[str]) -> Iterator[str]:
+        is_regular_file = self.__file_path is not None and stat.S_ISREG(
+            os.fstat(fp.fileno()).st_mode
+        )
+        line = ""
+
+        while True:
+            line += fp.readline()
+
+            if not line.endswith("\n"):
+                if is_regular_file:
+                    # wait for the rest of the line or new lines written to the file
+                    time.sleep(self.__poll_interval)
+                    continue
+
+                # writers of the FIFO/stream closed it
+                if line:
+                    yield line
+                return
+
+            yield line
+            line = ""
+
+    def __make_table_name(self) -> str:
+        if self.__table_name:
+            return self.__table_name
+
+        if self.__file_path is None:
+            # same as the table name of the first table loaded by pytablereader text loaders
+            return f"{self.format_name}1"
+
+        return strip_compression_ext(self.__file_path).stem
+
+    def __open_lines(self) -> ContextManager[Iterable[str]]:
+        if self.__is_mmap_source():
+            return MmapLineReader(cast(Path, self.__file_path), self.__get_encoding())
+
+        return self.__open()
+
+    def __is_mmap_source(self) -> bool:
+        if self.__file_path is None or self.__compression or not self.__file_path.isfile():
+            return False
+
+        return is_mmap_encoding(self.__get_encoding())
+
+    def __open(self) -> ContextManager[IO[str]]:
+        if self.__file_path is None:
+            # streams are closed by the owners
+            return nullcontext(cast(IO[str], self.__stream))
+
+        if self.__compression:
+            return open_decompressed(self.__file_path, self.__compression, self.__encoding)
+
+        return open(self.__file_path, encoding=self.__get_encoding(), newline="")
+
+    def __get_encoding(self) -> str:
+        if self.__encoding:
+            return self.__encoding
+
+        if self.__flush_interval is not None:
+            # detecting encodings of FIFOs consumes the data
+            return _DEFAULT_ENCODING
+
+        if self.__detected_encoding is None:
+            self.__detected_encoding = detect_file_encoding(self.__file_path) or _DEFAULT_ENCODING
+
+        return self.__detected_encoding
+
+    def __extract_type_hints(self, headers: Sequence[str]) -> List[Any]:
+        if not self.__type_hint_rules:
+            return []
+
+        type_hints: List[Any] = []
+        for header in headers:
+            for regexp, type_hint in self.__type_hint_rules.items():
+                if regexp.search(header):
+                    type_hints.append(type_hint)
+                    break
+            else:
+                type_hints.append(None)
+
+        return type_hints
+
+
+class ChunkedCsvTableFileLoader(ChunkedTableFileLoader):
+    @property
+    def format_name(self) -> str:
+        return "csv"
+
+    @property
+    def _delimiter(self) -> str:
+        return ","
+
+    @property
+    def _quotechar(self) -> Optional[str]:
+        return '"'
+
+    def _iter_records(self, lines: Iterable[str]) -> Iterator[Any]:
+        reader = csv.reader(
+            lines,
+            delimiter=self._delimiter,
+            quotechar=self._quotechar,
+            strict=True,
+            skipinitialspace=True,
+        )
+
+        try:
+            for row in reader:
+                if typepy.is_not_empty_sequence(row):
+                    yield row
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise ptr.DataError(e)
+
+    def _split_headers(self, chunk: List[Any]) -> Tuple[List[str], List[Any]]:
+        headers = chunk[0]
+
+        if any([typepy.is_null_string(header) for header in headers]):
+            raise ptr.DataError(
+                "the first line includes empty string item."
+                "all of the items should contain header name."
+                "actual={}".format(headers)
+            )
+
+        return (headers, chunk[1:])
+
+
+class ChunkedTsvTableFileLoader(ChunkedCsvTableFileLoader):
+    @property
+    def format_name(self) -> str:
+        return "tsv"
+
+    @property
+    def _delimiter(self) -> str:
+        return "\t"
+
+
+class ChunkedJsonLinesTableFileLoader(ChunkedTableFileLoader):
+    @property
+    def format_name(self) -> str:
+        return "json_lines"
+
+    def _iter_records(self, lines: Iterable[str]) -> Iterator[Any]:
+        for line_idx, line in enumerate(lines):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ptr.ValidationError(f"line {line_idx + 1}: {e}: {line}")
+
+            if not isinstance(record, dict) or any(
+                [isinstance(value, (dict, list)) for value in record.values()]
+            ):
+                raise ptr.ValidationError(f"line {line_idx + 1}: not a flat JSON object: {line}")
+
+            yield record
+
+    def _split_headers(self, chunk: List[Any]) -> Tuple[List[str], List[Any]]:
+        return (_extract_keys(chunk), chunk)
+
+    def _extend_headers(self, headers: List[str], chunk: List[Any]) -> List[str]:
+        return _extract_keys(chunk, headers)
+
+
+class ChunkedLtsvTableFileLoader(ChunkedTableFileLoader):
+    @property
+    def format_name(self) -> str:
+        return "ltsv"
+
+    def _iter_records(self, lines: Iterable[str]) -> Iterator[Any]:
+        for line_idx, line in enumerate(lines):
+            line = line.strip()
+            if not line:
+                continue
+
+            record = {}
+            for col_idx, ltsv_item in enumerate(line.split("\t")):
+                try:
+                    label, value = ltsv_item.split(":", 1)
+                except ValueError:
+                    raise ptr.DataError(
+                        "invalid ltsv item found: line={}, col={}, item='{}'".format(
+                            line_idx, col_idx, ltsv_item
+                        )
+                    )
+
+                record[label.strip('"')] = value
+
+            yield record
+
+    def _split_headers(self, chunk: List[Any]) -> Tuple[List[str], List[Any]]:
+        return (_extract_keys(chunk), chunk)
+
+    def _extend_headers(self, headers: List[str], chunk: List[Any]) -> List[str]:
+        return _extract_keys(chunk, headers)
+
+
+def _extract_keys(records: List[Any], base_keys: Sequence[str] = ()) -> List[str]:
+    # a dict keeps the first-seen order of keys with constant time membership tests
+    keys: Dict[str, None] = dict.fromkeys(base_keys)
+
+    for record in records:
+        keys.update(dict.fromkeys(record))
+
+    return list(keys)
+
+
+def create_chunked_loader(
+    source: Union[Path, IO[str]],
+    format_name: str,
+    encoding: Optional[str],
+    chunk_rows: int,
+    type_hint_rules: Optional[TypeHintRules],
+    flush_interval: Optional[float] = None,
+    table_name: Optional[str] = None,
+) -> ChunkedTableFileLoader:
+    loader_classes = {
+        "csv": ChunkedCsvTableFileLoader,
+        "tsv": ChunkedTsvTableFileLoader,
+        "ltsv": ChunkedLtsvTableFileLoader,
+        "json_lines": ChunkedJsonLinesTableFileLoader,
+    }
+
+    return loader_classes[format_name](
+        source,
+        encoding=encoding,
+        chunk_rows=chunk_rows,
+        type_hint_rules=type_hint_rules,
+        flush_interval=flush_interval,
+        table_name=table_name,
+    )
@@ -2,8 +2,10 @@
 .. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
 """
 
+import os.path
 import re
-from typing import Type
+from fnmatch import fnmatch
+from typing import Any, Dict, Type
 
 from typepy import Integer, RealNumber, String
 from typepy.type import AbstractType
@@ -27,3 +29,12 @@ _to_type_hint = {
 
 def normalize_type_hint(type_hint_str: str) -> Type[AbstractType]:
     return _to_type_hint[type_hint_str.strip().casefold()]
+
+
+def is_target_path(config: Dict[str, Any], source: str) -> bool:
+    # configs without "target_path" are applied to all of the sources
+    pattern = config.get("target_path")
+    if not pattern:
+        return True
+
+    return fnmatch(source, pattern) or fnmatch(os.path.basename(source), pattern)
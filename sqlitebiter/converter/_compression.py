@@ -0,0 +1,128 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import re
+import zlib
+from typing import IO, Optional, Pattern, Tuple, Type
+
+from path import Path
+from pytablereader.factory import TableFileLoaderFactory
+
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore
+
+
+class Compression:
+    GZIP = "gzip"
+    BZIP2 = "bzip2"
+    XZ = "xz"
+    ZSTD = "zstd"
+
+
+COMPRESSION_EXT_MAP = {
+    ".gz": Compression.GZIP,
+    ".gzip": Compression.GZIP,
+    ".bz2": Compression.BZIP2,
+    ".xz": Compression.XZ,
+    ".lzma": Compression.XZ,
+    ".zst": Compression.ZSTD,
+    ".zstd": Compression.ZSTD,
+}
+_MAGIC_NUMBERS: Tuple[Tuple[Pattern[bytes], str], ...] = (
+    (re.compile(rb"\x1f\x8b"), Compression.GZIP),
+    # stream header: 'BZh', a block size from 1 to 9, and the magic number of the first block
+    (re.compile(rb"BZh[1-9]1AY&SY"), Compression.BZIP2),
+    (re.compile(rb"\xfd7zXZ\x00"), Compression.XZ),
+    (re.compile(rb"\x28\xb5\x2f\xfd"), Compression.ZSTD),
+)
+_MAGIC_NUMBER_SIZE = 10
+
+# extensions of uncompressed data formats: files that have the extensions are not sniffed
+_FORMAT_EXTS = frozenset(
+    [f".{ext}" for ext in TableFileLoaderFactory("").get_extensions()] + [".ipynb"]
+)
+_DEFAULT_ENCODING = "utf-8"
+
+# exceptions raised while reading corrupted or truncated compressed data
+DECOMPRESSION_ERRORS: Tuple[Type[Exception], ...] = (EOFError, OSError, lzma.LZMAError, zlib.error)
+if zstandard is not None:
+    DECOMPRESSION_ERRORS += (zstandard.ZstdError,)
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    """
+    Detect the compression format of a file from the extension or the magic number.
+    Magic numbers are checked only for files that do not have extensions of
+    uncompressed data formats.
+    """
+
+    fpath = Path(file_path)
+    ext = fpath.ext.lower()
+    compression = COMPRESSION_EXT_MAP.get(ext)
+    if compression:
+        return compression
+
+    if ext in _FORMAT_EXTS:
+        return None
+
+    if not fpath.isfile():
+        # reading magic numbers consumes data of FIFOs
+        return None
+
+    try:
+        with open(fpath, "rb") as f:
+            head = f.read(_MAGIC_NUMBER_SIZE)
+    except OSError:
+        return None
+
+    for magic_number, compression in _MAGIC_NUMBERS:
+        if magic_number.match(head):
+            return compression
+
+    return None
+
+
+def strip_compression_ext(file_path: str) -> Path:
+    """
+    Return the path of decompressed data: the extension of the path is used to find
+    the data format (e.g. ``a.csv.gz`` -> ``a.csv``).
+    """
+
+    fpath = Path(file_path)
+    if fpath.ext.lower() in COMPRESSION_EXT_MAP:
+        return fpath.stripext()
+
+    return fpath
+
+
+def open_decompressed(file_path: str, compression: str, encoding: Optional[str]) -> IO[str]:
+    # decompress data as a stream: decompressed data is not written to the disk
+    encoding = encoding or _DEFAULT_ENCODING
+
+    if compression == Compression.GZIP:
+        return gzip.open(file_path, "rt", encoding=encoding, newline="")
+    if compression == Compression.BZIP2:
+        return bz2.open(file_path, "rt", encoding=encoding, newline="")
+    if compression == Compression.XZ:
+        return lzma.open(file_path, "rt", encoding=encoding, newline="")
+    if compression == Compression.ZSTD:
+        if zstandard is None:
+            raise ImportError(
+                "zstandard package is required to load zstd compressed files: "
+                "try to install dependencies with 'pip install sqlitebiter[zstd]'"
+            )
+
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            open(file_path, "rb"), read_across_frames=True, closefd=True
+        )
+        return io.TextIOWrapper(reader, encoding=encoding, newline="")
+
+    raise ValueError(f"unknown compression: {compression}")
@@ -2,20 +2,77 @@
 .. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
 """
 
-import re
-from collections import OrderedDict
-from typing import Any, List, Sequence, Set, cast
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
 import msgfy
 import pytablereader as ptr
-from dataproperty import MatrixFormatting
+import typepy
+from dataproperty import DataPropertyExtractor, MatrixFormatting
 from simplesqlite import SQLiteTableDataSanitizer
 from tabledata import TableData
 
+from .._stats import ConversionStats, Stage
 from ._base import SourceInfo
+from ._json_loader import is_json_columns, is_json_record, is_json_records, is_json_scalar
 from ._table_creator import TableCreator
 
 
+# rows of the tables that have the same name and headers are accumulated
+# and converted at once when the number of rows reached to the value.
+_BATCH_ROWS = 10000
+
+# (table name keys, headers, rows)
+_Table = Tuple[List[str], List[str], List[Sequence[Any]]]
+
+_END = object()
+
+# (path keys, iterator of items, scalar values of a dict: None for lists)
+_Frame = Tuple[List[str], Iterator[Any], Optional[Dict[str, Any]]]
+
+
+def _from_records(records: List[Dict[str, Any]]) -> Tuple[List[str], List[Sequence[Any]]]:
+    headers = sorted({key for record in records for key in record})
+
+    return (headers, [tuple(record.get(header) for header in headers) for record in records])
+
+
+def _from_columns(columns: Dict[str, List[Any]]) -> Tuple[List[str], List[Sequence[Any]]]:
+    headers = sorted(columns)
+
+    return (headers, list(zip(*(columns[header] for header in headers))))
+
+
+def _from_record(record: Dict[str, Any]) -> Tuple[List[str], List[Sequence[Any]]]:
+    return (["key", "value"], list(record.items()))
+
+
+_TABLE_RULES = (
+    (is_json_records, _from_records),
+    (is_json_columns, _from_columns),
+    (is_json_record, _from_record),
+)
+
+
+def _to_tables(value: Any) -> Optional[List[_Table]]:
+    # classify a JSON value with the same rules (and the same precedence) as load_tables.
+    # return None if the value is not a table.
+    if isinstance(value, dict):
+        for is_table, from_table in _TABLE_RULES:
+            if all(is_table(v) for v in value.values()):
+                return [([key],) + from_table(v) for key, v in value.items()]
+
+        for is_table, from_table in _TABLE_RULES[1:]:
+            if is_table(value):
+                return [([],) + from_table(value)]
+
+        return None
+
+    if is_json_records(value):
+        return [([],) + _from_records(value)]
+
+    return None
+
+
 class DictConverter:
     @property
     def converted_table_name_set(self) -> Set[str]:
@@ -29,6 +86,7 @@ class DictConverter:
         index_list: Sequence[str],
         matrix_formatting: MatrixFormatting,
         max_workers: int,
+        stats: ConversionStats,
     ) -> None:
         self.__logger = logger
         self.__table_creator = table_creator
@@ -36,54 +94,102 @@ class DictConverter:
         self.__source_info = source_info
         self.__max_workers = max_workers
         self.__matrix_formatting = matrix_formatting
+        self.__stats = stats
         self.__converted_table_name_set: Set[str] = set()
+        self.__batches: Dict[Tuple[str, Tuple[str, ...]], List[Sequence[Any]]] = {}
+
+        # same settings as the extractors of pytablereader loaders
+        self.__dp_extractor = DataPropertyExtractor()
+        self.__dp_extractor.quoting_flags = None
+        self.__dp_extractor.update_strict_level_map({typepy.Typecode.BOOL: 1})
+
+    def to_sqlite_table(self, data: Any, keys: List[str]) -> None:
+        """
+        Walk a JSON document with an explicit stack that holds only the current path,
+        and convert tables that found in the document:
+
+        - arrays of objects, objects of arrays and objects of scalars are converted to tables
+          that named by the path
+        - scalars of an object are converted to a key/value table that named by the path
+        - the other objects and arrays are walked into
+        """
+
+        stack: List[_Frame] = []
+        self.__push(stack, keys, data)
+
+        while stack:
+            path, items, root_maps = stack[-1]
+            item = next(items, _END)
+
+            if item is _END:
+                stack.pop()
+                if root_maps:
+                    self.__add_table(path if path else ["root"], *_from_record(root_maps))
+                continue
 
-    def to_sqlite_table(self, data: OrderedDict, keys: List[str]) -> None:
-        if not data:
-            return
+            if root_maps is None:
+                # objects of an array are walked into to convert each of them
+                if isinstance(item, list):
+                    self.__walk(stack, path, item)
+                else:
+                    self.__push(stack, path, item)
+                continue
 
-        self.__logger.debug(f"to_sqlite_table: {type(data)}, keys={keys}")
+            key, value = item
+            if is_json_scalar(value):
+                root_maps[key] = value
+                continue
 
-        if isinstance(data, (list, tuple)):
-            for s in data:
-                self.to_sqlite_table(s, keys)
-            return
+            self.__walk(stack, path + [key], value)
 
-        root_maps = {}
+        for batch_key in list(self.__batches):
+            self.__flush(batch_key)
 
-        for key, v in data.items():
-            if isinstance(v, (str, float) + (int,)) or v is None:
-                root_maps[key] = v
-                continue
+    def __walk(self, stack: List[_Frame], path: List[str], value: Any) -> None:
+        with self.__stats.measure(Stage.LOAD):
+            tables = _to_tables(value)
 
-            loader = ptr.JsonTableDictLoader(v)
+        if tables is None:
+            self.__push(stack, path, value)
+            return
+
+        for table_keys, headers, rows in tables:
+            self.__add_table(path + table_keys, headers, rows)
+
+    def __push(self, stack: List[_Frame], path: List[str], data: Any) -> None:
+        if not data:
+            return
 
-            try:
-                for table_data in loader.load():
-                    if re.search("json[0-9]+", table_data.table_name):
-                        table_data.table_name = self.__make_table_name(keys + [key])
-                    else:
-                        table_data.table_name = self.__make_table_name(
-                            keys + [key, table_data.table_name]
-                        )
+        self.__logger.debug(f"to_sqlite_table: {type(data)}, keys={path}")
 
-                    self.__convert(table_data)
-            except ptr.DataError:
-                self.to_sqlite_table(v, keys + [key])
-            except ptr.ValidationError as e:
-                self.__logger.debug(msgfy.to_debug_message(e))
+        if isinstance(data, dict):
+            stack.append((path, iter(data.items()), {}))
+        elif isinstance(data, list):
+            stack.append((path, iter(data), None))
 
-        if not root_maps:
+    def __add_table(
+        self, keys: Sequence[str], headers: List[str], rows: List[Sequence[Any]]
+    ) -> None:
+        if not headers or not rows:
             return
 
-        loader = ptr.JsonTableDictLoader(root_maps)
-        for table_data in loader.load():
-            if keys:
-                table_data.table_name = self.__make_table_name(keys)
-            else:
-                table_data.table_name = "root"
+        batch_key = (self.__make_table_name(keys), tuple(headers))
+        batch = self.__batches.setdefault(batch_key, [])
+        batch.extend(rows)
+
+        if len(batch) >= _BATCH_ROWS:
+            self.__flush(batch_key)
 
-            self.__convert(table_data)
+    def __flush(self, batch_key: Tuple[str, Tuple[str, ...]]) -> None:
+        table_name, headers = batch_key
+        rows = self.__batches.pop(batch_key)
+
+        try:
+            self.__convert(
+                TableData(table_name, headers, rows, dp_extractor=self.__dp_extractor)
+            )
+        except ptr.DataError as e:
+            self.__logger.debug(msgfy.to_debug_message(e))
 
     def __make_table_name(self, keys: Sequence[str]) -> str:
         return "_".join(keys)
@@ -91,13 +197,15 @@ class DictConverter:
     def __convert(self, table_data: TableData) -> None:
         self.__logger.debug(f"loaded tabledata: {str(table_data)}")
 
-        table_data.dp_extractor.matrix_formatting = self.__matrix_formatting
-        sqlite_tabledata = SQLiteTableDataSanitizer(
-            table_data, max_workers=self.__max_workers
-        ).normalize()
-        self.__table_creator.create(
+        with self.__stats.measure(Stage.NORMALIZE):
+            table_data.dp_extractor.matrix_formatting = self.__matrix_formatting
+            sqlite_tabledata = SQLiteTableDataSanitizer(
+                table_data, max_workers=self.__max_workers
+            ).normalize()
+
+        dst_table_name = self.__table_creator.create(
             sqlite_tabledata,
             self.__index_list,
             source_info=self.__source_info,
         )
-        self.__converted_table_name_set.add(cast(str, sqlite_tabledata.table_name))
+        self.__converted_table_name_set.add(dst_table_name)
@@ -2,31 +2,272 @@
 .. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
 """
 
+import hashlib
 import os
 import stat
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
 from copy import deepcopy
 from errno import EBADF, ENAMETOOLONG, ENOENT, ENOTDIR
-from typing import Any, Optional, Sequence
+from fnmatch import fnmatch
+from functools import partial
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
 import msgfy
 import pytablereader as ptr
 from dataproperty import MatrixFormatting
+from nbformat.notebooknode import NotebookNode
 from path import Path
 from simplesqlite import SimpleSQLite
+from simplesqlite.query import Set as SetQuery
+from simplesqlite.query import Where
 
 from .._const import IPYNB_FORMAT_NAME_LIST, TABLE_NOT_FOUND_MSG_FORMAT
-from .._types import ConvertConfig
-from ._base import SourceInfo, TableConverter
-from ._common import TYPE_HINT_FROM_HEADER_RULES
-from ._ipynb_converter import is_ipynb_file_path, load_ipynb_file
+from .._stats import Stage
+from .._types import ConvertConfig, TypeHintRules
+from ._archive import (
+    ARCHIVE_ERRORS,
+    ArchiveMember,
+    ArchiveReader,
+    is_archive_file_path,
+    open_archive,
+)
+from ._base import SourceInfo, TableConverter, normalize_table
+from ._chunked_loader import (
+    CHUNKABLE_FORMAT_NAMES,
+    RANGE_SPLITTABLE_FORMAT_NAMES,
+    ChunkedTableFileLoader,
+    create_chunked_loader,
+)
+from ._common import is_target_path
+from ._compression import (
+    DECOMPRESSION_ERRORS,
+    detect_compression,
+    open_decompressed,
+    strip_compression_ext,
+)
+from ._ipynb_converter import is_ipynb_file_path, load_ipynb_file, load_ipynb_text
+from ._json_loader import NestedJsonError, load_tables
+from ._table_creator import TableRecords, TypeInferenceSample
+from ._type_cache import TypeCacheMap
+
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+SourceKey = Tuple[Optional[str], str]
+
+# formats that have tables named after the table counters of pytablereader loaders
+# (e.g. HTML/Markdown tables without ids): the counters are shared in a process,
+# so tables of the formats are loaded by the main process in the order of sources
+_COUNTER_NAMED_FORMAT_NAMES = ("html", "markdown", "mediawiki")
 
 
 def _get_format_type_from_path(file_path: Path) -> str:
-    return file_path.ext.lstrip(".")
+    return strip_compression_ext(file_path).ext.lstrip(".")
+
+
+def _to_source_key(dir_name: Any, base_name: Any) -> SourceKey:
+    return (None if dir_name is None else str(dir_name), str(base_name))
+
+
+def _get_file_source_key(file_path: Path) -> SourceKey:
+    fpath = file_path.realpath()
+
+    return _to_source_key(fpath.dirname(), fpath.basename())
+
+
+def _calc_sha256(file_path: Path) -> str:
+    sha256 = hashlib.sha256()
+
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            sha256.update(block)
+
+    return sha256.hexdigest()
+
+
+def _load_decompressed(
+    file_path: str,
+    compression: str,
+    format_name: str,
+    encoding: Optional[str],
+    type_hint_rules: Optional[TypeHintRules],
+) -> ptr.TableTextLoader:
+    # decompressed data is loaded in memory instead of writing to a temporary file
+    with open_decompressed(file_path, compression, encoding) as f:
+        text = f.read()
+
+    return _create_text_loader(
+        text, format_name, strip_compression_ext(file_path).stem, type_hint_rules
+    )
+
+
+def _create_text_loader(
+    text: str, format_name: str, stem: str, type_hint_rules: Optional[TypeHintRules]
+) -> ptr.TableTextLoader:
+    loader = ptr.TableTextLoader(text, format_name=format_name, type_hint_rules=type_hint_rules)
+
+    # %(filename)s is not available for text loaders: name tables after the file.
+    # tables of JSON/HTML are named by the file/keys/titles as the file loaders do:
+    # JSON tables are named after the file by load_tables.
+    if format_name in CHUNKABLE_FORMAT_NAMES:
+        loader.table_name = stem
+    elif format_name in ("markdown", "mediawiki"):
+        loader.table_name = f"{stem}_%(key)s"
+
+    return loader
+
+
+def _load_table_records(
+    file_path: str,
+    format_name: Optional[str],
+    encoding: Optional[str],
+    type_hint_rules: Optional[TypeHintRules],
+    matrix_formatting: MatrixFormatting,
+    is_type_inference: bool,
+    symbol_replace_value: Optional[str],
+    max_workers: int,
+    infer_sample: Optional[TypeInferenceSample],
+    type_cache: Optional[TypeCacheMap],
+) -> List[TableRecords]:
+    # executed in worker processes: load and normalize tables, and then convert them to
+    # records that are ready to insert
+    compression = detect_compression(file_path)
+    loader: Union[ptr.TableFileLoader, ptr.TableTextLoader]
+
+    if compression:
+        loader = _load_decompressed(
+            file_path,
+            compression,
+            ptr.TableFileLoader(
+                strip_compression_ext(file_path), format_name=format_name
+            ).format_name,
+            encoding=encoding,
+            type_hint_rules=type_hint_rules,
+        )
+    else:
+        loader = ptr.TableFileLoader(
+            file_path,
+            format_name=format_name,
+            encoding=encoding,
+            type_hint_rules=type_hint_rules,
+        )
+
+    return _to_table_records_list(
+        loader,
+        matrix_formatting=matrix_formatting,
+        is_type_inference=is_type_inference,
+        symbol_replace_value=symbol_replace_value,
+        max_workers=max_workers,
+        infer_sample=infer_sample,
+        type_cache=type_cache,
+        filename=strip_compression_ext(file_path).stem if compression else None,
+    )
+
+
+def _load_text_table_records(
+    text: str,
+    format_name: str,
+    stem: str,
+    type_hint_rules: Optional[TypeHintRules],
+    matrix_formatting: MatrixFormatting,
+    is_type_inference: bool,
+    symbol_replace_value: Optional[str],
+    max_workers: int,
+    infer_sample: Optional[TypeInferenceSample],
+    type_cache: Optional[TypeCacheMap],
+) -> List[TableRecords]:
+    # executed in worker processes: text of an archive member is read by the main process
+    loader = _create_text_loader(text, format_name, stem, type_hint_rules)
+
+    return _to_table_records_list(
+        loader,
+        matrix_formatting=matrix_formatting,
+        is_type_inference=is_type_inference,
+        symbol_replace_value=symbol_replace_value,
+        max_workers=max_workers,
+        infer_sample=infer_sample,
+        type_cache=type_cache,
+        filename=stem,
+    )
+
+
+def _to_table_records_list(
+    loader: Union[ptr.TableFileLoader, ptr.TableTextLoader],
+    matrix_formatting: MatrixFormatting,
+    is_type_inference: bool,
+    symbol_replace_value: Optional[str],
+    max_workers: int,
+    infer_sample: Optional[TypeInferenceSample],
+    type_cache: Optional[TypeCacheMap],
+    filename: Optional[str] = None,
+) -> List[TableRecords]:
+    table_records_list = []
+
+    for table_data in load_tables(loader, filename):
+        sqlite_tabledata = normalize_table(
+            table_data,
+            matrix_formatting=matrix_formatting,
+            is_type_inference=is_type_inference,
+            symbol_replace_value=symbol_replace_value,
+            max_workers=max_workers,
+        )
+        table_records = TableRecords.from_tabledata(sqlite_tabledata, infer_sample, type_cache)
+        table_records_list.append(table_records.to_picklable())
+
+    return table_records_list
+
+
+def _load_range_table_records(
+    loader: ChunkedTableFileLoader,
+    start: int,
+    end: int,
+    headers: List[str],
+    matrix_formatting: MatrixFormatting,
+    is_type_inference: bool,
+    symbol_replace_value: Optional[str],
+    max_workers: int,
+    infer_sample: Optional[TypeInferenceSample],
+    type_cache: Optional[TypeCacheMap],
+) -> List[TableRecords]:
+    # executed in worker processes: parse a byte range of a file, and then convert
+    # the chunks of the range to records that are ready to insert
+    table_records_list = []
+
+    for table_data in loader.load_range(start, end, headers):
+        sqlite_tabledata = normalize_table(
+            table_data,
+            matrix_formatting=matrix_formatting,
+            is_type_inference=is_type_inference,
+            symbol_replace_value=symbol_replace_value,
+            max_workers=max_workers,
+        )
+        table_records = TableRecords.from_tabledata(sqlite_tabledata, infer_sample, type_cache)
+        table_records_list.append(table_records.to_picklable())
+
+    return table_records_list
 
 
 class FileConverter(TableConverter):
     SKIP_MSG_FORMAT = "skip '{source:s}': {message:s}"
+    FOLLOW_CHUNK_ROWS = 1000
+
+    # size of byte ranges of a CSV/TSV file that are parsed in parallel with --jobs
+    RANGE_BYTES = 16 * 1024 * 1024
 
     def __init__(
         self,
@@ -45,6 +286,16 @@ class FileConverter(TableConverter):
         encoding: str,
         exclude_pattern: Optional[str],
         follow_symlinks: bool,
+        chunk_rows: Optional[int] = None,
+        is_incremental: bool = False,
+        is_checksum: bool = False,
+        is_follow: bool = False,
+        flush_interval: float = 1.0,
+        pattern: Optional[str] = None,
+        infer_sample: Optional[TypeInferenceSample] = None,
+        type_cache_path: Optional[str] = None,
+        ipynb_image_storage: str = "inline",
+        is_fast_ipynb: bool = False,
     ) -> None:
         super().__init__(
             logger,
@@ -60,12 +311,266 @@ class FileConverter(TableConverter):
             max_workers=max_workers,
             format_name=format_name,
             encoding=encoding,
+            infer_sample=infer_sample,
+            type_cache_path=type_cache_path,
+            ipynb_image_storage=ipynb_image_storage,
         )
 
         self.__exclude_pattern = exclude_pattern
+        self.__pattern = pattern
         self.__follow_symlinks = follow_symlinks
+        self.__chunk_rows = chunk_rows
+        self.__is_incremental = is_incremental
+        self.__is_checksum = is_checksum
+        self.__is_follow = is_follow
+        self.__flush_interval = flush_interval
+        self.__is_fast_ipynb = is_fast_ipynb
+        self.__unchanged_source_set: Set[SourceKey] = set()
+        self.__executor: Optional[Executor] = None
+        self.__jobs = 1
 
     def convert(self, file_path: str) -> None:
+        if is_archive_file_path(file_path):
+            self.__convert_archive(Path(file_path), executor=None, jobs=1)
+            return
+
+        self.__convert_file(file_path)
+
+    def convert_files(self, file_paths: Iterable[str], jobs: int) -> None:
+        if self.__is_incremental:
+            file_paths = list(file_paths)
+            self.__prepare_incremental(file_paths)
+
+        if jobs <= 1:
+            for file_path in file_paths:
+                self.convert(file_path)
+            return
+
+        # the worker processes are also used to parse byte ranges of large files
+        # in chunked loading
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            try:
+                self.__executor = executor
+                self.__jobs = jobs
+                self.__convert_files_in_parallel(file_paths, executor, jobs)
+            finally:
+                self.__executor = None
+                self.__jobs = 1
+
+    def __convert_files_in_parallel(
+        self, file_paths: Iterable[str], executor: Executor, jobs: int
+    ) -> None:
+        # load files in worker processes while writing the loaded tables in the
+        # order of file_paths. the number of loaded tables that wait for writing is
+        # bounded to limit memory usage.
+        pending: Deque[Tuple[str, Optional["Future[Any]"]]] = deque()
+
+        for file_path in file_paths:
+            if is_archive_file_path(file_path):
+                # members of archives are converted after the preceding files
+                while pending:
+                    self.__convert_file(*pending.popleft())
+
+                self.__convert_archive(Path(file_path), executor=executor, jobs=jobs)
+                continue
+
+            pending.append((file_path, self.__submit_load(executor, Path(file_path))))
+
+            if len(pending) > jobs * 2:
+                self.__convert_file(*pending.popleft())
+
+        while pending:
+            self.__convert_file(*pending.popleft())
+
+    def __prepare_incremental(self, file_paths: Sequence[str]) -> None:
+        # find out sources that need to be re-converted. tables created from changed
+        # files are dropped, and files that share the dropped tables with the changed
+        # files are also re-converted to avoid losing or duplicating their records.
+        logger = self._logger
+        source_records: Dict[SourceKey, List[SourceInfo]] = {}
+        table_sources: Dict[str, Set[SourceKey]] = {}
+
+        for record in SourceInfo.select():
+            key = _to_source_key(record.dir_name, record.base_name)
+            source_records.setdefault(key, []).append(record)
+            table_sources.setdefault(cast(str, record.dst_table), set()).add(key)
+
+        if not source_records:
+            return
+
+        table_name_set = set(self._schema_catalog.fetch_table_names())
+        input_source_set = set()
+        changed_source_set = set()
+
+        for key, size, mtime, calc_sha256 in self.__iter_source_states(file_paths):
+            if key not in source_records:
+                continue
+
+            input_source_set.add(key)
+            if self.__is_modified(size, mtime, calc_sha256, source_records[key]) or any(
+                [record.dst_table not in table_name_set for record in source_records[key]]
+            ):
+                changed_source_set.add(key)
+
+        stale_table_set: Set[str] = set()
+        stack = list(changed_source_set)
+
+        while stack:
+            key = stack.pop()
+
+            for record in source_records[key]:
+                dst_table = cast(str, record.dst_table)
+                if dst_table in stale_table_set:
+                    continue
+
+                stale_table_set.add(dst_table)
+
+                for share_key in table_sources[dst_table]:
+                    if share_key not in changed_source_set:
+                        changed_source_set.add(share_key)
+                        stack.append(share_key)
+
+        for table_name in sorted(stale_table_set):
+            if table_name in table_name_set:
+                logger.debug(f"drop a table created from changed sources: {table_name}")
+                self._con.drop_table(table_name)
+
+        for key in changed_source_set:
+            if key not in input_source_set:
+                logger.warning(
+                    "records of '{}' are removed because the source shares tables with "
+                    "changed files: re-convert the source to restore".format(
+                        source_records[key][0].get_name(verbosity_level=1)
+                    )
+                )
+
+            for source_id in {record.source_id for record in source_records[key]}:
+                SourceInfo.delete(where=Where("source_id", source_id))
+
+        self._con.commit()
+        self.__unchanged_source_set = input_source_set - changed_source_set
+
+    def __iter_source_states(
+        self, file_paths: Sequence[str]
+    ) -> Iterator[Tuple[SourceKey, int, int, Callable[[], str]]]:
+        # yield keys, sizes, mtimes and checksum functions of files and archive members
+        for file_path in file_paths:
+            fpath = Path(file_path).realpath()
+            if not fpath.isfile():
+                continue
+
+            if not is_archive_file_path(fpath):
+                yield (
+                    _to_source_key(fpath.dirname(), fpath.basename()),
+                    fpath.getsize(),
+                    int(fpath.getmtime()),
+                    partial(_calc_sha256, fpath),
+                )
+                continue
+
+            try:
+                with open_archive(fpath) as archive:
+                    for member in archive.iter_members(self.__pattern):
+                        yield (
+                            _to_source_key(fpath, member.name),
+                            member.size,
+                            member.mtime,
+                            partial(archive.calc_sha256, member),
+                        )
+            except ARCHIVE_ERRORS as e:
+                self._logger.debug(f"failed to read an archive file: path={fpath}, message={e}")
+
+    def __is_modified(
+        self,
+        cur_size: int,
+        cur_mtime: int,
+        calc_sha256: Callable[[], str],
+        records: Sequence[SourceInfo],
+    ) -> bool:
+        latest_record = max(records, key=lambda record: cast(int, record.source_id))
+        size = cast(int, latest_record.size)
+        mtime = cast(int, latest_record.mtime)
+        prev_sha256 = cast(Optional[str], latest_record.sha256)
+
+        if size != cur_size:
+            return True
+
+        if not self.__is_checksum:
+            return mtime != cur_mtime
+
+        sha256 = calc_sha256()
+
+        if prev_sha256 is None:
+            # sources converted without checksums are compared by mtime at the first time
+            if mtime != cur_mtime:
+                return True
+
+            SourceInfo.update(
+                set_query=[SetQuery("sha256", sha256)],
+                where=Where("source_id", latest_record.source_id),
+            )
+            return False
+
+        return prev_sha256 != sha256
+
+    def __is_unchanged(self, key: SourceKey) -> bool:
+        return key in self.__unchanged_source_set
+
+    def __submit_load(self, executor: Executor, file_path: Path) -> Optional["Future[Any]"]:
+        if not file_path.isfile() or (file_path.islink() and not self.__follow_symlinks):
+            return None
+
+        if self.__exclude_pattern and file_path.fnmatch(self.__exclude_pattern):
+            return None
+
+        if file_path.realpath() == self._con.database_path or self.__is_unchanged(
+            _get_file_source_key(file_path)
+        ):
+            return None
+
+        if self._format_name in IPYNB_FORMAT_NAME_LIST or is_ipynb_file_path(file_path):
+            # notebooks are parsed by workers, and then written by the main process
+            return executor.submit(
+                load_ipynb_file,
+                str(file_path),
+                encoding=self._encoding,
+                is_fast=self.__is_fast_ipynb,
+            )
+
+        compression = detect_compression(file_path)
+
+        try:
+            format_name = ptr.TableFileLoader(
+                strip_compression_ext(file_path) if compression else file_path,
+                format_name=self._format_name,
+            ).format_name
+        except (ptr.InvalidFilePathError, ptr.LoaderNotFoundError):
+            return None
+
+        if (self.__chunk_rows or self.__is_follow) and format_name in CHUNKABLE_FORMAT_NAMES:
+            return None
+
+        if compression and format_name not in ptr.TableTextLoader.get_format_names():
+            return None
+
+        if format_name in _COUNTER_NAMED_FORMAT_NAMES:
+            return None
+
+        return executor.submit(
+            _load_table_records,
+            str(file_path),
+            format_name=self._format_name,
+            encoding=self._encoding,
+            type_hint_rules=self.__get_type_hint_rules(file_path),
+            matrix_formatting=self._matrix_formatting,
+            is_type_inference=self._is_type_inference,
+            symbol_replace_value=self._symbol_replace_value,
+            max_workers=self._max_workers,
+            infer_sample=self._infer_sample,
+            type_cache=self._type_cache_map,
+        )
+
+    def __convert_file(self, file_path: str, loaded: Optional["Future[Any]"] = None) -> None:
         fpath = Path(file_path)
         logger = self._logger
         result_counter = self._result_counter
@@ -80,47 +585,327 @@ class FileConverter(TableConverter):
             self._result_counter.inc_skip()
             return
 
+        if self.__is_unchanged(_get_file_source_key(fpath)):
+            logger.debug(
+                self.SKIP_MSG_FORMAT.format(
+                    source=fpath, message="not modified since the last conversion"
+                )
+            )
+            self._result_counter.inc_unchanged()
+            return
+
         logger.debug(f"converting '{fpath}'")
         success_count = result_counter.success_count
         fail_count = result_counter.fail_count
         source_info_record_base = self.__get_source_info_base(fpath.realpath())
 
-        if self._format_name in IPYNB_FORMAT_NAME_LIST or is_ipynb_file_path(fpath):
-            import nbformat
+        with self._measure_source(fpath, fpath.size):
+            if self._format_name in IPYNB_FORMAT_NAME_LIST or is_ipynb_file_path(fpath):
+                self.__convert_ipynb(
+                    fpath,
+                    self.__get_ipynb_loader(
+                        loaded,
+                        lambda: load_ipynb_file(
+                            fpath, encoding=self._encoding, is_fast=self.__is_fast_ipynb
+                        ),
+                    ),
+                    source_info_record_base,
+                )
+            else:
+                self.__convert(fpath, source_info_record_base, loaded)
+
+        if result_counter.fail_count > fail_count:
+            return
 
-            try:
-                changed_table_name_set = self._convert_nb(
-                    nb=load_ipynb_file(fpath, encoding=self._encoding),
-                    source_info=source_info_record_base,
+        if result_counter.success_count == success_count:
+            logger.warning(TABLE_NOT_FOUND_MSG_FORMAT.format(fpath))
+
+    def __convert_ipynb(
+        self,
+        source: Path,
+        load_nb: Callable[[], NotebookNode],
+        source_info_record_base: SourceInfo,
+    ) -> None:
+        import nbformat
+
+        try:
+            with self._stats.measure(Stage.LOAD):
+                nb = load_nb()
+
+            changed_table_name_set = self._convert_nb(nb=nb, source_info=source_info_record_base)
+        except (nbformat.reader.NotJSONError, RuntimeError) as e:
+            self._logger.error(f"failed to load {source}: {e}")
+            return
+
+        for table_name in changed_table_name_set:
+            record = deepcopy(source_info_record_base)
+            record.format_name = "ipynb"
+            record.dst_table = table_name
+            self._insert_source_info(record)
+
+    @staticmethod
+    def __get_ipynb_loader(
+        loaded: Optional["Future[Any]"], load_nb: Callable[[], NotebookNode]
+    ) -> Callable[[], NotebookNode]:
+        if loaded is None:
+            return load_nb
+
+        # the notebook was parsed by a worker process
+        return cast(Callable[[], NotebookNode], loaded.result)
+
+    def __convert_archive(
+        self, archive_path: Path, executor: Optional[Executor], jobs: int
+    ) -> None:
+        # archives are converted as virtual directories: members are read from the archives
+        # without extracting to the disk, and parsed by worker processes if available.
+        logger = self._logger
+        result_counter = self._result_counter
+
+        if not self.__is_file(archive_path):
+            return
+
+        if self.__exclude_pattern and archive_path.fnmatch(self.__exclude_pattern):
+            logger.debug(
+                self.SKIP_MSG_FORMAT.format(
+                    source=archive_path, message="matching an exclude pattern"
                 )
-            except (nbformat.reader.NotJSONError, RuntimeError) as e:
-                logger.error(f"failed to load {fpath}: {e}")
-                return
+            )
+            result_counter.inc_skip()
+            return
 
-            for table_name in changed_table_name_set:
-                record = deepcopy(source_info_record_base)
-                record.format_name = "ipynb"
-                record.dst_table = table_name
-                SourceInfo.insert(record)
-        else:
-            self.__convert(fpath, source_info_record_base)
+        if self.__is_follow:
+            logger.error(f"follow mode is not supported for archive files: path={archive_path}")
+            result_counter.inc_fail()
+            return
+
+        try:
+            with open_archive(archive_path) as archive:
+                pending: Deque[Tuple[ArchiveMember, Optional["Future[Any]"]]]
+                pending = deque()
+
+                for member in archive.iter_members(self.__pattern):
+                    pending.append((member, self.__submit_member_load(executor, archive, member)))
+
+                    if len(pending) > jobs * 2:
+                        self.__convert_member(archive, *pending.popleft())
+
+                while pending:
+                    self.__convert_member(archive, *pending.popleft())
+        except ARCHIVE_ERRORS as e:
+            logger.error(
+                "{:s}: failed to read an archive file: path={}, message={}".format(
+                    e.__class__.__name__, archive_path, str(e)
+                )
+            )
+            result_counter.inc_fail()
+
+    def __submit_member_load(
+        self, executor: Optional[Executor], archive: ArchiveReader, member: ArchiveMember
+    ) -> Optional["Future[Any]"]:
+        if executor is None:
+            return None
+
+        if self.__is_excluded_member(member) or self.__is_unchanged(
+            _to_source_key(archive.file_path.realpath(), member.name)
+        ):
+            return None
+
+        is_ipynb = self._format_name in IPYNB_FORMAT_NAME_LIST or is_ipynb_file_path(member.name)
+        format_name = self.__get_member_format_name(member)
+
+        if not is_ipynb:
+            if format_name is None or format_name not in ptr.TableTextLoader.get_format_names():
+                return None
+
+            if self.__chunk_rows and format_name in CHUNKABLE_FORMAT_NAMES:
+                return None
+
+            if format_name in _COUNTER_NAMED_FORMAT_NAMES:
+                return None
+
+        # members are read by the main process in the order of the archive: reading members
+        # of compressed tar files at random by worker processes rewinds the streams
+        try:
+            text = archive.read_text(member, self._encoding)
+        except (UnicodeDecodeError,) + ARCHIVE_ERRORS:
+            return None
+
+        if is_ipynb:
+            return executor.submit(load_ipynb_text, text, is_fast=self.__is_fast_ipynb)
+
+        assert format_name
+        return executor.submit(
+            _load_text_table_records,
+            text,
+            format_name,
+            Path(member.basename).stem,
+            type_hint_rules=self.__get_type_hint_rules(archive.file_path / member.name),
+            matrix_formatting=self._matrix_formatting,
+            is_type_inference=self._is_type_inference,
+            symbol_replace_value=self._symbol_replace_value,
+            max_workers=self._max_workers,
+            infer_sample=self._infer_sample,
+            type_cache=self._type_cache_map,
+        )
+
+    def __convert_member(
+        self,
+        archive: ArchiveReader,
+        member: ArchiveMember,
+        loaded: Optional["Future[Any]"] = None,
+    ) -> None:
+        logger = self._logger
+        result_counter = self._result_counter
+        archive_path = archive.file_path.realpath()
+        source = archive.file_path / member.name
+
+        if self.__is_excluded_member(member):
+            logger.debug(
+                self.SKIP_MSG_FORMAT.format(source=source, message="matching an exclude pattern")
+            )
+            result_counter.inc_skip()
+            return
+
+        if self.__is_unchanged(_to_source_key(archive_path, member.name)):
+            logger.debug(
+                self.SKIP_MSG_FORMAT.format(
+                    source=source, message="not modified since the last conversion"
+                )
+            )
+            result_counter.inc_unchanged()
+            return
+
+        logger.debug(f"converting '{source}'")
+        success_count = result_counter.success_count
+        fail_count = result_counter.fail_count
+        source_info_record_base = SourceInfo(
+            dir_name=archive_path,
+            base_name=member.name,
+            size=member.size,
+            mtime=member.mtime,
+            source_id=self._fetch_next_source_id(),
+        )
+
+        if self.__is_checksum:
+            source_info_record_base.sha256 = archive.calc_sha256(member)
+
+        with self._measure_source(source, member.size):
+            if self._format_name in IPYNB_FORMAT_NAME_LIST or is_ipynb_file_path(member.name):
+                self.__convert_ipynb(
+                    source,
+                    self.__get_ipynb_loader(
+                        loaded,
+                        lambda: load_ipynb_text(
+                            archive.read_text(member, self._encoding),
+                            is_fast=self.__is_fast_ipynb,
+                        ),
+                    ),
+                    source_info_record_base,
+                )
+            else:
+                self.__convert_member_tables(
+                    archive, member, source, source_info_record_base, loaded
+                )
 
         if result_counter.fail_count > fail_count:
             return
 
         if result_counter.success_count == success_count:
-            logger.warning(TABLE_NOT_FOUND_MSG_FORMAT.format(fpath))
+            logger.warning(TABLE_NOT_FOUND_MSG_FORMAT.format(source))
 
-    def __convert(self, file_path: Path, source_info_record_base: SourceInfo) -> None:
+    def __convert_member_tables(
+        self,
+        archive: ArchiveReader,
+        member: ArchiveMember,
+        source: Path,
+        source_info_record_base: SourceInfo,
+        loaded: Optional["Future[List[TableRecords]]"],
+    ) -> None:
         logger = self._logger
         result_counter = self._result_counter
+        type_hint_rules = self.__get_type_hint_rules(source)
+        stem = Path(member.basename).stem
+
+        format_name = self.__get_member_format_name(member)
+        if format_name is None:
+            logger.warning(f"not supported file format: ext={source.ext}, path={source}")
+            result_counter.inc_fail()
+            return
+
+        source_info_record_base.format_name = format_name
+
+        if format_name not in ptr.TableTextLoader.get_format_names():
+            logger.error(
+                "{} format is not supported for archive members: path={}".format(
+                    format_name, source
+                )
+            )
+            result_counter.inc_fail()
+            return
+
+        if self.__chunk_rows and format_name in CHUNKABLE_FORMAT_NAMES:
+            with archive.open_text(member, self._encoding) as stream:
+                chunked_loader = create_chunked_loader(
+                    stream,
+                    format_name,
+                    encoding=self._encoding,
+                    chunk_rows=self.__chunk_rows,
+                    type_hint_rules=type_hint_rules,
+                    table_name=stem,
+                )
+                self._convert_chunks(chunked_loader, source, source_info_record_base)
+            return
+
+        def load_text() -> ptr.TableTextLoader:
+            return _create_text_loader(
+                archive.read_text(member, self._encoding), format_name, stem, type_hint_rules
+            )
+
+        loader = None
+        if loaded is None:
+            try:
+                with self._stats.measure(Stage.LOAD):
+                    loader = load_text()
+            except UnicodeDecodeError as e:
+                logger.error(f"{e.__class__.__name__}: path={source}, message={e}")
+                result_counter.inc_fail()
+                return
+
+        self.__convert_tables(
+            source,
+            self.__load_table_records(loader, loaded, filename=stem),
+            source_info_record_base,
+        )
+
+    def __get_member_format_name(self, member: ArchiveMember) -> Optional[str]:
+        try:
+            return ptr.TableFileLoader(member.name, format_name=self._format_name).format_name
+        except (ptr.InvalidFilePathError, ptr.LoaderNotFoundError):
+            return None
+
+    def __is_excluded_member(self, member: ArchiveMember) -> bool:
+        return bool(self.__exclude_pattern) and fnmatch(
+            member.basename, cast(str, self.__exclude_pattern)
+        )
+
+    def __convert(
+        self,
+        file_path: Path,
+        source_info_record_base: SourceInfo,
+        loaded: Optional["Future[List[TableRecords]]"],
+    ) -> None:
+        logger = self._logger
+        result_counter = self._result_counter
+        type_hint_rules = self.__get_type_hint_rules(file_path)
+        compression = detect_compression(file_path)
+        loader: Union[ptr.TableFileLoader, ptr.TableTextLoader]
 
         try:
             loader = ptr.TableFileLoader(
-                file_path,
+                strip_compression_ext(file_path) if compression else file_path,
                 format_name=self._format_name,
                 encoding=self._encoding,
-                type_hint_rules=TYPE_HINT_FROM_HEADER_RULES if self._is_type_hint_header else None,
+                type_hint_rules=type_hint_rules,
             )
         except ptr.InvalidFilePathError as e:
             logger.debug(msgfy.to_debug_message(e))
@@ -133,60 +918,237 @@ class FileConverter(TableConverter):
 
         source_info_record_base.format_name = loader.format_name
 
+        if self.__is_follow and (compression or loader.format_name not in CHUNKABLE_FORMAT_NAMES):
+            logger.error(
+                "follow mode is not supported for {} format: path={}".format(
+                    compression or loader.format_name, file_path
+                )
+            )
+            result_counter.inc_fail()
+            return
+
+        if (self.__chunk_rows or self.__is_follow) and loader.format_name in CHUNKABLE_FORMAT_NAMES:
+            chunked_loader = create_chunked_loader(
+                file_path,
+                loader.format_name,
+                encoding=self._encoding,
+                chunk_rows=self.__chunk_rows or self.FOLLOW_CHUNK_ROWS,
+                type_hint_rules=type_hint_rules,
+                flush_interval=self.__flush_interval if self.__is_follow else None,
+            )
+
+            if self.__executor is not None and self.__convert_ranges(
+                chunked_loader, self.__executor, file_path, source_info_record_base
+            ):
+                return
+
+            self._convert_chunks(
+                chunked_loader, file_path, source_info_record_base, is_follow=self.__is_follow
+            )
+            return
+
+        if compression and loaded is None:
+            if loader.format_name not in ptr.TableTextLoader.get_format_names():
+                logger.error(
+                    "{} format is not supported for {} compressed files: path={}".format(
+                        loader.format_name, compression, file_path
+                    )
+                )
+                result_counter.inc_fail()
+                return
+
+            try:
+                with self._stats.measure(Stage.LOAD):
+                    loader = _load_decompressed(
+                        file_path,
+                        compression,
+                        loader.format_name,
+                        encoding=self._encoding,
+                        type_hint_rules=type_hint_rules,
+                    )
+            except ImportError as e:
+                logger.error(msgfy.to_error_message(e))
+                result_counter.inc_fail()
+                return
+            except DECOMPRESSION_ERRORS as e:
+                logger.error(f"failed to decompress {compression} data: path={file_path}, {e}")
+                result_counter.inc_fail()
+                return
+
+        self.__convert_tables(
+            file_path,
+            self.__load_table_records(
+                loader,
+                loaded,
+                filename=strip_compression_ext(file_path).stem if compression else None,
+            ),
+            source_info_record_base,
+        )
+
+    def __convert_ranges(
+        self,
+        loader: ChunkedTableFileLoader,
+        executor: Executor,
+        file_path: Path,
+        source_info_record_base: SourceInfo,
+    ) -> bool:
+        # parse newline aligned byte ranges of a large CSV/TSV file in worker processes,
+        # and then write the chunks to a table in the order of the ranges.
+        # return False if the file is converted by a single process.
+        if self.__is_follow or loader.format_name not in RANGE_SPLITTABLE_FORMAT_NAMES:
+            return False
+
+        num_ranges = -(-file_path.size // self.RANGE_BYTES)
+        if num_ranges <= 1:
+            return False
+
         try:
-            for table_data in loader.load():
-                logger.debug(f"loaded tabledata: {str(table_data)}")
+            with self._stats.measure(Stage.LOAD):
+                ranges = loader.split_ranges(num_ranges)
+                if not ranges or len(ranges) <= 1:
+                    return False
+
+                headers = loader.load_headers()
+        except ptr.DataError:
+            # fall back to the single process conversion to report the error
+            return False
+
+        self._logger.debug(f"parse '{file_path}' in {len(ranges)} byte ranges")
+
+        load_range = partial(
+            _load_range_table_records,
+            loader,
+            headers=headers,
+            matrix_formatting=self._matrix_formatting,
+            is_type_inference=self._is_type_inference,
+            symbol_replace_value=self._symbol_replace_value,
+            max_workers=self._max_workers,
+            infer_sample=self._infer_sample,
+            type_cache=self._type_cache_map,
+        )
 
-                sqlite_tabledata = self.normalize_table(table_data)
+        def iter_table_records() -> Iterator[TableRecords]:
+            # the number of loaded ranges that wait for writing is bounded to
+            # limit memory usage
+            pending: Deque["Future[List[TableRecords]]"] = deque()
+            range_iter = iter(ranges)
+            is_loaded = False
 
+            try:
+                while True:
+                    for start, end in islice(range_iter, self.__jobs * 2 - len(pending)):
+                        pending.append(executor.submit(load_range, start, end))
+
+                    if not pending:
+                        break
+
+                    with self._stats.measure(Stage.LOAD):
+                        table_records_list = pending.popleft().result()
+
+                    is_loaded = is_loaded or bool(table_records_list)
+                    yield from table_records_list
+            finally:
+                for future in pending:
+                    future.cancel()
+
+            if not is_loaded:
+                raise ptr.DataError("data row must be greater or equal than one")
+
+        self._write_chunks(
+            loader.format_name, iter_table_records(), file_path, source_info_record_base
+        )
+
+        return True
+
+    def __convert_tables(
+        self,
+        source: Path,
+        table_records_list: Iterable[TableRecords],
+        source_info_record_base: SourceInfo,
+    ) -> None:
+        logger = self._logger
+        result_counter = self._result_counter
+
+        try:
+            for table_records in table_records_list:
                 try:
-                    self._table_creator.create(
-                        sqlite_tabledata, self._index_list, source_info=source_info_record_base
+                    dst_table_name = self._table_creator.create_from_records(
+                        table_records, self._index_list, source_info=source_info_record_base
                     )
                 except (ValueError, OSError) as e:
-                    logger.debug(f"exception={type(e).__name__:s}, path={file_path}, message={e}")
+                    logger.debug(f"exception={type(e).__name__:s}, path={source}, message={e}")
                     result_counter.inc_fail()
                     return
 
                 record = deepcopy(source_info_record_base)
-                record.dst_table = sqlite_tabledata.table_name
-                SourceInfo.insert(record)
+                record.dst_table = dst_table_name
+                self._insert_source_info(record)
         except ptr.OpenError as e:
             logger.error(
                 "{:s}: open error: file={}, message='{}'".format(
-                    e.__class__.__name__, file_path, str(e)
+                    e.__class__.__name__, source, str(e)
                 )
             )
             result_counter.inc_fail()
+        except NestedJsonError as e:
+            for table_name in self._convert_complex_json(e.json_data, source_info_record_base):
+                record = deepcopy(source_info_record_base)
+                record.dst_table = table_name
+                self._insert_source_info(record)
         except ptr.ValidationError as e:
-            if loader.format_name == "json":
-                for table_name in self._convert_complex_json(
-                    loader.loader, source_info_record_base
-                ):
-                    record = deepcopy(source_info_record_base)
-                    record.dst_table = table_name
-                    SourceInfo.insert(record)
-            else:
-                logger.error(
-                    "{:s}: invalid {} data format: path={}, message={}".format(
-                        e.__class__.__name__,
-                        _get_format_type_from_path(file_path),
-                        file_path,
-                        str(e),
-                    )
+            logger.error(
+                "{:s}: invalid {} data format: path={}, message={}".format(
+                    e.__class__.__name__,
+                    _get_format_type_from_path(source),
+                    source,
+                    str(e),
                 )
-                result_counter.inc_fail()
+            )
+            result_counter.inc_fail()
         except ptr.DataError as e:
             logger.error(
                 "{:s}: invalid {} data: path={}, message={}".format(
-                    e.__class__.__name__, _get_format_type_from_path(file_path), file_path, str(e)
+                    e.__class__.__name__, _get_format_type_from_path(source), source, str(e)
                 )
             )
             result_counter.inc_fail()
         except OverflowError as e:
-            logger.error(f"{file_path}: {e}")
+            logger.error(f"{source}: {e}")
             result_counter.inc_fail()
 
+    def __load_table_records(
+        self,
+        loader: Union[ptr.TableFileLoader, ptr.TableTextLoader, None],
+        loaded: Optional["Future[List[TableRecords]]"],
+        filename: Optional[str] = None,
+    ) -> Iterator[TableRecords]:
+        if loaded is not None:
+            # tables are loaded and normalized by workers: only the waiting time is measured
+            with self._stats.measure(Stage.LOAD):
+                table_records_list = loaded.result()
+
+            yield from table_records_list
+            return
+
+        assert loader
+
+        for table_data in self._stats.iter_measure(
+            Stage.LOAD, lambda: load_tables(loader, filename)
+        ):
+            self._logger.debug(f"loaded tabledata: {str(table_data)}")
+
+            sqlite_tabledata = self.normalize_table(table_data)
+
+            with self._stats.measure(Stage.NORMALIZE):
+                table_records = TableRecords.from_tabledata(
+                    sqlite_tabledata, self._infer_sample, self._type_cache_map
+                )
+
+            yield table_records
+
+    def __get_type_hint_rules(self, source: Path) -> TypeHintRules:
+        return self._extract_type_hint_rules(lambda config: is_target_path(config, source))
+
     def __is_fifo(self, file_path: Path) -> bool:
         try:
             return stat.S_ISFIFO(os.stat(file_path).st_mode)
@@ -232,10 +1194,15 @@ class FileConverter(TableConverter):
         return True
 
     def __get_source_info_base(self, source: Path) -> SourceInfo:
-        return SourceInfo(
+        source_info = SourceInfo(
             dir_name=source.dirname(),
             base_name=source.basename(),
             size=source.getsize(),
             mtime=int(source.getmtime()),
             source_id=self._fetch_next_source_id(),
         )
+
+        if self.__is_checksum and source.isfile():
+            source_info.sha256 = _calc_sha256(source)
+
+        return source_info
@@ -6,11 +6,16 @@ import click
 import msgfy
 import pytablereader as ptr
 
+from .._stats import Stage
 from ._base import SourceInfo, TableConverter
 
 
 class GoogleSheetsConverter(TableConverter):
     def convert(self, credentials: click.Path, title: str) -> None:
+        with self._measure_source(title, None):
+            self.__convert(credentials, title)
+
+    def __convert(self, credentials: click.Path, title: str) -> None:
         logger = self._logger
         result_counter = self._result_counter
         source_id = self._fetch_next_source_id()
@@ -24,7 +29,7 @@ class GoogleSheetsConverter(TableConverter):
         #         ConfigKey.GS_CREDENTIALS_FILE_PATH)
 
         try:
-            for table_data in loader.load():
+            for table_data in self._stats.iter_measure(Stage.LOAD, loader.load):
                 logger.debug(f"loaded table_data: {str(table_data)}")
 
                 sqlite_tabledata = self.normalize_table(table_data)
@@ -36,10 +41,10 @@ class GoogleSheetsConverter(TableConverter):
                 )
 
                 try:
-                    self._table_creator.create(
+                    source_info.dst_table = self._table_creator.create(
                         sqlite_tabledata, self._index_list, source_info=source_info
                     )
-                    SourceInfo.insert(source_info)
+                    self._insert_source_info(source_info)
                 except (ptr.ValidationError, ptr.DataError):
                     result_counter.inc_fail()
         except ptr.OpenError as e:
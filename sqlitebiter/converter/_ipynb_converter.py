@@ -3,8 +3,12 @@
 """
 
 import abc
+import base64
+import binascii
+import hashlib
 import os.path
 import re
+import zlib
 from typing import Mapping  # noqa
 from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set, Tuple
 from urllib.parse import urlparse
@@ -14,8 +18,10 @@ import nbformat
 import retryrequests
 from nbformat.notebooknode import NotebookNode
 from simplesqlite import SimpleSQLite
+from simplesqlite.query import Table
 
 from .._common import ResultLogger
+from ._compression import detect_compression, open_decompressed, strip_compression_ext
 
 
 try:
@@ -30,10 +36,18 @@ if TYPE_CHECKING:
 
 NB_VERSION = 4
 KEY_VALUE_TABLE = "kv"
+IMAGE_TABLE = "images"
+
+# inline: image outputs are stored to the outputs table as they are.
+# dedup/dedup-zlib: decoded images are stored once to the images table with SHA-256 keys.
+IPYNB_IMAGE_STORAGES = ("inline", "dedup", "dedup-zlib")
 
 
 def is_ipynb_file_path(file_path: str) -> bool:
-    return urlparse(file_path).scheme == "" and os.path.splitext(file_path)[1] == ".ipynb"
+    return (
+        urlparse(file_path).scheme == ""
+        and os.path.splitext(strip_compression_ext(file_path))[1] == ".ipynb"
+    )
 
 
 def is_ipynb_url(url: str) -> bool:
@@ -50,8 +64,33 @@ def _schema_not_found_error_handler(e: Exception) -> None:
         )
 
 
-def load_ipynb_file(file_path: str, encoding: Optional[str]) -> nbformat.NotebookNode:
-    with open(file_path, encoding=encoding) as f:
+def _reads_ipynb_fast(text: str) -> nbformat.NotebookNode:
+    # parse a notebook with the JSON library without validating the notebook schema.
+    # notebooks of the other versions are converted by nbformat.
+    try:
+        nb_dict = json.loads(text)
+    except ValueError as e:
+        raise nbformat.reader.NotJSONError(msgfy.to_error_message(e))
+
+    if not isinstance(nb_dict, dict) or nb_dict.get("nbformat") != NB_VERSION:
+        return nbformat.reads(text, as_version=NB_VERSION)
+
+    return nbformat.v4.to_notebook_json(nb_dict)
+
+
+def load_ipynb_file(
+    file_path: str, encoding: Optional[str], is_fast: bool = False
+) -> nbformat.NotebookNode:
+    compression = detect_compression(file_path)
+
+    with (
+        open_decompressed(file_path, compression, encoding)
+        if compression
+        else open(file_path, encoding=encoding)
+    ) as f:
+        if is_fast:
+            return load_ipynb_text(f.read(), is_fast=True)
+
         try:
             return nbformat.read(f, as_version=NB_VERSION)
         except AttributeError as e:
@@ -61,8 +100,11 @@ def load_ipynb_file(file_path: str, encoding: Optional[str]) -> nbformat.Noteboo
             raise
 
 
-def load_ipynb_text(text: str) -> nbformat.NotebookNode:
+def load_ipynb_text(text: str, is_fast: bool = False) -> nbformat.NotebookNode:
     try:
+        if is_fast:
+            return _reads_ipynb_fast(text)
+
         return nbformat.reads(text, as_version=NB_VERSION)
     except AttributeError as e:
         raise nbformat.reader.NotJSONError(msgfy.to_error_message(e))
@@ -256,6 +298,15 @@ class MetaDataConverter(JupyterNotebookConverterBase):
 
 
 class CellConverter(JupyterNotebookConverterBase):
+    """
+    Records of cells are collected for the whole notebook, and then written with
+    a single insert for each table.
+    """
+
+    # the number of bound digests of a query: less than the default maximum number of
+    # host parameters of SQLite versions older than 3.32.0 (999)
+    DIGEST_BATCH_SIZE = 500
+
     @property
     def _base_table_name(self) -> str:
         return "cells"
@@ -267,27 +318,148 @@ class CellConverter(JupyterNotebookConverterBase):
         con: SimpleSQLite,
         result_logger: ResultLogger,
         cells: Sequence,
+        image_storage: str = "inline",
     ) -> None:
         super().__init__(logger, source_info, con, result_logger)
 
         self.__cells = cells
+        self.__image_storage = image_storage
         self._cell_id: Optional[int] = None
+        self.__images: Dict[str, Tuple[str, bytes]] = {}
+        self.__table_names: Dict[str, str] = {}
+        self.__table_attr_descs: Dict[str, List[str]] = {}
+        self.__table_records: Dict[str, List[Sequence]] = {}
 
     def convert(self) -> Set[str]:
         for cell_id, cell_data in enumerate(self.__cells):
             self._cell_id = cell_id
             self.__convert_cell(cell_data)
 
+        self.__flush()
+
         return self._changed_table_name_set
 
-    def _get_log_header(self, info_name: str) -> str:
-        return "{:s}: {:s}#{}({:s})".format(
-            self._source_info.base_name, self._base_table_name, self._cell_id, info_name
+    def __add_table(self, info_name: str, attr_descs: List[str]) -> str:
+        table_name = self.__table_names.get(info_name)
+
+        if table_name is None:
+            table_name = "_".join([self._base_table_name] + info_name.split())
+            self.__table_names[info_name] = table_name
+            self.__table_attr_descs[table_name] = attr_descs
+            self.__table_records[table_name] = []
+
+        return table_name
+
+    def __add_records(self, table_name: str, records: Sequence[Sequence]) -> None:
+        self.__table_records[table_name].extend(records)
+
+    def __flush(self) -> None:
+        self.__flush_images()
+
+        for info_name, table_name in self.__table_names.items():
+            need_create_table = self._need_create_table(table_name)
+            self._con.create_table(table_name, self.__table_attr_descs[table_name])
+
+            records = self.__table_records[table_name]
+            if len(records) == 0:
+                continue
+
+            self._con.insert_many(table_name, records)
+
+            self._result_logger.logging_success(
+                self._get_log_header(info_name),
+                table_name,
+                need_create_table,
+            )
+            self._changed_table_name_set.add(table_name)
+
+        self.__table_names.clear()
+        self.__table_attr_descs.clear()
+        self.__table_records.clear()
+
+    def __flush_images(self) -> None:
+        if not self.__images:
+            return
+
+        table_name = "_".join([self._base_table_name, "outputs", IMAGE_TABLE])
+        need_create_table = self._need_create_table(table_name)
+        self._con.create_table(
+            table_name,
+            [
+                "sha256 TEXT NOT NULL PRIMARY KEY",
+                "type TEXT NOT NULL",
+                "compression TEXT",
+                "size INTEGER NOT NULL",
+                "data BLOB NOT NULL",
+            ],
         )
 
+        stored_digests = self.__fetch_stored_digests(table_name, need_create_table)
+        is_compress = self.__image_storage == "dedup-zlib"
+        records = [
+            [
+                digest,
+                data_type,
+                "zlib" if is_compress else None,
+                len(image),
+                zlib.compress(image) if is_compress else image,
+            ]
+            for digest, (data_type, image) in self.__images.items()
+            if digest not in stored_digests
+        ]
+        self.__images.clear()
+
+        if len(records) == 0:
+            return
+
+        self._con.insert_many(table_name, records)
+
+        self._result_logger.logging_success(
+            self._get_log_header(f"outputs {IMAGE_TABLE}"), table_name, need_create_table
+        )
+        self._changed_table_name_set.add(table_name)
+
+    def __fetch_stored_digests(self, table_name: str, need_create_table: bool) -> Set[str]:
+        if need_create_table:
+            return set()
+
+        digests = list(self.__images)
+        stored_digests: Set[str] = set()
+
+        for i in range(0, len(digests), self.DIGEST_BATCH_SIZE):
+            batch = digests[i : i + self.DIGEST_BATCH_SIZE]
+            result = self._con.connection.execute(
+                "SELECT sha256 FROM {} WHERE sha256 IN ({})".format(
+                    Table(table_name), ", ".join(["?"] * len(batch))
+                ),
+                batch,
+            )
+            stored_digests.update(record[0] for record in result.fetchall())
+
+        return stored_digests
+
+    def __to_image_ref(self, data_type: str, data: Any) -> Any:
+        # return the SHA-256 digest of a decoded image that refers the images table.
+        # return the data as it is if the image cannot be decoded.
+        if self.__image_storage == "inline" or not isinstance(data, str):
+            return data
+
+        try:
+            if data_type == "image/svg+xml":
+                image = data.encode("utf-8")
+            else:
+                image = base64.b64decode(data)
+        except (binascii.Error, ValueError) as e:
+            self._logger.debug(f"failed to decode {data_type} data: {e}")
+            return data
+
+        digest = hashlib.sha256(image).hexdigest()
+        self.__images.setdefault(digest, (data_type, image))
+
+        return digest
+
     def __convert_source(self, cell_data: Dict[str, str]) -> None:
         target = "source"
-        table_name, need_create_table = self._make_table_name([target])
         records = [
             [self.source_id, self._cell_id, line_no, source_line.rstrip()]
             for line_no, source_line in enumerate(cell_data[target].splitlines())
@@ -296,8 +468,8 @@ class CellConverter(JupyterNotebookConverterBase):
         del cell_data[target]
 
         if len(records) > 0:
-            self._con.create_table(
-                table_name,
+            table_name = self.__add_table(
+                target,
                 [
                     NbAttrDesc.SOURECE_ID,
                     NbAttrDesc.CELL_ID,
@@ -305,12 +477,7 @@ class CellConverter(JupyterNotebookConverterBase):
                     "{:s} TEXT".format("text"),
                 ],
             )
-            self._con.insert_many(table_name, records)
-
-            self._result_logger.logging_success(
-                self._get_log_header(target), table_name, need_create_table
-            )
-            self._changed_table_name_set.add(table_name)
+            self.__add_records(table_name, records)
 
     def __to_kv_records(self, data_map: Mapping) -> List[Tuple]:
         record_list = []  # type: List[Tuple]
@@ -333,9 +500,8 @@ class CellConverter(JupyterNotebookConverterBase):
 
         category = "outputs"
         if category in cell_data:
-            outputs_table_name, need_create_output_table = self._make_table_name([category])
-            self._con.create_table(
-                outputs_table_name,
+            outputs_table_name = self.__add_table(
+                category,
                 [
                     NbAttrDesc.SOURECE_ID,
                     NbAttrDesc.CELL_ID,
@@ -344,29 +510,15 @@ class CellConverter(JupyterNotebookConverterBase):
                     "{:s} BLOB".format("data"),
                 ],
             )
-
-            outputs_kv_table_name, need_create_output_kv_table = self._make_table_name(
-                [category, KEY_VALUE_TABLE]
-            )
-            self._con.create_table(
-                outputs_kv_table_name,
+            outputs_kv_table_name = self.__add_table(
+                f"{category} {KEY_VALUE_TABLE}",
                 [NbAttrDesc.SOURECE_ID, NbAttrDesc.CELL_ID, NbAttrDesc.KEY, NbAttrDesc.VALUE],
             )
 
             for output_data in cell_data.outputs:
-                if self.__convert_output_text(output_data, need_create_output_table):
-                    need_create_output_table = False
-                if self.__convert_output_data(output_data, need_create_output_table):
-                    need_create_output_table = False
-
-                self._con.insert_many(outputs_kv_table_name, self.__to_kv_records(output_data))
-                self._result_logger.logging_success(
-                    self._get_log_header(f"{category} {KEY_VALUE_TABLE}"),
-                    outputs_kv_table_name,
-                    need_create_output_kv_table,
-                )
-                self._changed_table_name_set.add(outputs_kv_table_name)
-                need_create_output_kv_table = False
+                self.__convert_output_text(outputs_table_name, output_data)
+                self.__convert_output_data(outputs_table_name, output_data)
+                self.__add_records(outputs_kv_table_name, self.__to_kv_records(output_data))
 
             del cell_data[category]
 
@@ -377,26 +529,18 @@ class CellConverter(JupyterNotebookConverterBase):
         if len(kv_records) == 0:
             return
 
-        kv_table_name, need_create_kv_table = self._make_table_name([KEY_VALUE_TABLE])
-        self._con.create_table(
-            kv_table_name,
+        kv_table_name = self.__add_table(
+            KEY_VALUE_TABLE,
             [NbAttrDesc.SOURECE_ID, NbAttrDesc.CELL_ID, NbAttrDesc.KEY, NbAttrDesc.VALUE],
         )
-        self._con.insert_many(kv_table_name, kv_records)
-
-        self._result_logger.logging_success(
-            self._get_log_header(KEY_VALUE_TABLE), kv_table_name, need_create_kv_table
-        )
-        self._changed_table_name_set.add(kv_table_name)
+        self.__add_records(kv_table_name, kv_records)
 
-    def __convert_output_text(self, output_data, need_create_table: bool) -> bool:
+    def __convert_output_text(self, table_name: str, output_data) -> None:
         data_type = "text"
         if data_type not in output_data:
-            return False
-
-        table_name, _ = self._make_table_name(["outputs"])
+            return
 
-        num_record = self._con.insert_many(
+        self.__add_records(
             table_name,
             [
                 [self.source_id, self._cell_id, data_type, line_no, line]
@@ -406,26 +550,12 @@ class CellConverter(JupyterNotebookConverterBase):
 
         del output_data[data_type]
 
-        if num_record == 0:
-            return False
-
-        self._result_logger.logging_success(
-            self._get_log_header(f"outputs {data_type}"), table_name, need_create_table
-        )
-        self._changed_table_name_set.add(table_name)
-
-        return True
-
-    def __convert_output_data(
-        self, output_data: Dict[str, Mapping], need_create_table: bool
-    ) -> bool:
+    def __convert_output_data(self, table_name: str, output_data: Dict[str, Mapping]) -> None:
         output_key = "data"
         if output_key not in output_data:
-            return False
+            return
 
-        table_name, _ = self._make_table_name(["outputs"])
         image_regexp = re.compile("^image/.+")
-        num_record = 0
 
         for data_type, data in output_data[output_key].items():
             self._logger.debug(
@@ -435,14 +565,24 @@ class CellConverter(JupyterNotebookConverterBase):
             )
 
             if image_regexp.search(data_type):
-                self._con.insert(table_name, [self.source_id, self._cell_id, data_type, 0, data])
-                num_record += 1
+                self.__add_records(
+                    table_name,
+                    [
+                        [
+                            self.source_id,
+                            self._cell_id,
+                            data_type,
+                            0,
+                            self.__to_image_ref(data_type, data),
+                        ]
+                    ],
+                )
                 continue
 
             if isinstance(data, dict):
                 data = json.dumps(data, indent=4, ensure_ascii=False)
 
-            num_record += self._con.insert_many(
+            self.__add_records(
                 table_name,
                 [
                     [self.source_id, self._cell_id, data_type, data_no, line]
@@ -452,16 +592,6 @@ class CellConverter(JupyterNotebookConverterBase):
 
         del output_data[output_key]
 
-        if num_record == 0:
-            return False
-
-        self._result_logger.logging_success(
-            self._get_log_header(f"outputs {data_type}"), table_name, need_create_table
-        )
-        self._changed_table_name_set.add(table_name)
-
-        return True
-
 
 def convert_nb(
     logger: Any,
@@ -469,10 +599,11 @@ def convert_nb(
     con: SimpleSQLite,
     result_logger: ResultLogger,
     nb: nbformat.NotebookNode,
+    image_storage: str = "inline",
 ) -> Set[str]:
     changed_table_name_set: Set[str] = set()
     changed_table_name_set |= CellConverter(
-        logger, source_info, con, result_logger, nb.cells
+        logger, source_info, con, result_logger, nb.cells, image_storage=image_storage
     ).convert()
     changed_table_name_set |= MetaDataConverter(
         logger, source_info, con, result_logger, nb.metadata
@@ -0,0 +1,139 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+from typing import Any, Callable, Iterator, Optional, Sequence, Tuple, Type, Union
+
+import pytablereader as ptr
+from pytablereader._constant import TableNameTemplate as tnt
+from pytablereader.json.formatter import (
+    JsonConverter,
+    MultipleJsonTableConverterA,
+    MultipleJsonTableConverterB,
+    MultipleJsonTableConverterC,
+    SingleJsonTableConverterA,
+    SingleJsonTableConverterB,
+    SingleJsonTableConverterBase,
+    SingleJsonTableConverterC,
+)
+from tabledata import TableData
+
+
+class NestedJsonError(ptr.ValidationError):
+    """
+    Exception raised when a JSON document is neither a table nor tables.
+    The parsed document is kept to convert it without parsing again.
+    """
+
+    def __init__(self, json_data: Any) -> None:
+        super().__init__("JSON document is neither a table nor tables")
+
+        self.json_data = json_data
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # raised by worker processes
+        return (self.__class__, (self.json_data,))
+
+
+def is_json_scalar(value: Any) -> bool:
+    return value is None or isinstance(value, (str, int, float))
+
+
+def is_json_record(value: Any) -> bool:
+    return isinstance(value, dict) and all(is_json_scalar(v) for v in value.values())
+
+
+def is_json_records(value: Any) -> bool:
+    return isinstance(value, list) and all(is_json_record(record) for record in value)
+
+
+def is_json_columns(value: Any) -> bool:
+    return isinstance(value, dict) and all(
+        isinstance(column, list) and all(is_json_scalar(v) for v in column)
+        for column in value.values()
+    )
+
+
+def _is_json_tables(is_table: Callable[[Any], bool]) -> Callable[[Any], bool]:
+    return lambda value: isinstance(value, dict) and all(is_table(v) for v in value.values())
+
+
+def _classified(converter_class: Type[JsonConverter]) -> Type[JsonConverter]:
+    class ClassifiedConverter(converter_class):  # type: ignore
+        filename: Optional[str] = None
+
+        def _validate_source_data(self) -> None:
+            # the document is classified by the same rules as the JSON schema of the class
+            pass
+
+        def _make_table_name(self) -> str:
+            if self.filename is None or not isinstance(self, SingleJsonTableConverterBase):
+                return super()._make_table_name()
+
+            # name a table of a text after the file as JSON file loaders do
+            kv_mapping = self._loader._get_basic_tablename_keyvalue_mapping()
+            kv_mapping[tnt.DEFAULT] = tnt.FILENAME
+            kv_mapping[tnt.FILENAME] = self.filename
+            kv_mapping[tnt.KEY] = self._loader.get_format_key()
+
+            return self._loader._expand_table_name_format(kv_mapping)
+
+    return ClassifiedConverter
+
+
+# the same rules and precedence as the JSON schemas of pytablereader JSON converters,
+# except that objects are not accepted as cell values: documents that include such
+# values are converted as nested documents
+_CONVERTER_RULES: Sequence[Tuple[Callable[[Any], bool], Type[JsonConverter]]] = (
+    (_is_json_tables(is_json_records), _classified(MultipleJsonTableConverterA)),
+    (_is_json_tables(is_json_columns), _classified(MultipleJsonTableConverterB)),
+    (_is_json_tables(is_json_record), _classified(MultipleJsonTableConverterC)),
+    (is_json_records, _classified(SingleJsonTableConverterA)),
+    (is_json_columns, _classified(SingleJsonTableConverterB)),
+    (is_json_record, _classified(SingleJsonTableConverterC)),
+)
+
+
+def _get_converter_class(json_data: Any) -> Optional[Type[JsonConverter]]:
+    for is_match, converter_class in _CONVERTER_RULES:
+        if is_match(json_data):
+            return converter_class
+
+    return None
+
+
+def load_tables(
+    loader: Union[ptr.TableFileLoader, ptr.TableTextLoader, ptr.TableUrlLoader],
+    filename: Optional[str] = None,
+) -> Iterator[TableData]:
+    """
+    Load tables from a loader as the same as ``loader.load()``.
+    A JSON document is parsed only once and classified by its structure:
+    tables are extracted from a flat table or a table dict, and
+    :py:class:`NestedJsonError` that has the parsed document is raised for the others.
+    Tables of a JSON text are named after ``filename`` as the file loaders do if specified.
+    """
+
+    if loader.format_name != "json":
+        yield from loader.load()
+        return
+
+    json_loader = loader.loader
+
+    try:
+        json_data = json_loader.load_dict()
+    except ptr.DataError:
+        raise
+    except ValueError as e:
+        # text loaders do not convert decode errors to ValidationError as file loaders do
+        raise ptr.ValidationError(e)
+
+    converter_class = _get_converter_class(json_data)
+    if converter_class is None:
+        raise NestedJsonError(json_data)
+
+    converter = converter_class(json_data)
+    converter.filename = filename
+    converter.accept(json_loader)
+
+    yield from converter.to_table_data()
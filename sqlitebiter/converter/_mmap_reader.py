@@ -0,0 +1,150 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+import codecs
+import mmap
+import os
+from typing import IO, Iterator, List, Optional, Tuple
+
+
+_NEWLINE = b"\n"
+_BLOCK_SIZE = 1024 * 1024
+
+
+def is_mmap_encoding(encoding: str) -> bool:
+    # line boundaries are searched as bytes: the encoding must be ASCII compatible
+    # (e.g. UTF-16 is not)
+    try:
+        return "\n".encode(codecs.lookup(encoding).name) == _NEWLINE
+    except LookupError:
+        return False
+
+
+class MmapLineReader:
+    """
+    Read lines of a local file via a memory map.
+    Line boundaries are searched in the mapped buffer, and then only blocks of complete lines
+    are decoded. The page cache of the file is shared by repeated conversions.
+    A byte range (``start``/``end``) of the file can be read to parse a file in parallel.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        encoding: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        block_size: int = _BLOCK_SIZE,
+    ) -> None:
+        self.__file_path = file_path
+        self.__encoding = encoding
+        self.__start = start
+        self.__end = end
+        self.__block_size = block_size
+        self.__fp: Optional[IO[bytes]] = None
+        self.__mmap: Optional[mmap.mmap] = None
+
+    def __enter__(self) -> "MmapLineReader":
+        fp = open(self.__file_path, "rb")
+        self.__fp = fp
+
+        try:
+            self.__mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            self.__mmap = None
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_lines()
+
+    def close(self) -> None:
+        if self.__mmap is not None:
+            self.__mmap.close()
+            self.__mmap = None
+
+        if self.__fp is not None:
+            self.__fp.close()
+            self.__fp = None
+
+    def iter_lines(self) -> Iterator[str]:
+        mm = self.__mmap
+        if mm is None:
+            return
+
+        decoder = codecs.getincrementaldecoder(self.__encoding)()
+        end = len(mm) if self.__end is None else min(self.__end, len(mm))
+        pos = self.__start
+
+        while pos < end:
+            block_end = min(pos + self.__block_size, end)
+
+            if block_end < end:
+                # extend the block to the end of the last line in the block
+                newline_pos = mm.rfind(_NEWLINE, pos, block_end)
+                if newline_pos < 0:
+                    newline_pos = mm.find(_NEWLINE, block_end, end)
+
+                block_end = end if newline_pos < 0 else newline_pos + 1
+
+            text = decoder.decode(mm[pos:block_end], final=block_end >= end)
+            pos = block_end
+
+            # split only at LF: csv module requires carriage returns within lines as is
+            lines = text.split("\n")
+            for line in lines[:-1]:
+                yield line + "\n"
+
+            if lines[-1]:
+                yield lines[-1]
+
+
+def split_byte_ranges(
+    file_path: str, num_ranges: int, quotechar: Optional[str] = None
+) -> List[Tuple[int, int]]:
+    """
+    Split a file into byte ranges that are aligned to line boundaries.
+    If ``quotechar`` is given, newlines within quoted fields are not used as boundaries:
+    a boundary is placed at a newline where the number of the quote characters in
+    the range is even (escaped quotes are doubled in CSV).
+    """
+
+    file_size = os.path.getsize(file_path)
+    if file_size == 0 or num_ranges <= 1:
+        return [(0, file_size)]
+
+    quote = quotechar.encode("ascii") if quotechar else None
+    range_size = max(1, file_size // num_ranges)
+    ranges: List[Tuple[int, int]] = []
+
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+
+        while start < file_size:
+            pos = min(start + range_size, file_size) - 1
+            num_quotes = mm[start:pos].count(quote) if quote else 0
+
+            while True:
+                newline_pos = mm.find(_NEWLINE, pos)
+                if newline_pos < 0:
+                    end = file_size
+                    break
+
+                end = newline_pos + 1
+                if quote:
+                    num_quotes += mm[pos:end].count(quote)
+
+                if num_quotes % 2 == 0:
+                    break
+
+                pos = end
+
+            ranges.append((start, end))
+            start = end
+
+    return ranges
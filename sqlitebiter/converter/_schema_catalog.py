@@ -0,0 +1,115 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from simplesqlite import SimpleSQLite
+from simplesqlite.query import Attr, Table
+from sqliteschema import SQLITE_SYSTEM_TABLES, SchemaHeader, SQLiteTableSchema
+
+
+class AttrDef(NamedTuple):
+    name: str
+    data_type: str
+    is_primary_key: bool = False
+    is_not_null: bool = False
+
+    def to_query(self) -> str:
+        query = f"{Attr(self.name)} {self.data_type:s}"
+
+        if self.is_primary_key:
+            query += " PRIMARY KEY"
+        if self.is_not_null:
+            query += " NOT NULL"
+
+        return query
+
+    def to_schema(self) -> Dict[str, Any]:
+        return {
+            SchemaHeader.ATTR_NAME: self.name,
+            SchemaHeader.INDEX: self.is_primary_key,
+            SchemaHeader.DATA_TYPE: self.data_type,
+            SchemaHeader.NULLABLE: "NO" if self.is_not_null else "YES",
+            SchemaHeader.KEY: "PRI" if self.is_primary_key else "",
+            SchemaHeader.DEFAULT: "" if self.is_not_null else "NULL",
+            SchemaHeader.EXTRA: "",
+        }
+
+
+class SchemaCatalog:
+    """
+    In-process cache of the table schemas of a database.
+    The cache is reloaded when the schema of the database is changed by others.
+    """
+
+    def __init__(self, con: SimpleSQLite) -> None:
+        self.__con = con
+        self.__schema_version: Optional[int] = None
+        self.__table_attr_defs: Dict[str, Optional[List[AttrDef]]] = {}
+
+    def fetch_table_names(self) -> List[str]:
+        self.__sync()
+
+        return list(self.__table_attr_defs)
+
+    def has_table(self, table_name: str) -> bool:
+        self.__sync()
+
+        return table_name in self.__table_attr_defs
+
+    def fetch_attr_defs(self, table_name: str) -> List[AttrDef]:
+        self.__sync()
+
+        attr_defs = self.__table_attr_defs.get(table_name)
+        if attr_defs is None:
+            attr_defs = self.__fetch_table_info(table_name)
+            self.__table_attr_defs[table_name] = attr_defs
+
+        return attr_defs
+
+    def fetch_table_schema(self, table_name: str) -> SQLiteTableSchema:
+        return SQLiteTableSchema(
+            table_name,
+            {table_name: [attr_def.to_schema() for attr_def in self.fetch_attr_defs(table_name)]},
+        )
+
+    def add_table(self, table_name: str, attr_defs: List[AttrDef]) -> None:
+        # should be called right after a table created
+        self.__table_attr_defs[table_name] = list(attr_defs)
+        self.__schema_version = self.__fetch_schema_version()
+
+    def add_attr_defs(self, table_name: str, attr_defs: List[AttrDef]) -> None:
+        # should be called right after columns added to a table
+        self.__table_attr_defs[table_name] = self.fetch_attr_defs(table_name) + list(attr_defs)
+        self.__schema_version = self.__fetch_schema_version()
+
+    def __sync(self) -> None:
+        schema_version = self.__fetch_schema_version()
+        if schema_version == self.__schema_version:
+            return
+
+        result = self.__con.execute_query("SELECT name FROM sqlite_master WHERE type='table'")
+        table_names = [] if result is None else [record[0] for record in result.fetchall()]
+
+        self.__table_attr_defs = {
+            table_name: None for table_name in table_names if table_name not in SQLITE_SYSTEM_TABLES
+        }
+        self.__schema_version = schema_version
+
+    def __fetch_schema_version(self) -> Optional[int]:
+        result = self.__con.execute_query("PRAGMA schema_version")
+        if result is None:
+            return None
+
+        return result.fetchone()[0]
+
+    def __fetch_table_info(self, table_name: str) -> List[AttrDef]:
+        result = self.__con.execute_query(f"PRAGMA table_info({Table(table_name)})")
+        if result is None:
+            return []
+
+        return [
+            AttrDef(name, data_type, is_primary_key=pk > 0, is_not_null=bool(not_null))
+            for _cid, name, data_type, not_null, _default, pk in result.fetchall()
+        ]
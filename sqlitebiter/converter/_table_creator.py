@@ -2,90 +2,548 @@
 .. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
 """
 
+import random
+import re
+from array import array
+from decimal import Decimal
+from itertools import chain, islice
 from textwrap import dedent
-from typing import TYPE_CHECKING, Any, Optional, Sequence
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
 
-import simplesqlite
+from dataproperty import DataPropertyExtractor, DefaultValue
 from simplesqlite import SimpleSQLite
-from tabledata import TableData
-from typepy import String
+from simplesqlite.query import Table
+from tabledata import TableData, to_value_matrix
+from typepy import Integer, RealNumber, String, Typecode
 
 from .._common import ResultLogger
-
-
-try:
-    import ujson as json
-except ImportError:
-    import json  # type: ignore
+from .._stats import ConversionStats, Stage
+from ._schema_catalog import AttrDef, SchemaCatalog
+from ._type_cache import TypeCache, TypeCacheMap, get_cached_types
 
 
 if TYPE_CHECKING:
     from ._base import SourceInfo  # noqa
 
 
+_SQLITE_TYPE_NAMES = {
+    Typecode.INTEGER: "INTEGER",
+    Typecode.REAL_NUMBER: "REAL",
+    Typecode.STRING: "TEXT",
+}
+_TYPE_HINT_NAMES = {Integer: "INTEGER", RealNumber: "REAL", String: "TEXT"}
+_NULL_TYPECODES = (Typecode.NONE, Typecode.NULL_STRING)
+_REAL_TYPECODES = (Typecode.REAL_NUMBER, Typecode.INFINITY, Typecode.NAN)
+
+# canonical forms of numbers that are converted without type inference:
+# other forms (e.g. "007", "1.0", "1e3") are converted by type inference
+_INTEGER_PATTERN = r"(?:0|-?[1-9][0-9]*)"
+_REAL_PATTERN = r"(?:-?[0-9]+\.[0-9]*[1-9][0-9]*)"
+_NUMBER_PATTERN = rf"(?:{_INTEGER_PATTERN}|{_REAL_PATTERN})"
+_INTEGER_REGEXP = re.compile(rf"^{_INTEGER_PATTERN}$")
+_REAL_REGEXP = re.compile(rf"^{_REAL_PATTERN}$")
+
+# values of a column that are joined with newlines
+_INTEGER_COLUMN_REGEXP = re.compile(rf"{_INTEGER_PATTERN}(?:\n{_INTEGER_PATTERN})*")
+_NUMBER_COLUMN_REGEXP = re.compile(rf"{_NUMBER_PATTERN}(?:\n{_NUMBER_PATTERN})*")
+
+# float types of real numbers that are inserted as floats: Decimal values are converted
+# to floats by simplesqlite
+_ARRAY_FLOAT_TYPES = (float, Decimal)
+
+INFER_SAMPLE_METHODS = ("head", "reservoir")
+
+
+class TypeInferenceSample(NamedTuple):
+    rows: int
+    method: str = "head"
+
+
+class ColumnarRecords:
+    """
+    Records that are stored as columns. Numeric columns are stored as arrays
+    to reduce memory usage, and rows are materialized when the records are iterated.
+    """
+
+    def __init__(self, columns: List[Sequence[Any]]) -> None:
+        self.__columns = columns
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        return zip(*self.__columns)
+
+    def __len__(self) -> int:
+        return len(self.__columns[0]) if self.__columns else 0
+
+
+class TableRecords(NamedTuple):
+    table_name: str
+    attr_defs: List[AttrDef]
+    records: Iterable[Sequence[Any]]
+
+    @classmethod
+    def from_tabledata(
+        cls,
+        table_data: TableData,
+        infer_sample: Optional[TypeInferenceSample] = None,
+        type_cache: Optional[TypeCacheMap] = None,
+    ) -> "TableRecords":
+        table_name = cast(str, table_data.table_name).strip()
+        table_records: Optional[TableRecords] = None
+
+        hint_type_names = _get_type_hint_names(table_data)
+        if hint_type_names is not None:
+            # type hints cover all of the columns: column types are not inferred
+            table_records = _from_tabledata_hints(table_data, hint_type_names)
+        elif not table_data.dp_extractor.column_type_hints:
+            cached_type_names = get_cached_types(type_cache, table_name, table_data.headers)
+            if cached_type_names is not None:
+                table_records = _from_tabledata_types(table_data, list(cached_type_names))
+            elif infer_sample is not None and table_data.num_rows > infer_sample.rows:
+                table_records = _from_tabledata_sample(table_data, infer_sample)
+
+        if table_records is not None:
+            return table_records
+
+        return cls(
+            table_name,
+            [
+                AttrDef(str(header), _SQLITE_TYPE_NAMES.get(col_dp.typecode, "TEXT"))
+                for header, col_dp in zip(table_data.headers, table_data.column_dp_list)
+            ],
+            _to_records(table_data),
+        )
+
+    @property
+    def attr_names(self) -> List[str]:
+        return [attr_def.name for attr_def in self.attr_defs]
+
+    def to_picklable(self) -> "TableRecords":
+        # records are sent to another process: iterators of records are not picklable
+        if isinstance(self.records, (list, ColumnarRecords)):
+            return self
+
+        return self._replace(records=list(self.records))
+
+
+def _to_records(table_data: TableData) -> Iterator[List[Any]]:
+    for value_dp_list in table_data.value_dp_matrix:
+        yield [value_dp.data for value_dp in value_dp_list]
+
+
+def _from_tabledata_sample(
+    table_data: TableData, infer_sample: TypeInferenceSample
+) -> Optional[TableRecords]:
+    # infer column types from sample rows, and then convert the rest of values without
+    # type inference. return None if the table requires the type inference for all of
+    # the values.
+    rows = _to_value_rows(table_data)
+    if rows is None:
+        return None
+
+    sample_table_data = TableData(
+        table_data.table_name,
+        table_data.headers,
+        _sample_rows(rows, infer_sample),
+        dp_extractor=table_data.dp_extractor,
+    )
+    type_names: List[Optional[str]] = []
+    for col_dp in sample_table_data.column_dp_list:
+        if col_dp.typecode in _NULL_TYPECODES:
+            type_names.append(None)
+        elif col_dp.typecode in _SQLITE_TYPE_NAMES:
+            type_names.append(_SQLITE_TYPE_NAMES[col_dp.typecode])
+        else:
+            return None
+
+    return _convert_rows(table_data, rows, type_names)
+
+
+def _from_tabledata_types(
+    table_data: TableData, type_names: List[Optional[str]]
+) -> Optional[TableRecords]:
+    rows = _to_value_rows(table_data)
+    if rows is None:
+        return None
+
+    return _convert_rows(table_data, rows, type_names)
+
+
+def _from_tabledata_hints(
+    table_data: TableData, type_names: List[Optional[str]]
+) -> Optional[TableRecords]:
+    rows = _to_value_rows(table_data)
+    if rows is None:
+        return None
+
+    # values of string type hint columns are converted to strings by data properties
+    # (e.g. True to 'True', None to 'None'): tables that have non-string values in
+    # the columns are converted by data properties
+    text_col_idxs = [col_idx for col_idx, type_name in enumerate(type_names) if type_name == "TEXT"]
+    if any(not isinstance(row[col_idx], str) for row in rows for col_idx in text_col_idxs):
+        return None
+
+    return _convert_rows(table_data, rows, type_names)
+
+
+def _get_type_hint_names(table_data: TableData) -> Optional[List[Optional[str]]]:
+    type_hints = table_data.dp_extractor.column_type_hints
+    if not type_hints or len(type_hints) != len(table_data.headers):
+        return None
+
+    type_names: List[Optional[str]] = []
+    for type_hint in type_hints:
+        if type_hint not in _TYPE_HINT_NAMES:
+            return None
+
+        type_names.append(_TYPE_HINT_NAMES[type_hint])
+
+    return type_names
+
+
+def _to_value_rows(table_data: TableData) -> Optional[List[List[Any]]]:
+    headers = table_data.headers
+    rows = to_value_matrix(headers, table_data.rows)
+    if any([len(row) != len(headers) for row in rows]):
+        # rows are formatted by matrix_formatting
+        return None
+
+    return rows
+
+
+def _convert_rows(
+    table_data: TableData, rows: List[List[Any]], type_names: List[Optional[str]]
+) -> TableRecords:
+    # convert values to the column types without type inference.
+    # columns are widened by values that do not fit the types.
+    dp_extractor = table_data.dp_extractor
+    float_type = dp_extractor.float_type or DefaultValue.FLOAT_TYPE
+    columns: List[Sequence[Any]] = []
+
+    for col_idx, column in enumerate(zip(*rows)):
+        numeric_column = _to_numeric_array(column, type_names[col_idx], float_type)
+        if numeric_column is not None:
+            columns.append(numeric_column[0])
+            type_names[col_idx] = numeric_column[1]
+            continue
+
+        values, type_names[col_idx] = _convert_column(
+            dp_extractor, float_type, column, type_names[col_idx]
+        )
+        columns.append(values)
+
+    return TableRecords(
+        cast(str, table_data.table_name).strip(),
+        [
+            AttrDef(str(header), type_name or "TEXT")
+            for header, type_name in zip(table_data.headers, type_names)
+        ],
+        ColumnarRecords(columns),
+    )
+
+
+def _to_numeric_array(
+    column: Sequence[Any], type_name: Optional[str], float_type: Any
+) -> Optional[Tuple["array[Any]", str]]:
+    # check the values of a column at once, and then parse the column into an array
+    # if all of the values are integers or real numbers of the column type.
+    # return None if the column requires conversion for each value.
+    if type_name == "TEXT":
+        return None
+
+    try:
+        text = "\n".join(column)
+    except TypeError:
+        if not all([type(value) is int for value in column]):
+            return None
+
+        return _to_integer_array(column, type_name)
+
+    if text.count("\n") != len(column) - 1:
+        # values that include newlines
+        return None
+
+    if _INTEGER_COLUMN_REGEXP.fullmatch(text):
+        return _to_integer_array(map(int, column), type_name)
+
+    if (
+        float_type in _ARRAY_FLOAT_TYPES
+        and type_name in (None, "REAL")
+        and _NUMBER_COLUMN_REGEXP.fullmatch(text)
+    ):
+        return (array("d", map(float, column)), "REAL")
+
+    return None
+
+
+def _to_integer_array(
+    values: Iterable[int], type_name: Optional[str]
+) -> Optional[Tuple["array[Any]", str]]:
+    try:
+        return (array("q", values), type_name or "INTEGER")
+    except OverflowError:
+        # integers that exceed 64 bits are reported at inserting
+        return None
+
+
+def _convert_column(
+    dp_extractor: DataPropertyExtractor,
+    float_type: Any,
+    column: Sequence[Any],
+    type_name: Optional[str],
+) -> Tuple[List[Any], Optional[str]]:
+    values = []
+
+    for value in column:
+        if value is None or value == "":
+            pass
+        elif isinstance(value, str):
+            if type_name == "TEXT":
+                pass
+            elif _INTEGER_REGEXP.search(value):
+                value = int(value)
+                type_name = type_name or "INTEGER"
+            elif type_name != "INTEGER" and _REAL_REGEXP.search(value):
+                value = float_type(value)
+                type_name = "REAL"
+            else:
+                value, type_name = _convert_value(dp_extractor, value, type_name)
+        else:
+            value, type_name = _convert_value(dp_extractor, value, type_name)
+
+        values.append(value)
+
+    return (values, type_name)
+
+
+def _sample_rows(rows: List[List[Any]], infer_sample: TypeInferenceSample) -> List[List[Any]]:
+    if infer_sample.method == "reservoir":
+        indices = random.sample(range(len(rows)), infer_sample.rows)
+        return [rows[idx] for idx in sorted(indices)]
+
+    return rows[: infer_sample.rows]
+
+
+def _convert_value(
+    dp_extractor: DataPropertyExtractor, value: Any, type_name: Optional[str]
+) -> Tuple[Any, Optional[str]]:
+    value_dp = dp_extractor.to_dp(value)
+    typecode = value_dp.typecode
+
+    if typecode in _NULL_TYPECODES or type_name == "TEXT":
+        return (value_dp.data, type_name)
+
+    if typecode == Typecode.INTEGER:
+        return (value_dp.data, type_name or "INTEGER")
+
+    if typecode in _REAL_TYPECODES and type_name is not None:
+        return (value_dp.data, "REAL")
+
+    return (value_dp.data, "TEXT")
+
+
 class TableCreator:
+    BATCH_SIZE = 1000
+
     def __init__(
         self,
         logger: Any,
         dst_con: SimpleSQLite,
+        schema_catalog: SchemaCatalog,
+        stats: ConversionStats,
         add_pri_key_name: Optional[str],
         result_logger: ResultLogger,
         verbosity_level: int,
         max_workers: int,
+        infer_sample: Optional[TypeInferenceSample] = None,
+        type_cache: Optional[TypeCache] = None,
     ) -> None:
         self.__logger = logger
         self.__dst_con = dst_con
+        self.__schema_catalog = schema_catalog
+        self.__stats = stats
         self.__add_pri_key_name = add_pri_key_name
         self.__result_logger = result_logger
         self.__verbosity_level = verbosity_level
         self.__max_workers = max_workers
+        self.__infer_sample = infer_sample
+        self.__type_cache = type_cache
+        self.__deferred_index_map: Dict[str, List[str]] = {}
+
+    @property
+    def __type_cache_map(self) -> Optional[TypeCacheMap]:
+        return self.__type_cache.types if self.__type_cache else None
 
     def create(
         self, table_data: TableData, index_list: Sequence[str], source_info: "SourceInfo"
-    ) -> None:
-        con_mem = simplesqlite.connect_memdb(max_workers=self.__max_workers)
+    ) -> str:
+        with self.__stats.measure(Stage.NORMALIZE):
+            table_records = TableRecords.from_tabledata(
+                table_data,
+                self.__infer_sample,
+                self.__type_cache_map,
+            )
 
-        con_mem.create_table_from_tabledata(
-            table_data,
-            primary_key=self.__add_pri_key_name,
-            add_primary_key_column=String(self.__add_pri_key_name).is_type(),
-        )
+        return self.create_from_records(table_records, index_list, source_info)
+
+    def create_from_records(
+        self, table_records: TableRecords, index_list: Sequence[str], source_info: "SourceInfo"
+    ) -> str:
+        with self.__stats.measure(Stage.CREATE):
+            return self.__create_from_records(table_records, index_list, source_info)
 
-        src_table_name = con_mem.fetch_table_names()[0]
+    def __create_from_records(
+        self, table_records: TableRecords, index_list: Sequence[str], source_info: "SourceInfo"
+    ) -> str:
+        records = iter(table_records.records)
+        first_record = next(records, None)
+
+        if not table_records.attr_defs or first_record is None:
+            raise ValueError(f"input table is empty: table={table_records.table_name}")
+
+        src_table_name = table_records.table_name
+        attr_defs = self.__to_attr_defs(table_records)
         dst_table_name = src_table_name
 
-        if self.__require_rename_table(con_mem, src_table_name):
+        if self.__require_rename_table(src_table_name, attr_defs):
             dst_table_name = self.__make_unique_table_name(src_table_name)
 
             self.__logger.debug(f"rename table from '{src_table_name}' to '{dst_table_name}'")
 
-            is_create_table = True
-            simplesqlite.copy_table(
-                src_con=con_mem,
-                dst_con=self.__dst_con,
-                src_table_name=src_table_name,
-                dst_table_name=dst_table_name,
-            )
-        else:
-            is_create_table = not self.__dst_con.has_table(dst_table_name)
-            simplesqlite.append_table(
-                src_con=con_mem, dst_con=self.__dst_con, table_name=dst_table_name
+        is_create_table = not self.__schema_catalog.has_table(dst_table_name)
+        if is_create_table:
+            self.__dst_con.create_table(
+                dst_table_name, [attr_def.to_query() for attr_def in attr_defs]
             )
+            self.__schema_catalog.add_table(dst_table_name, attr_defs)
 
-        self.__dst_con.create_index_list(dst_table_name, index_list)
+        with self.__stats.measure_table(dst_table_name):
+            self.__insert_records(
+                dst_table_name, table_records.attr_names, chain([first_record], records)
+            )
+        self.__update_type_cache(table_records)
+        self.__defer_index_list(dst_table_name, index_list)
+        self.__dst_con.commit()
 
         self.__result_logger.logging_success(
             source_info.get_name(self.__verbosity_level), dst_table_name, is_create_table
         )
 
-    def __require_rename_table(self, src_con: SimpleSQLite, src_table_name: str) -> bool:
-        if not self.__dst_con.has_table(src_table_name):
+        return dst_table_name
+
+    def append(self, table_name: str, table_data: TableData) -> None:
+        with self.__stats.measure(Stage.NORMALIZE):
+            table_records = TableRecords.from_tabledata(
+                table_data,
+                self.__infer_sample,
+                self.__type_cache_map,
+            )
+
+        self.append_records(table_name, table_records)
+
+    def append_records(self, table_name: str, table_records: TableRecords) -> None:
+        with self.__stats.measure(Stage.CREATE), self.__stats.measure_table(table_name):
+            self.__add_columns(table_name, table_records.attr_defs)
+            self.__insert_records(table_name, table_records.attr_names, table_records.records)
+            self.__dst_con.commit()
+
+        self.__update_type_cache(table_records)
+
+    def create_deferred_index_list(self) -> None:
+        # indices are created once per table after all of the records are inserted:
+        # building an index at once is faster than updating it at each insert.
+        with self.__stats.measure(Stage.INDEX):
+            for table_name, index_list in self.__deferred_index_map.items():
+                if not self.__schema_catalog.has_table(table_name):
+                    continue
+
+                with self.__stats.measure_table(table_name, "index_elapsed"):
+                    self.__dst_con.create_index_list(table_name, index_list)
+
+            self.__deferred_index_map.clear()
+            self.__dst_con.commit()
+
+    def __update_type_cache(self, table_records: TableRecords) -> None:
+        if self.__type_cache is None:
+            return
+
+        self.__type_cache.update(
+            table_records.table_name,
+            table_records.attr_names,
+            [attr_def.data_type for attr_def in table_records.attr_defs],
+        )
+
+    def __defer_index_list(self, table_name: str, index_list: Sequence[str]) -> None:
+        deferred_index_list = self.__deferred_index_map.setdefault(table_name, [])
+
+        for index in index_list:
+            if index and index not in deferred_index_list:
+                deferred_index_list.append(index)
+
+    def __to_attr_defs(self, table_records: TableRecords) -> List[AttrDef]:
+        if not self.__add_pri_key_name:
+            return table_records.attr_defs
+
+        if self.__add_pri_key_name in table_records.attr_names:
+            raise ValueError(
+                "a primary key field that will be added should not conflict "
+                "with existing fields."
+            )
+
+        return [
+            AttrDef(self.__add_pri_key_name, "INTEGER", is_primary_key=True)
+        ] + table_records.attr_defs
+
+    def __add_columns(self, table_name: str, attr_defs: Sequence[AttrDef]) -> None:
+        # records appended to a table may have attributes that the table does not have yet
+        exist_attr_names = {
+            attr_def.name.lower() for attr_def in self.__schema_catalog.fetch_attr_defs(table_name)
+        }
+        new_attr_defs = [
+            attr_def for attr_def in attr_defs if attr_def.name.lower() not in exist_attr_names
+        ]
+        if not new_attr_defs:
+            return
+
+        for attr_def in new_attr_defs:
+            self.__logger.debug(f"add column to '{table_name}': {attr_def.to_query()}")
+            self.__dst_con.execute_query(
+                f"ALTER TABLE {Table(table_name)} ADD COLUMN {attr_def.to_query()}"
+            )
+
+        self.__schema_catalog.add_attr_defs(table_name, new_attr_defs)
+
+    def __insert_records(
+        self, table_name: str, attr_names: Sequence[str], records: Iterable[Sequence[Any]]
+    ) -> None:
+        records = iter(records)
+
+        while True:
+            batch = list(islice(records, self.BATCH_SIZE))
+            if not batch:
+                break
+
+            self.__dst_con.insert_many(table_name, batch, attr_names=attr_names)
+            self.__stats.add_record_count(table_name, len(batch))
+
+    def __require_rename_table(self, src_table_name: str, src_attr_defs: List[AttrDef]) -> bool:
+        if not self.__schema_catalog.has_table(src_table_name):
             return False
 
-        lhs = self.__dst_con.schema_extractor.fetch_table_schema(src_table_name).as_dict()
-        rhs = src_con.schema_extractor.fetch_table_schema(src_table_name).as_dict()
+        dst_attr_defs = self.__schema_catalog.fetch_attr_defs(src_table_name)
 
-        if lhs != rhs:
+        if dst_attr_defs != src_attr_defs:
             self.__logger.debug(
                 dedent(
                     """\
@@ -96,8 +554,8 @@ class TableCreator:
                     """
                 ).format(
                     table=src_table_name,
-                    src_schema=json.dumps(lhs, indent=4, ensure_ascii=False),
-                    dst_schema=json.dumps(rhs, indent=4, ensure_ascii=False),
+                    dst_schema=[attr_def.to_query() for attr_def in dst_attr_defs],
+                    src_schema=[attr_def.to_query() for attr_def in src_attr_defs],
                 )
             )
             return True
@@ -105,7 +563,7 @@ class TableCreator:
         return False
 
     def __make_unique_table_name(self, table_name_base: str) -> str:
-        exist_table_names = self.__dst_con.fetch_table_names()
+        exist_table_names = self.__schema_catalog.fetch_table_names()
 
         if table_name_base not in exist_table_names:
             return table_name_base
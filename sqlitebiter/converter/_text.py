@@ -4,7 +4,7 @@
 
 import sys
 from copy import deepcopy
-from typing import Any, Optional
+from typing import IO, Any, Optional
 
 import msgfy
 import pytablereader as ptr
@@ -12,10 +12,13 @@ import simplesqlite as sqlite
 from pytablereader.interface import AbstractTableReader
 
 from .._const import IPYNB_FORMAT_NAME_LIST, TABLE_NOT_FOUND_MSG_FORMAT, ExitCode
+from .._stats import Stage
 from .._types import TypeHintRules
 from ._base import SourceInfo, TableConverter
-from ._common import TYPE_HINT_FROM_HEADER_RULES
+from ._chunked_loader import CHUNKABLE_FORMAT_NAMES, create_chunked_loader
+from ._common import is_target_path
 from ._ipynb_converter import load_ipynb_text
+from ._json_loader import NestedJsonError, load_tables
 
 
 def create_text_loader(
@@ -38,21 +41,71 @@ def create_text_loader(
 
 
 class TextConverter(TableConverter):
-    def __get_source_info_base(self, text: str) -> SourceInfo:
+    SOURCE_NAME = "stdin"
+
+    def __get_source_info_base(self, size: Optional[int]) -> SourceInfo:
         return SourceInfo(
-            base_name="stdin",
-            size=len(text),
+            base_name=self.SOURCE_NAME,
+            size=size,
             source_id=self._fetch_next_source_id(),
         )
 
     def convert(self, text: str) -> None:
+        with self._measure_source(self.SOURCE_NAME, len(text)):
+            self.__convert(text)
+
+    def convert_stream(self, stream: IO[str], chunk_rows: Optional[int] = None) -> None:
+        # CSV/TSV/LDJSON streams are loaded chunk_rows rows at a time without reading
+        # the whole stream into memory. streams of the other formats are read at once.
+        format_name = self.__get_loader_format_name()
+        if not chunk_rows or format_name not in CHUNKABLE_FORMAT_NAMES:
+            self.convert(stream.read())
+            return
+
+        loader = create_chunked_loader(
+            stream,
+            format_name,
+            encoding=None,
+            chunk_rows=chunk_rows,
+            type_hint_rules=self.__get_type_hint_rules(),
+        )
+
+        result_counter = self._result_counter
+        success_count = result_counter.success_count
+        fail_count = result_counter.fail_count
+
+        with self._measure_source(self.SOURCE_NAME, None):
+            self._convert_chunks(loader, self.SOURCE_NAME, self.__get_source_info_base(None))
+
+        if result_counter.fail_count > fail_count:
+            return
+
+        if result_counter.success_count == success_count:
+            self._logger.warning(TABLE_NOT_FOUND_MSG_FORMAT.format(self.SOURCE_NAME))
+
+    def __get_type_hint_rules(self) -> TypeHintRules:
+        return self._extract_type_hint_rules(
+            lambda config: is_target_path(config, self.SOURCE_NAME)
+        )
+
+    def __get_loader_format_name(self) -> Optional[str]:
+        if self._format_name in IPYNB_FORMAT_NAME_LIST:
+            return None
+
+        try:
+            return ptr.TableTextLoader("", format_name=self._format_name).format_name
+        except ptr.LoaderNotFoundError:
+            return None
+
+    def __convert(self, text: str) -> None:
         logger = self._logger
         result_counter = self._result_counter
-        source_info_record_base = self.__get_source_info_base(text)
+        source_info_record_base = self.__get_source_info_base(len(text))
 
         if self._format_name in IPYNB_FORMAT_NAME_LIST:
             try:
-                nb, nb_size = load_ipynb_text(text)
+                with self._stats.measure(Stage.LOAD):
+                    nb = load_ipynb_text(text)
             except RuntimeError as e:
                 logger.error(e)
                 return
@@ -63,8 +116,7 @@ class TextConverter(TableConverter):
                 record = deepcopy(source_info_record_base)
                 record.format_name = "ipynb"
                 record.dst_table = table_name
-                record.size = nb_size
-                SourceInfo.insert(record)
+                self._insert_source_info(record)
 
             return
 
@@ -73,54 +125,57 @@ class TextConverter(TableConverter):
             text,
             self._format_name,
             self._encoding,
-            TYPE_HINT_FROM_HEADER_RULES if self._is_type_hint_header else None,
+            self.__get_type_hint_rules(),
         )
         source_info_record_base.format_name = loader.format_name
         success_count = result_counter.success_count
 
         try:
-            for table_data in loader.load():
+            for table_data in self._stats.iter_measure(Stage.LOAD, lambda: load_tables(loader)):
                 logger.debug(f"loaded table_data: {str(table_data)}")
 
                 sqlite_tabledata = self.normalize_table(table_data)
 
                 try:
-                    self._table_creator.create(
+                    dst_table_name = self._table_creator.create(
                         sqlite_tabledata, self._index_list, source_info=source_info_record_base
                     )
                 except sqlite.OperationalError as e:
                     logger.error(
-                        "{:s}: failed to convert: text={}, message={}".format(
-                            e.__class__.__name__, text, e.message
+                        "{:s}: failed to convert: source={}, message={}".format(
+                            e.__class__.__name__, self.SOURCE_NAME, e.message
                         )
                     )
                     result_counter.inc_fail()
                     continue
                 except ValueError as e:
-                    logger.debug(f"{e.__class__.__name__:s}: text={text}, message={str(e)}")
+                    logger.debug(
+                        f"{e.__class__.__name__:s}: source={self.SOURCE_NAME}, message={str(e)}"
+                    )
                     result_counter.inc_fail()
                     continue
 
                 record = deepcopy(source_info_record_base)
-                record.dst_table = sqlite_tabledata.table_name
-                SourceInfo.insert(record)
+                record.dst_table = dst_table_name
+                self._insert_source_info(record)
+        except NestedJsonError as e:
+            for table_name in self._convert_complex_json(e.json_data, source_info_record_base):
+                record = deepcopy(source_info_record_base)
+                record.dst_table = table_name
+                self._insert_source_info(record)
         except ptr.ValidationError as e:
-            if loader.format_name == "json":
-                for table_name in self._convert_complex_json(
-                    loader.loader, source_info_record_base
-                ):
-                    record = deepcopy(source_info_record_base)
-                    record.dst_table = table_name
-                    SourceInfo.insert(record)
-            else:
-                logger.error(f"{e.__class__.__name__:s}: text={text}, message={str(e)}")
-                result_counter.inc_fail()
+            logger.error(f"{e.__class__.__name__:s}: source={self.SOURCE_NAME}, message={str(e)}")
+            result_counter.inc_fail()
         except ptr.DataError as e:
-            logger.error(f"{e.__class__.__name__:s}: invalid data: text={text}, message={str(e)}")
+            logger.error(
+                "{:s}: invalid data: source={}, message={}".format(
+                    e.__class__.__name__, self.SOURCE_NAME, str(e)
+                )
+            )
             result_counter.inc_fail()
         except OverflowError as e:
-            logger.error(f"{text}: {e}")
+            logger.error(f"{self.SOURCE_NAME}: {e}")
             result_counter.inc_fail()
 
         if result_counter.success_count == success_count:
-            logger.warning(TABLE_NOT_FOUND_MSG_FORMAT.format(text))
+            logger.warning(TABLE_NOT_FOUND_MSG_FORMAT.format(self.SOURCE_NAME))
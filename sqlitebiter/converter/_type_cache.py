@@ -0,0 +1,106 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+
+TypeCacheMap = Mapping[str, List[str]]
+
+_TYPE_NAMES = ("INTEGER", "REAL", "TEXT")
+
+
+def make_type_cache_key(table_name: str, headers: Sequence[str]) -> str:
+    return hashlib.sha256(
+        json.dumps([table_name, list(headers)], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+def get_cached_types(
+    type_cache: Optional[TypeCacheMap], table_name: str, headers: Sequence[str]
+) -> Optional[List[str]]:
+    if not type_cache:
+        return None
+
+    type_names = type_cache.get(make_type_cache_key(table_name, headers))
+    if type_names is None or len(type_names) != len(headers):
+        return None
+
+    if any([type_name not in _TYPE_NAMES for type_name in type_names]):
+        return None
+
+    return type_names
+
+
+class TypeCache:
+    """
+    Column types of converted tables that are persisted to a JSON file.
+    Types are keyed by fingerprints of table names and headers, and are used instead of
+    type inference when the same table is converted again.
+    """
+
+    VERSION = 1
+
+    @property
+    def types(self) -> Dict[str, List[str]]:
+        return self.__types
+
+    def __init__(self, logger: Any, file_path: str) -> None:
+        self.__logger = logger
+        self.__file_path = file_path
+        self.__types: Dict[str, List[str]] = {}
+        self.__is_modified = False
+
+        self.__load()
+
+    def update(self, table_name: str, headers: Sequence[str], type_names: List[str]) -> None:
+        key = make_type_cache_key(table_name, headers)
+        cached_type_names = self.__types.get(key)
+
+        if cached_type_names == type_names:
+            return
+
+        if cached_type_names is not None:
+            # values that did not fit the cached types widened the columns
+            self.__logger.debug(
+                "update type cache: table={}, types={} -> {}".format(
+                    table_name, cached_type_names, type_names
+                )
+            )
+
+        self.__types[key] = type_names
+        self.__is_modified = True
+
+    def save(self) -> None:
+        if not self.__is_modified:
+            return
+
+        # written to a temporary file and then renamed not to break the cache at
+        # interruptions
+        tmp_file_path = f"{self.__file_path}.tmp"
+        with open(tmp_file_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "types": self.__types}, f)
+        os.replace(tmp_file_path, self.__file_path)
+
+        self.__is_modified = False
+        self.__logger.debug(f"write type cache to '{self.__file_path}'")
+
+    def __load(self) -> None:
+        if not os.path.isfile(self.__file_path):
+            return
+
+        try:
+            with open(self.__file_path, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError) as e:
+            self.__logger.warning(f"failed to load type cache: path={self.__file_path}, {e}")
+            return
+
+        if not isinstance(cache, dict) or cache.get("version") != self.VERSION:
+            self.__logger.debug(f"discard type cache of another version: {self.__file_path}")
+            return
+
+        self.__types = cache.get("types", {})
@@ -4,7 +4,6 @@
 
 import errno
 import os
-import re
 import sys
 from copy import deepcopy
 from typing import Any, Dict, Optional, Sequence
@@ -18,10 +17,12 @@ from pytablereader.interface import AbstractTableReader
 from simplesqlite import SimpleSQLite
 
 from .._const import IPYNB_FORMAT_NAME_LIST, TABLE_NOT_FOUND_MSG_FORMAT, ExitCode
+from .._stats import Stage
 from .._types import ConvertConfig, TypeHintRules
 from ._base import SourceInfo, TableConverter
-from ._common import TYPE_HINT_FROM_HEADER_RULES, normalize_type_hint
 from ._ipynb_converter import is_ipynb_url, load_ipynb_url
+from ._json_loader import NestedJsonError, load_tables
+from ._table_creator import TypeInferenceSample
 
 
 def create_url_loader(
@@ -65,6 +66,9 @@ class UrlConverter(TableConverter):
         format_name: str,
         encoding: str,
         proxy: Optional[str],
+        infer_sample: Optional[TypeInferenceSample] = None,
+        type_cache_path: Optional[str] = None,
+        ipynb_image_storage: str = "inline",
     ) -> None:
         super().__init__(
             logger,
@@ -80,11 +84,18 @@ class UrlConverter(TableConverter):
             max_workers=max_workers,
             format_name=format_name,
             encoding=encoding,
+            infer_sample=infer_sample,
+            type_cache_path=type_cache_path,
+            ipynb_image_storage=ipynb_image_storage,
         )
 
         self.__proxy = proxy
 
     def convert(self, url: str) -> None:
+        with self._measure_source(url, None):
+            self.__convert(url)
+
+    def __convert(self, url: str) -> None:
         logger = self._logger
         result_counter = self._result_counter
 
@@ -92,7 +103,8 @@ class UrlConverter(TableConverter):
 
         if self._format_name in IPYNB_FORMAT_NAME_LIST or is_ipynb_url(url):
             try:
-                nb, nb_size = load_ipynb_url(url, proxies=self.__get_proxies())
+                with self._stats.measure(Stage.LOAD):
+                    nb, nb_size = load_ipynb_url(url, proxies=self.__get_proxies())
             except RuntimeError as e:
                 logger.error(e)
                 return
@@ -104,7 +116,7 @@ class UrlConverter(TableConverter):
                 record.format_name = "ipynb"
                 record.dst_table = table_name
                 record.size = nb_size
-                SourceInfo.insert(record)
+                self._insert_source_info(record)
 
             return
 
@@ -113,13 +125,13 @@ class UrlConverter(TableConverter):
         success_count = result_counter.success_count
 
         try:
-            for table_data in loader.load():
+            for table_data in self._stats.iter_measure(Stage.LOAD, lambda: load_tables(loader)):
                 logger.debug(f"loaded table_data: {str(table_data)}")
 
                 sqlite_tabledata = self.normalize_table(table_data)
 
                 try:
-                    self._table_creator.create(
+                    dst_table_name = self._table_creator.create(
                         sqlite_tabledata, self._index_list, source_info=source_info_record_base
                     )
                 except sqlite.OperationalError as e:
@@ -136,19 +148,16 @@ class UrlConverter(TableConverter):
                     continue
 
                 record = deepcopy(source_info_record_base)
-                record.dst_table = sqlite_tabledata.table_name
-                SourceInfo.insert(record)
+                record.dst_table = dst_table_name
+                self._insert_source_info(record)
+        except NestedJsonError as e:
+            for table_name in self._convert_complex_json(e.json_data, source_info_record_base):
+                record = deepcopy(source_info_record_base)
+                record.dst_table = table_name
+                self._insert_source_info(record)
         except ptr.ValidationError as e:
-            if loader.format_name == "json":
-                for table_name in self._convert_complex_json(
-                    loader.loader, source_info_record_base
-                ):
-                    record = deepcopy(source_info_record_base)
-                    record.dst_table = table_name
-                    SourceInfo.insert(record)
-            else:
-                logger.error(f"{e.__class__.__name__:s}: url={url}, message={str(e)}")
-                result_counter.inc_fail()
+            logger.error(f"{e.__class__.__name__:s}: url={url}, message={str(e)}")
+            result_counter.inc_fail()
         except ptr.DataError as e:
             logger.error(f"{e.__class__.__name__:s}: invalid data: url={url}, message={str(e)}")
             result_counter.inc_fail()
@@ -181,28 +190,9 @@ class UrlConverter(TableConverter):
             sys.exit(ExitCode.FAILED_LOADER_NOT_FOUND)
 
     def __extract_type_hint_rules(self, url: str) -> TypeHintRules:
-        if self._is_type_hint_header:
-            return TYPE_HINT_FROM_HEADER_RULES
-
-        type_hint_rules = {}
-
-        for config in self._convert_configs:
-            if not isinstance(config, dict):
-                self._logger.debug(f"unexpected config value: {config}")
-                continue
-
-            if config.get("target_url") not in url:  # type: ignore
-                continue
-
-            for pattern, params in config["rules"].items():
-                if not params.get("type hint"):
-                    continue
-
-                type_hint_rules[re.compile(pattern, re.IGNORECASE)] = normalize_type_hint(
-                    params["type hint"]
-                )
-
-        return type_hint_rules
+        return self._extract_type_hint_rules(
+            lambda config: config.get("target_url") in url  # type: ignore
+        )
 
     def __parse_source_info_url(self, url: str) -> SourceInfo:
         result = urlparse(url)
@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+
+from path import Path
+
+
+ROOT_DIR = Path(__file__).parent.parent
+BENCHMARK_SCRIPT = ROOT_DIR.joinpath("scripts", "benchmark.py")
+
+
+class Test_benchmark:
+    def test_smoke(self, tmpdir):
+        output_path = str(tmpdir.join("benchmark_results.json"))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [ROOT_DIR] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+        )
+
+        proc = subprocess.run(
+            [
+                sys.executable,
+                BENCHMARK_SCRIPT,
+                "--rows",
+                "10",
+                "--cols",
+                "4",
+                "--formats",
+                "csv",
+                "json",
+                "--converters",
+                "file",
+                "text",
+                "dict",
+                "-o",
+                output_path,
+            ],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        print(proc.stderr)
+
+        assert proc.returncode == 0
+
+        with open(output_path) as f:
+            results = json.load(f)["results"]
+
+        assert len(results) == 5
+        assert all(result["success"] > 0 and result["records"] > 0 for result in results)
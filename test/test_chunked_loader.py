@@ -0,0 +1,90 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+import threading
+import time
+
+from sqlitebiter.converter._chunked_loader import create_chunked_loader
+
+
+def append_lines(file_path, lines, interval):
+    for line in lines:
+        time.sleep(interval)
+
+        with open(file_path, "a") as f:
+            f.write(line)
+
+
+class Test_ChunkedTableFileLoader:
+    def test_normal_ltsv(self, tmpdir):
+        file_path = str(tmpdir.join("a.ltsv"))
+        with open(file_path, "w") as f:
+            f.write("time:1\tmsg:a:b\n\ntime:2\tmsg:c\n")
+
+        loader = create_chunked_loader(
+            file_path, "ltsv", encoding=None, chunk_rows=1, type_hint_rules=None
+        )
+        tables = list(loader.load())
+
+        assert [table.headers for table in tables] == [["time", "msg"], ["time", "msg"]]
+        assert [table.rows for table in tables] == [
+            [{"time": "1", "msg": "a:b"}],
+            [{"time": "2", "msg": "c"}],
+        ]
+
+    def test_normal_jsonlines_new_keys(self, tmpdir):
+        file_path = str(tmpdir.join("a.jsonl"))
+        with open(file_path, "w") as f:
+            f.write('{"a": 1}\n{"a": 2, "b": "x"}\n{"c": 3}\n')
+
+        loader = create_chunked_loader(
+            file_path, "json_lines", encoding=None, chunk_rows=1, type_hint_rules=None
+        )
+        tables = list(loader.load())
+
+        assert [table.headers for table in tables] == [["a"], ["a", "b"], ["a", "b", "c"]]
+
+    def test_normal_jsonlines_key_order(self, tmpdir):
+        file_path = str(tmpdir.join("a.jsonl"))
+        with open(file_path, "w") as f:
+            f.write('{"b": 1, "a": 2}\n{"c": 3, "a": 4, "b": 5}\n{"a": 6, "d": 7}\n')
+
+        loader = create_chunked_loader(
+            file_path, "json_lines", encoding=None, chunk_rows=2, type_hint_rules=None
+        )
+        tables = list(loader.load())
+
+        assert [table.headers for table in tables] == [["b", "a", "c"], ["b", "a", "c", "d"]]
+
+    def test_normal_follow(self, tmpdir):
+        file_path = str(tmpdir.join("a.csv"))
+        with open(file_path, "w") as f:
+            f.write("a,b\n1,x\n")
+
+        writer = threading.Thread(
+            target=append_lines, args=(file_path, ["2,y\n3,", "z\n", "4,w\n"], 0.2)
+        )
+        writer.start()
+
+        loader = create_chunked_loader(
+            file_path,
+            "csv",
+            encoding=None,
+            chunk_rows=100,
+            type_hint_rules=None,
+            flush_interval=0.1,
+        )
+        tables = loader.load()
+        rows = []
+
+        # rows are yielded at the flush interval without waiting for chunk_rows rows
+        while len(rows) < 4:
+            table = next(tables)
+            assert table.headers == ["a", "b"]
+            rows.extend(table.rows)
+
+        tables.close()
+        writer.join()
+
+        assert rows == [["1", "x"], ["2", "y"], ["3", "z"], ["4", "w"]]
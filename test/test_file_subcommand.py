@@ -2,7 +2,10 @@
 .. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
 """
 
+import json
 import os
+import tarfile
+import zipfile
 from textwrap import dedent
 
 import path
@@ -15,6 +18,7 @@ from sqliteschema import SQLiteSchemaExtractor
 from sqlitebiter.__main__ import cmd
 from sqlitebiter._const import ExitCode
 from sqlitebiter.converter._base import SourceInfo
+from sqlitebiter.converter._table_creator import TableCreator
 
 from .common import print_test_result, print_traceback
 from .dataset import *
@@ -494,6 +498,56 @@ class Test_sqlitebiter_file:
 
                 assert expected_data == actual_data, message
 
+    def test_normal_multi_file_same_table_same_structure_index(self):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            files = [valid_json_multi_file_2_1(), valid_json_multi_file_2_2()]
+
+            for file_path in files:
+                result = runner.invoke(
+                    cmd, ["-o", db_path, "--append", "--index", "attr_a", "file", file_path]
+                )
+                print_traceback(result)
+                assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            expected_tables = ["multij2", SourceInfo.get_table_name()]
+            actual_tables = con.fetch_table_names()
+
+            print_test_result(expected=expected_tables, actual=actual_tables)
+
+            assert set(actual_tables) == set(expected_tables)
+            assert con.fetch_num_records("multij2") == 6
+
+    @pytest.mark.parametrize(["options"], [[[]], [["--chunk-rows", "1"]]])
+    def test_normal_multi_file_same_table_deferred_index(self, options):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            os.mkdir("b")
+            files = [
+                path.Path(valid_csv_file_1_1()).move("b"),
+                valid_csv_file_1_1(),
+                valid_csv_file_3_1(),
+            ]
+
+            result = runner.invoke(
+                cmd, ["-o", db_path, "--index", "attr_a,aa", "file"] + options + files
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert con.fetch_num_records("csv_a") == 6
+
+            result = con.execute_query(
+                "SELECT tbl_name FROM sqlite_master WHERE type='index' ORDER BY tbl_name"
+            )
+            assert result.fetchall() == [("csv_a",), ("valid_csv_3_1",)]
+
     def test_normal_multi_file_same_table_different_structure(self):
         db_path = "test.sqlite"
         runner = CliRunner()
@@ -561,6 +615,60 @@ class Test_sqlitebiter_file:
 
             assert set(con.fetch_table_names()) == expected
 
+    def test_normal_nested_json(self):
+        db_path = "test_nested_json.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            file_path = "nested.json"
+            with open(file_path, "w") as f:
+                f.write(
+                    json.dumps(
+                        [
+                            {"id": 1, "tags": [{"t": "a"}], "a": {"b": {"c": [{"x": 1}]}, "d": [1]}},
+                            {"id": 2, "tags": [{"t": "b"}, {"t": "c"}], "e": [[{"y": 2}]]},
+                            3,
+                            {"id": 3, "a": {"b": {"c": [{"x": 2}]}, "d": [2]}},
+                        ]
+                    )
+                )
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", file_path])
+            print_traceback(result)
+
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            expected = {
+                "tags": [("a",), ("b",), ("c",)],
+                "a_b_c": [(1,), (2,)],
+                "e": [(2,)],
+                "root": [("id", 1), ("id", 2), ("id", 3)],
+            }
+
+            assert set(con.fetch_table_names()) == set(expected) | {SourceInfo.get_table_name()}
+            for table_name, expected_records in expected.items():
+                assert con.select("*", table_name=table_name).fetchall() == expected_records
+
+    def test_normal_nested_json_object_values(self):
+        db_path = "test_nested_json.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            file_path = "nested.json"
+            with open(file_path, "w") as f:
+                json.dump({"k": {"a": {"b": 1}}, "s": 1}, f)
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", file_path])
+            print_traceback(result)
+
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert set(con.fetch_table_names()) == {SourceInfo.get_table_name(), "k_a", "root"}
+            assert con.select("*", table_name="k_a").fetchall() == [("b", 1)]
+            assert con.select("*", table_name="root").fetchall() == [("s", 1)]
+
     def test_normal_not_exit_file(self):
         runner = CliRunner()
 
@@ -633,6 +741,13 @@ class Test_sqlitebiter_file:
             assert tbldata.headers == ["id", "a", "b"]
             assert tbldata.rows == [(1, 11, "xyz"), (2, 22, "abc")]
 
+            # an INTEGER PRIMARY KEY column without AUTOINCREMENT (no sqlite_sequence table)
+            assert con.fetch_table_names() == [SourceInfo.get_table_name(), basename]
+            sql = con.connection.execute(
+                "SELECT sql FROM sqlite_master WHERE name = ?", (basename,)
+            ).fetchone()[0]
+            assert "(id INTEGER PRIMARY KEY, a INTEGER, b TEXT)" in sql
+
     def test_normal_no_type_inference(self):
         runner = CliRunner()
         basename = "no_type_inference"
@@ -664,6 +779,880 @@ class Test_sqlitebiter_file:
                 ("22", "abc"),
             ]
 
+    @pytest.mark.parametrize(
+        ["file_creator", "table_name", "chunk_rows"],
+        [
+            [valid_csv_file_1_1, "csv_a", 1],
+            [valid_csv_file_1_1, "csv_a", 100],
+            [valid_tsv_file, "tsv_a", 1],
+            [valid_jsonlines_file, "valid_jsonlines", 1],
+            [valid_jsonlines_file, "valid_jsonlines", 100],
+        ],
+    )
+    def test_normal_chunk_rows(self, file_creator, table_name, chunk_rows):
+        db_path = "test.sqlite"
+        chunk_db_path = "test_chunk.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            file_path = file_creator()
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", file_path])
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            result = runner.invoke(
+                cmd, ["-o", chunk_db_path, "file", file_path, "--chunk-rows", str(chunk_rows)]
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            chunk_con = SimpleSQLite(chunk_db_path, "r")
+            expected = con.select("*", table_name=table_name).fetchall()
+            actual = chunk_con.select("*", table_name=table_name).fetchall()
+
+            print_test_result(expected=expected, actual=actual)
+            assert actual == expected
+
+    def test_normal_follow_source_info(self, monkeypatch):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+        source_info_counts = []
+
+        def interrupt(self, table_name, table_records):
+            # the source info of a followed file is written while the file is followed
+            con = SimpleSQLite(db_path, "r")
+            source_info_counts.append(con.fetch_num_records(SourceInfo.get_table_name()))
+            con.close()
+
+            raise KeyboardInterrupt()
+
+        monkeypatch.setattr(TableCreator, "append_records", interrupt)
+
+        with runner.isolated_filesystem():
+            file_path = "followed.csv"
+            with open(file_path, "w") as f:
+                f.write("a,b\n1,x\n2,y\n")
+
+            result = runner.invoke(
+                cmd, ["-o", db_path, "file", file_path, "--follow", "--chunk-rows", "1"]
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+        assert source_info_counts == [1]
+
+    def test_normal_chunk_rows_new_keys(self):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            file_path = "new_keys.jsonl"
+            with open(file_path, "w") as f:
+                f.write('{"a": 1}\n{"a": 2, "b": "x"}\n{"c": 3}\n')
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", file_path, "--chunk-rows", "1"])
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert con.fetch_attr_names("new_keys") == ["a", "b", "c"]
+            assert con.select("*", table_name="new_keys").fetchall() == [
+                (1, None, None),
+                (2, "x", None),
+                (None, None, 3),
+            ]
+
+    @pytest.mark.parametrize(
+        ["file_creator", "table_name", "options"],
+        [
+            [valid_csv_file_1_1, "csv_a", ["--infer-sample-rows", "1"]],
+            [valid_csv_file_2_1, "rename_insert", ["--infer-sample-rows", "1"]],
+            [
+                valid_csv_file_1_1,
+                "csv_a",
+                ["--infer-sample-rows", "2", "--infer-sample-method", "reservoir"],
+            ],
+            [valid_jsonlines_file, "valid_jsonlines", ["--infer-sample-rows", "1"]],
+            [valid_csv_file_1_1, "csv_a", ["--infer-sample-rows", "100"]],
+        ],
+    )
+    def test_normal_infer_sample_rows(self, file_creator, table_name, options):
+        db_path = "test.sqlite"
+        sample_db_path = "test_sample.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            file_path = file_creator()
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", file_path])
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            result = runner.invoke(cmd, options + ["-o", sample_db_path, "file", file_path])
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            sample_con = SimpleSQLite(sample_db_path, "r")
+            assert sample_con.fetch_attr_type(table_name) == con.fetch_attr_type(table_name)
+
+            expected = con.select("*", table_name=table_name).fetchall()
+            actual = sample_con.select("*", table_name=table_name).fetchall()
+
+            print_test_result(expected=expected, actual=actual)
+            assert actual == expected
+
+    def test_normal_type_cache(self):
+        db_path = "test.sqlite"
+        cache_path = "types.json"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            file_path = valid_csv_file_1_1()
+
+            for _ in range(2):
+                result = runner.invoke(
+                    cmd, ["--type-cache", cache_path, "-o", db_path, "file", file_path]
+                )
+                print_traceback(result)
+                assert result.exit_code == ExitCode.SUCCESS
+
+                con = SimpleSQLite(db_path, "r")
+                assert list(con.fetch_attr_type("csv_a").values()) == ["INTEGER", "REAL", "TEXT"]
+                assert con.select("*", table_name="csv_a").fetchall() == [
+                    (1, 4.0, "a"),
+                    (2, 2.1, "bb"),
+                    (3, 120.9, "ccc"),
+                ]
+                con.close()
+
+            # values that do not fit the cached types widen the columns
+            valid_csv_file_1_2()
+
+            result = runner.invoke(
+                cmd, ["--type-cache", cache_path, "-o", db_path, "file", file_path]
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            # cached types are not narrowed
+            assert list(con.fetch_attr_type("csv_a").values()) == ["REAL", "REAL", "TEXT"]
+
+            with open(cache_path) as f:
+                assert list(json.load(f)["types"].values()) == [["REAL", "REAL", "TEXT"]]
+
+    @pytest.mark.parametrize(["options"], [[[]], [["--chunk-rows", "1"]]])
+    def test_normal_convert_config(self, options):
+        db_path = "test.sqlite"
+        config_path = "config.json"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            file_path = valid_csv_file_1_1()
+
+            with open(config_path, "w") as f:
+                json.dump(
+                    {
+                        "file": [
+                            {
+                                "target_path": "*.csv",
+                                "rules": {
+                                    "^attr_a$": {"type hint": "text"},
+                                    "^attr_b$": {"type hint": "real"},
+                                    "^attr_c$": {"type hint": "text"},
+                                },
+                            },
+                            {
+                                "target_path": "*.tsv",
+                                "rules": {"^attr_c$": {"type hint": "integer"}},
+                            },
+                        ]
+                    },
+                    f,
+                )
+
+            result = runner.invoke(
+                cmd, ["--convert-config", config_path, "-o", db_path, "file", file_path] + options
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert list(con.fetch_attr_type("csv_a").values()) == ["TEXT", "REAL", "TEXT"]
+            assert con.select("*", table_name="csv_a").fetchall() == [
+                ("1", 4.0, "a"),
+                ("2", 2.1, "bb"),
+                ("3", 120.9, "ccc"),
+            ]
+
+    @pytest.mark.parametrize(
+        ["file_creator", "compression", "ext", "options"],
+        [
+            [valid_csv_file_1_1, "gzip", ".gz", []],
+            [valid_csv_file_1_1, "gzip", ".gz", ["--chunk-rows", "1"]],
+            [valid_csv_file_1_1, "gzip", ".gz", ["--jobs", "2"]],
+            [valid_csv_file_1_1, "gzip", None, ["--format", "csv"]],
+            [valid_tsv_file, "bz2", ".bz2", []],
+            [valid_ltsv_file, "lzma", ".xz", ["--chunk-rows", "1"]],
+            [valid_jsonlines_file, "zstandard", ".zst", []],
+            [valid_jsonlines_file, "zstandard", ".zst", ["--chunk-rows", "2"]],
+            [valid_json_single_file, "gzip", ".gz", []],
+            [valid_json_single_file, "gzip", ".gz", ["--jobs", "2"]],
+            [valid_json_multi_file_1, "gzip", ".gz", []],
+            [valid_markdown_file, "bz2", ".bz2", []],
+        ],
+    )
+    def test_normal_compressed(self, file_creator, compression, ext, options):
+        module = pytest.importorskip(compression)
+        db_path = "test.sqlite"
+        compressed_db_path = "test_compressed.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            file_path = file_creator()
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", file_path])
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            AbstractTableReader.clear_table_count()
+
+            with open(file_path, "rb") as f:
+                data = f.read()
+
+            # files without extensions are detected by the magic numbers
+            if ext is None:
+                compressed_file_path = os.path.splitext(file_path)[0]
+            else:
+                compressed_file_path = file_path + ext
+            with open(compressed_file_path, "wb") as f:
+                if compression == "zstandard":
+                    f.write(module.ZstdCompressor().compress(data))
+                else:
+                    f.write(module.compress(data))
+
+            result = runner.invoke(
+                cmd, ["-o", compressed_db_path, "file", compressed_file_path] + options
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            compressed_con = SimpleSQLite(compressed_db_path, "r")
+
+            assert compressed_con.fetch_table_names() == con.fetch_table_names()
+
+            for table in con.fetch_table_names():
+                if table == SourceInfo.get_table_name():
+                    continue
+
+                expected = con.select("*", table_name=table).fetchall()
+                actual = compressed_con.select("*", table_name=table).fetchall()
+
+                print_test_result(expected=expected, actual=actual)
+                assert actual == expected, table
+
+    def test_normal_compression_magic_number_like_text(self):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            # files with extensions of uncompressed formats are not detected by magic numbers
+            file_path = "bz.csv"
+            with open(file_path, "w") as f:
+                f.write("BZh,val\n1,2\n")
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", file_path])
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            assert SimpleSQLite(db_path, "r").select("*", table_name="bz").fetchall() == [(1, 2)]
+
+    def test_abnormal_compressed(self):
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            file_path = valid_csv_file_1_1() + ".gz"
+            with open(file_path, "wb") as f:
+                f.write(b"\x1f\x8b\x08\x00")
+
+            result = runner.invoke(cmd, ["-o", "test.sqlite", "file", file_path])
+            print_traceback(result)
+            assert result.exit_code == ExitCode.FAILED_CONVERT
+
+    @pytest.mark.parametrize(
+        ["archive_name", "options"],
+        [
+            ["bundle.zip", []],
+            ["bundle.zip", ["--jobs", "2"]],
+            ["bundle.zip", ["--chunk-rows", "1"]],
+            ["bundle.tar.gz", []],
+            ["bundle.tar.gz", ["--jobs", "2"]],
+            ["bundle.tar", ["--chunk-rows", "1"]],
+        ],
+    )
+    def test_normal_archive(self, archive_name, options):
+        db_path = "test.sqlite"
+        archive_db_path = "test_archive.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            files = [valid_csv_file_1_1(), valid_tsv_file(), valid_jsonlines_file()]
+
+            result = runner.invoke(cmd, ["-o", db_path, "file"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            if archive_name.endswith(".zip"):
+                with zipfile.ZipFile(archive_name, "w") as archive:
+                    for file_path in files:
+                        archive.write(file_path, f"data/{file_path}")
+            else:
+                mode = "w:gz" if archive_name.endswith(".gz") else "w"
+                with tarfile.open(archive_name, mode) as archive:
+                    for file_path in files:
+                        archive.add(file_path, f"data/{file_path}")
+
+            result = runner.invoke(cmd, ["-o", archive_db_path, "file", archive_name] + options)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            archive_con = SimpleSQLite(archive_db_path, "r")
+
+            assert archive_con.fetch_table_names() == con.fetch_table_names()
+
+            for table in con.fetch_table_names():
+                if table == SourceInfo.get_table_name():
+                    continue
+
+                expected = con.select("*", table_name=table).fetchall()
+                actual = archive_con.select("*", table_name=table).fetchall()
+
+                print_test_result(expected=expected, actual=actual)
+                assert actual == expected, table
+
+            SourceInfo.attach(archive_con)
+            assert [
+                (os.path.basename(record.dir_name), record.base_name, record.dst_table)
+                for record in SourceInfo.select()
+            ] == [
+                (archive_name, "data/csv_a.csv", "csv_a"),
+                (archive_name, "data/tsv_a.tsv", "tsv_a"),
+                (archive_name, "data/valid_jsonlines.ldjson", "valid_jsonlines"),
+            ]
+
+    def test_normal_archive_pattern(self):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            with zipfile.ZipFile("bundle.zip", "w") as archive:
+                for file_path in [valid_csv_file_1_1(), valid_csv_file_2_1(), valid_tsv_file()]:
+                    archive.write(file_path)
+                archive.writestr("README.txt", "not a table")
+
+            result = runner.invoke(
+                cmd,
+                ["-o", db_path, "file", "bundle.zip", "--pattern", "*.csv", "--exclude", "insert*"],
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            assert set(SimpleSQLite(db_path, "r").fetch_table_names()) == {
+                "csv_a",
+                SourceInfo.get_table_name(),
+            }
+
+    def test_normal_archive_pattern_recursive(self):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            os.mkdir("dir")
+            with zipfile.ZipFile(os.path.join("dir", "bundle.zip"), "w") as archive:
+                for file_path in [valid_csv_file_1_1(), valid_tsv_file()]:
+                    archive.write(file_path)
+                    os.remove(file_path)
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", "dir", "-r", "--pattern", "*.csv"])
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            assert set(SimpleSQLite(db_path, "r").fetch_table_names()) == {
+                "csv_a",
+                SourceInfo.get_table_name(),
+            }
+
+    @pytest.mark.parametrize(["options"], [[[]], [["--jobs", "2"]]])
+    def test_normal_archive_json_table_name(self, options):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            with zipfile.ZipFile("bundle.zip", "w") as archive:
+                archive.writestr("q.json", '[{"a": 1}]')
+                archive.writestr("r.json", '{"b": [1, 2]}')
+                archive.writestr("s.json", '{"t1": [{"a": 1}], "t2": [{"b": 2}]}')
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", "bundle.zip"] + options)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            # JSON members are named after the members as JSON files are
+            assert set(SimpleSQLite(db_path, "r").fetch_table_names()) == {
+                "q",
+                "r",
+                "t1",
+                "t2",
+                SourceInfo.get_table_name(),
+            }
+
+    def test_abnormal_archive(self):
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            with open("broken.zip", "w") as f:
+                f.write("not a zip file")
+
+            result = runner.invoke(cmd, ["-o", "test.sqlite", "file", "broken.zip"])
+            print_traceback(result)
+            assert result.exit_code == ExitCode.FAILED_CONVERT
+
+    def test_normal_jobs(self):
+        db_path = "test.sqlite"
+        jobs_db_path = "test_jobs.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            files = [
+                valid_json_single_file(),
+                valid_json_multi_file_1(),
+                valid_csv_file_1_1(),
+                valid_csv_file_2_1(),
+                invalid_csv_file(),
+                valid_tsv_file(),
+                valid_excel_file(),
+                valid_html_file(),
+                valid_ltsv_file(),
+                valid_markdown_file(),
+                not_supported_format_file(),
+            ]
+
+            result = runner.invoke(cmd, ["-o", db_path, "file"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            AbstractTableReader.clear_table_count()
+
+            result = runner.invoke(cmd, ["-o", jobs_db_path, "file", "--jobs", "2"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            jobs_con = SimpleSQLite(jobs_db_path, "r")
+
+            assert jobs_con.fetch_table_names() == con.fetch_table_names()
+
+            for table in con.fetch_table_names():
+                expected = con.select("*", table_name=table).fetchall()
+                actual = jobs_con.select("*", table_name=table).fetchall()
+
+                print_test_result(expected=expected, actual=actual)
+                assert actual == expected, table
+
+    def test_normal_jobs_table_count(self):
+        db_path = "test.sqlite"
+        jobs_db_path = "test_jobs.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            files = []
+            for i in range(1, 4):
+                file_path = f"h{i}.html"
+                with open(file_path, "w") as f:
+                    f.write(f"<table><tr><th>a</th></tr><tr><td>{i}</td></tr></table>")
+                files.append(file_path)
+
+                file_path = f"m{i}.md"
+                with open(file_path, "w") as f:
+                    f.write(f"| b |\n|---|\n| {i} |\n")
+                files.append(file_path)
+
+            result = runner.invoke(cmd, ["-o", db_path, "file"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            AbstractTableReader.clear_table_count()
+
+            result = runner.invoke(cmd, ["-o", jobs_db_path, "file", "--jobs", "3"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            jobs_con = SimpleSQLite(jobs_db_path, "r")
+
+            assert con.fetch_table_names() == [
+                SourceInfo.get_table_name(),
+                "html1",
+                "m1_markdown1",
+                "html2",
+                "m2_markdown2",
+                "html3",
+                "m3_markdown3",
+            ]
+            assert jobs_con.fetch_table_names() == con.fetch_table_names()
+
+            for table in con.fetch_table_names():
+                expected = con.select("*", table_name=table).fetchall()
+                actual = jobs_con.select("*", table_name=table).fetchall()
+
+                print_test_result(expected=expected, actual=actual)
+                assert actual == expected, table
+
+    def test_normal_jobs_byte_ranges(self, monkeypatch):
+        from sqlitebiter.converter import FileConverter
+
+        db_path = "test.sqlite"
+        jobs_db_path = "test_jobs.sqlite"
+        runner = CliRunner()
+
+        monkeypatch.setattr(FileConverter, "RANGE_BYTES", 64)
+
+        with runner.isolated_filesystem():
+            file_path = "ranges.csv"
+            with open(file_path, "w", encoding="utf-8", newline="") as f:
+                f.write('"id","text","value"\n')
+                for i in range(50):
+                    f.write('{},"line {}\nwith ""quotes""",{}.5\n'.format(i, i, i))
+
+            base_options = ["file", file_path, "--chunk-rows", "7"]
+
+            result = runner.invoke(cmd, ["-o", db_path] + base_options)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            result = runner.invoke(cmd, ["-o", jobs_db_path] + base_options + ["--jobs", "3"])
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            jobs_con = SimpleSQLite(jobs_db_path, "r")
+            expected = con.select("*", table_name="ranges").fetchall()
+            actual = jobs_con.select("*", table_name="ranges").fetchall()
+
+            print_test_result(expected=expected, actual=actual)
+            assert len(actual) == 50
+            assert actual == expected
+            assert jobs_con.fetch_value("COUNT(*)", SourceInfo.get_table_name()) == 1
+
+    def test_normal_incremental(self):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            files = [valid_csv_file_1_1(), valid_csv_file_2_1()]
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", "--incremental"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", "--incremental"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert con.fetch_value("MAX(source_id)", SourceInfo.get_table_name()) == 2
+            con.close()
+
+            mtime = os.path.getmtime(files[0])
+            valid_csv_file_1_2()
+            os.utime(files[0], (mtime + 10, mtime + 10))
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", "--incremental"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert con.fetch_value("MAX(source_id)", SourceInfo.get_table_name()) == 3
+            assert con.fetch_table_names() == [
+                SourceInfo.get_table_name(),
+                "rename_insert",
+                "csv_a",
+            ]
+            assert con.select("*", table_name="csv_a").fetchall() == [
+                (4, 1, "a"),
+                (2.1, 2, "bb"),
+                (120.9, 3, "ccc"),
+            ]
+            assert con.fetch_num_records(SourceInfo.get_table_name()) == 2
+
+    def test_normal_incremental_archive(self):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        def make_archive():
+            with zipfile.ZipFile("bundle.zip", "w") as archive:
+                for file_path in ["csv_a.csv", "tsv_a.tsv"]:
+                    archive.write(file_path)
+
+        with runner.isolated_filesystem():
+            # the tsv file is created once: rewriting the file may change the mtime of
+            # the member (zip archives store mtimes in two seconds resolution)
+            valid_tsv_file()
+            valid_csv_file_1_1()
+            make_archive()
+
+            for _ in range(2):
+                result = runner.invoke(cmd, ["-o", db_path, "file", "--incremental", "bundle.zip"])
+                print_traceback(result)
+                assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert con.fetch_value("MAX(source_id)", SourceInfo.get_table_name()) == 2
+            con.close()
+
+            mtime = os.path.getmtime("csv_a.csv")
+            valid_csv_file_1_2()
+            os.utime("csv_a.csv", (mtime + 10, mtime + 10))
+            make_archive()
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", "--incremental", "bundle.zip"])
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert con.fetch_value("MAX(source_id)", SourceInfo.get_table_name()) == 3
+            assert con.select("*", table_name="csv_a").fetchall() == [
+                (4, 1, "a"),
+                (2.1, 2, "bb"),
+                (120.9, 3, "ccc"),
+            ]
+            assert con.fetch_num_records("tsv_a") == 3
+
+    def test_normal_incremental_checksum(self):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            file_path = valid_csv_file_1_1()
+
+            result = runner.invoke(
+                cmd, ["-o", db_path, "file", "--incremental", "--checksum", file_path]
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            # rewrite contents without changing the size and the mtime
+            mtime = os.path.getmtime(file_path)
+            valid_csv_file_1_2()
+            os.utime(file_path, (mtime, mtime))
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", "--incremental", file_path])
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert con.select("*", table_name="csv_a").fetchall() == [
+                (1, 4, "a"),
+                (2, 2.1, "bb"),
+                (3, 120.9, "ccc"),
+            ]
+            con.close()
+
+            result = runner.invoke(
+                cmd, ["-o", db_path, "file", "--incremental", "--checksum", file_path]
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert con.select("*", table_name="csv_a").fetchall() == [
+                (4, 1, "a"),
+                (2.1, 2, "bb"),
+                (120.9, 3, "ccc"),
+            ]
+
+    def test_normal_incremental_shared_table(self):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            files = []
+            for dir_name in ("a", "b"):
+                os.mkdir(dir_name)
+                file_path = os.path.join(dir_name, "shared.csv")
+                with open(file_path, "w") as f:
+                    f.write(f"attr_a,attr_b\n1,{dir_name}\n")
+                files.append(file_path)
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", "--incremental"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            with open(files[0], "w") as f:
+                f.write("attr_a,attr_b\n1,a\n2,a\n")
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", "--incremental"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert con.select("*", table_name="shared").fetchall() == [
+                (1, "a"),
+                (2, "a"),
+                (1, "b"),
+            ]
+
+    def test_normal_incremental_renamed_table(self):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            os.mkdir("d")
+            files = ["t.csv", os.path.join("d", "t.csv")]
+            with open(files[0], "w") as f:
+                f.write("attr_a,attr_b\n1,a\n")
+            with open(files[1], "w") as f:
+                f.write("attr_c\nx\n")
+
+            result = runner.invoke(cmd, ["-o", db_path, "file", "--incremental"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert con.select(
+                "base_name, dst_table", table_name=SourceInfo.get_table_name()
+            ).fetchall() == [("t.csv", "t"), ("t.csv", "t_1")]
+            con.close()
+
+            mtime = os.path.getmtime(files[1])
+            with open(files[1], "w") as f:
+                f.write("attr_c\nx\ny\n")
+            os.utime(files[1], (mtime + 10, mtime + 10))
+
+            for _ in range(2):
+                result = runner.invoke(cmd, ["-o", db_path, "file", "--incremental"] + files)
+                print_traceback(result)
+                assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert set(con.fetch_table_names()) == {SourceInfo.get_table_name(), "t", "t_1"}
+            assert con.select("*", table_name="t").fetchall() == [(1, "a")]
+            assert con.select("*", table_name="t_1").fetchall() == [("x",), ("y",)]
+
+    def test_normal_bulk_load(self):
+        db_path = "test.sqlite"
+        bulk_db_path = "test_bulk.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            files = [
+                valid_json_multi_file_1(),
+                valid_csv_file_1_1(),
+                valid_csv_file_2_1(),
+                valid_excel_file(),
+            ]
+
+            result = runner.invoke(cmd, ["-o", db_path, "file"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            result = runner.invoke(cmd, ["--bulk-load", "-o", bulk_db_path, "file"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            result = runner.invoke(
+                cmd, ["--bulk-load", "-a", "-o", bulk_db_path, "file", valid_tsv_file()]
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            bulk_con = SimpleSQLite(bulk_db_path, "r")
+
+            assert bulk_con.execute_query("PRAGMA journal_mode").fetchone() == ("delete",)
+            assert bulk_con.fetch_table_names() == con.fetch_table_names() + ["tsv_a"]
+
+            for table in con.fetch_table_names():
+                if table == SourceInfo.get_table_name():
+                    continue
+
+                expected = con.select("*", table_name=table).fetchall()
+                actual = bulk_con.select("*", table_name=table).fetchall()
+
+                print_test_result(expected=expected, actual=actual)
+                assert actual == expected, table
+
+    def test_normal_source_id(self):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            files = [
+                valid_json_multi_file_1(),
+                invalid_csv_file(),
+                valid_csv_file_1_1(),
+            ]
+
+            result = runner.invoke(cmd, ["-o", db_path, "file"] + files)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            result = runner.invoke(cmd, ["-o", db_path, "-a", "file", valid_tsv_file()])
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            result = con.select(
+                "source_id,base_name,dst_table", table_name=SourceInfo.get_table_name()
+            )
+            assert result.fetchall() == [
+                (1, "multijson.json", "multij1"),
+                (1, "multijson.json", "multij2"),
+                (1, "multijson.json", "2018Asset"),
+                (2, "csv_a.csv", "csv_a"),
+                (3, "tsv_a.tsv", "tsv_a"),
+            ]
+
+    def test_normal_stats_json(self):
+        db_path = "test.sqlite"
+        stats_path = "stats.json"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            files = [valid_csv_file_1_1(), valid_csv_file_2_1(), invalid_csv_file()]
+
+            result = runner.invoke(
+                cmd, ["-o", db_path, "-i", "attr_a", "--stats-json", stats_path, "file"] + files
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            with open(stats_path) as f:
+                stats = json.load(f)
+
+            assert stats["rows"] == 6
+            assert stats["bytes_read"] == sum(os.path.getsize(file_path) for file_path in files)
+            assert stats["bytes_written"] > 0
+            assert set(stats["stages"]) == {"load", "normalize", "create", "index", "log"}
+            assert [
+                (source_stats["source"], source_stats["rows"], source_stats["tables"])
+                for source_stats in stats["sources"]
+            ] == [
+                ("csv_a.csv", 3, ["csv_a"]),
+                ("insert.csv", 3, ["rename_insert"]),
+                ("invalid_csv.csv", 0, []),
+            ]
+
+            table_stats_map = {table_stats["table"]: table_stats for table_stats in stats["tables"]}
+            assert table_stats_map["csv_a"]["rows"] == 3
+            assert table_stats_map["csv_a"]["index_elapsed"] > 0
+            assert table_stats_map["rename_insert"]["rows"] == 3
+
     def test_smoke_max_workers(self):
         db_path = "test.sqlite"
         runner = CliRunner()
@@ -48,3 +48,36 @@ class Test_sqlitebiter_file:
             assert result.exit_code == ExitCode.SUCCESS, fifo_name
 
             assert SimpleSQLite(db_path).fetch_num_records("jsonl_fifo") == 8
+
+    @pytest.mark.skipif(platform.system() == "Windows", reason="platform dependent tests")
+    def test_normal_follow(self):
+        db_path = "test.sqlite"
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            fifo_name = "jsonl_fifo"
+
+            os.mkfifo(fifo_name)
+
+            with ProcessPoolExecutor() as executor:
+                executor.submit(fifo_writer, fifo_name)
+                result = runner.invoke(
+                    cmd,
+                    [
+                        "-o",
+                        db_path,
+                        "file",
+                        fifo_name,
+                        "--format",
+                        "jsonl",
+                        "--follow",
+                        "--chunk-rows",
+                        "3",
+                    ],
+                )
+
+            print_traceback(result)
+
+            assert result.exit_code == ExitCode.SUCCESS, fifo_name
+
+            assert SimpleSQLite(db_path).fetch_num_records("jsonl_fifo") == 8
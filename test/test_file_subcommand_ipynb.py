@@ -2,15 +2,21 @@
 .. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
 """
 
+import base64
+import hashlib
 import os
 import platform
+import zlib
 from textwrap import dedent
 
+import nbformat
 import pytest
 from click.testing import CliRunner
+from simplesqlite import SimpleSQLite
 
 from sqlitebiter.__main__ import cmd
 from sqlitebiter._const import ExitCode
+from sqlitebiter.converter._ipynb_converter import CellConverter
 
 from .common import print_traceback
 
@@ -104,3 +110,132 @@ class Test_file_subcommand_ipynb:
             print_traceback(result)
 
             assert result.exit_code == expected, file_path
+
+    @pytest.mark.parametrize(
+        ["options"],
+        [
+            [["--fast-ipynb"]],
+            [["--jobs", "2"]],
+            [["--fast-ipynb", "--jobs", "2"]],
+        ],
+    )
+    def test_normal_fast_ipynb(self, options):
+        runner = CliRunner()
+        file_paths = [os.path.abspath(file_path) for file_path in self.IPYNB_FILE_LIST[:2]]
+
+        with runner.isolated_filesystem():
+            fast_db_path = "test_fast.sqlite"
+
+            result = runner.invoke(cmd, ["-o", db_path, "file"] + file_paths)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            result = runner.invoke(cmd, ["-o", fast_db_path, "file"] + file_paths + options)
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            fast_con = SimpleSQLite(fast_db_path, "r")
+            table_names = con.fetch_table_names()
+            assert fast_con.fetch_table_names() == table_names
+
+            for table_name in table_names:
+                assert (
+                    fast_con.select("*", table_name=table_name).fetchall()
+                    == con.select("*", table_name=table_name).fetchall()
+                ), table_name
+
+    def test_normal_ipynb_image_storage_batches(self, monkeypatch):
+        monkeypatch.setattr(CellConverter, "DIGEST_BATCH_SIZE", 2)
+        svgs = [f'<svg xmlns="http://www.w3.org/2000/svg" id="{i}"></svg>' for i in range(5)]
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            file_paths = []
+            for i in range(2):
+                nb = nbformat.v4.new_notebook()
+                nb.cells = [
+                    nbformat.v4.new_code_cell(
+                        "plot()",
+                        execution_count=1,
+                        outputs=[
+                            nbformat.v4.new_output("display_data", data={"image/svg+xml": svg})
+                        ],
+                    )
+                    for svg in svgs
+                ]
+                file_path = f"image{i}.ipynb"
+                nbformat.write(nb, file_path)
+                file_paths.append(file_path)
+
+            result = runner.invoke(
+                cmd, ["--ipynb-image-storage", "dedup", "-o", db_path, "file"] + file_paths
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            assert con.fetch_num_records("cells_outputs_images") == len(svgs)
+
+    @pytest.mark.parametrize(
+        ["image_storage", "expected_compression"],
+        [["dedup", None], ["dedup-zlib", "zlib"]],
+    )
+    def test_normal_ipynb_image_storage(self, image_storage, expected_compression):
+        png = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+        svg = '<svg xmlns="http://www.w3.org/2000/svg"></svg>'
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            file_paths = []
+            for i in range(2):
+                nb = nbformat.v4.new_notebook()
+                nb.cells = [
+                    nbformat.v4.new_code_cell(
+                        "plot()",
+                        execution_count=1,
+                        outputs=[
+                            nbformat.v4.new_output(
+                                "display_data",
+                                data={
+                                    "image/png": base64.b64encode(png).decode("ascii"),
+                                    "image/svg+xml": svg,
+                                },
+                            )
+                        ],
+                    )
+                    for _ in range(2)
+                ]
+                file_path = f"image{i}.ipynb"
+                nbformat.write(nb, file_path)
+                file_paths.append(file_path)
+
+            result = runner.invoke(
+                cmd,
+                ["--ipynb-image-storage", image_storage, "-o", db_path, "file"] + file_paths,
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(db_path, "r")
+            images = {
+                sha256: (data_type, compression, size, data)
+                for sha256, data_type, compression, size, data in con.select(
+                    "*", table_name="cells_outputs_images"
+                ).fetchall()
+            }
+            assert len(images) == 2
+
+            for data_type, image in [("image/png", png), ("image/svg+xml", svg.encode("utf-8"))]:
+                digest = hashlib.sha256(image).hexdigest()
+                stored_type, compression, size, data = images[digest]
+                assert stored_type == data_type
+                assert compression == expected_compression
+                assert size == len(image)
+                assert (zlib.decompress(data) if compression else data) == image
+
+            refs = con.select(
+                "data", table_name="cells_outputs", where="type LIKE 'image/%'"
+            ).fetchall()
+            assert len(refs) == 8
+            assert {ref[0] for ref in refs} == set(images)
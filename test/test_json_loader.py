@@ -0,0 +1,85 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+import json
+import pickle
+
+import pytablereader as ptr
+import pytest
+from pytablereader.interface import AbstractTableReader
+
+from sqlitebiter.converter._json_loader import NestedJsonError, load_tables
+
+
+def make_loader(json_data):
+    return ptr.TableTextLoader(json.dumps(json_data), format_name="json")
+
+
+class Test_load_tables:
+    @pytest.mark.parametrize(
+        ["json_data"],
+        [
+            [[{"a": 1, "b": "x"}, {"a": 2, "c": 1.5}]],
+            [{"a": [1, 2], "b": ["x", "y"]}],
+            [{"a": 1, "b": "x"}],
+            [{"t1": [{"a": 1}], "t2": [{"b": 2}]}],
+            [{"t1": {"a": [1, 2]}, "t2": {"b": [3]}}],
+            [{"t1": {"a": 1}, "t2": {"b": "x"}}],
+        ],
+    )
+    def test_normal_table(self, json_data):
+        AbstractTableReader.clear_table_count()
+        expected = [
+            (table_data.table_name, table_data.headers, list(table_data.rows))
+            for table_data in make_loader(json_data).load()
+        ]
+
+        AbstractTableReader.clear_table_count()
+        actual = [
+            (table_data.table_name, table_data.headers, list(table_data.rows))
+            for table_data in load_tables(make_loader(json_data))
+        ]
+
+        assert actual == expected
+
+    @pytest.mark.parametrize(
+        ["json_data"],
+        [
+            [{"a": 1, "rows": [{"b": 2}]}],
+            [[{"a": [{"b": 1}]}]],
+            [{"k": {"a": {"b": 1}}, "s": 1}],
+            [[{"a": {"b": 1}}]],
+            [[1, 2]],
+        ],
+    )
+    def test_normal_nested(self, json_data):
+        with pytest.raises(NestedJsonError) as e:
+            list(load_tables(make_loader(json_data)))
+
+        assert e.value.json_data == json_data
+        assert isinstance(e.value, ptr.ValidationError)
+        assert pickle.loads(pickle.dumps(e.value)).json_data == json_data
+
+    def test_normal_parse_once(self, monkeypatch):
+        loader = make_loader({"a": 1, "rows": [{"b": 2}]})
+        load_dict = loader.loader.load_dict
+        call_count = 0
+
+        def count_load_dict():
+            nonlocal call_count
+            call_count += 1
+            return load_dict()
+
+        monkeypatch.setattr(loader.loader, "load_dict", count_load_dict)
+
+        with pytest.raises(NestedJsonError):
+            list(load_tables(loader))
+
+        assert call_count == 1
+
+    def test_abnormal_invalid_json(self):
+        with pytest.raises(ptr.ValidationError) as e:
+            list(load_tables(ptr.TableTextLoader('{"a": [1, ', format_name="json")))
+
+        assert not isinstance(e.value, NestedJsonError)
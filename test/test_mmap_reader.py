@@ -0,0 +1,91 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+import pytest
+
+from sqlitebiter.converter._chunked_loader import create_chunked_loader
+from sqlitebiter.converter._mmap_reader import MmapLineReader, is_mmap_encoding, split_byte_ranges
+
+
+def write_bytes(file_path, data):
+    with open(file_path, "wb") as f:
+        f.write(data)
+
+
+class Test_is_mmap_encoding:
+    @pytest.mark.parametrize(
+        ["value", "expected"],
+        [["utf-8", True], ["cp932", True], ["utf-16", False], ["unknown-encoding", False]],
+    )
+    def test_normal(self, value, expected):
+        assert is_mmap_encoding(value) == expected
+
+
+class Test_MmapLineReader:
+    @pytest.mark.parametrize(["block_size"], [[1], [3], [1024]])
+    def test_normal(self, tmpdir, block_size):
+        file_path = str(tmpdir.join("a.csv"))
+        data = 'a,b\r\n1,"x\ny"\r\n2,あいう\r\n3,z'
+        write_bytes(file_path, data.encode("utf-8"))
+
+        with MmapLineReader(file_path, "utf-8", block_size=block_size) as reader:
+            assert list(reader) == ["a,b\r\n", '1,"x\n', 'y"\r\n', "2,あいう\r\n", "3,z"]
+
+    def test_normal_range(self, tmpdir):
+        file_path = str(tmpdir.join("a.csv"))
+        write_bytes(file_path, b"a,b\n1,x\n2,y\n")
+
+        with MmapLineReader(file_path, "utf-8", start=4, end=8) as reader:
+            assert list(reader) == ["1,x\n"]
+
+    def test_normal_empty(self, tmpdir):
+        file_path = str(tmpdir.join("a.csv"))
+        write_bytes(file_path, b"")
+
+        with MmapLineReader(file_path, "utf-8") as reader:
+            assert list(reader) == []
+
+
+class Test_split_byte_ranges:
+    @pytest.mark.parametrize(["num_ranges"], [[1], [2], [3], [100]])
+    def test_normal(self, tmpdir, num_ranges):
+        file_path = str(tmpdir.join("a.csv"))
+        data = b"".join(["{},{}\n".format(i, "x" * i).encode() for i in range(20)])
+        write_bytes(file_path, data)
+
+        ranges = split_byte_ranges(file_path, num_ranges)
+
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == len(data)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start
+            assert data[end - 1 : end] == b"\n"
+
+
+    @pytest.mark.parametrize(["num_ranges"], [[2], [5], [100]])
+    def test_normal_quotechar(self, tmpdir, num_ranges):
+        file_path = str(tmpdir.join("a.csv"))
+        data = b"".join(['{},"{}\n""{}"""\n'.format(i, "x" * i, i).encode() for i in range(20)])
+        write_bytes(file_path, data)
+
+        ranges = split_byte_ranges(file_path, num_ranges, quotechar='"')
+
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == len(data)
+        for start, end in ranges:
+            assert data[start:end].count(b'"') % 2 == 0
+            assert data[end - 1 : end] == b"\n"
+
+
+class Test_ChunkedTableFileLoader_mmap:
+    def test_normal_csv(self, tmpdir):
+        file_path = str(tmpdir.join("a.csv"))
+        write_bytes(file_path, 'a,b\r\n1,"x\r\ny"\r\n2,あ\r\n'.encode("utf-8"))
+
+        loader = create_chunked_loader(
+            file_path, "csv", encoding="utf-8", chunk_rows=1, type_hint_rules=None
+        )
+        tables = list(loader.load())
+
+        assert [table.rows for table in tables] == [[["1", "x\r\ny"]], [["2", "あ"]]]
@@ -0,0 +1,56 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+from simplesqlite import connect_memdb
+from sqliteschema import SQLiteSchemaExtractor
+
+from sqlitebiter.converter._schema_catalog import AttrDef, SchemaCatalog
+
+
+class Test_SchemaCatalog:
+    def test_normal(self):
+        con = connect_memdb()
+        con.create_table("a", ["id INTEGER PRIMARY KEY", "name TEXT NOT NULL"])
+        catalog = SchemaCatalog(con)
+
+        assert catalog.fetch_table_names() == ["a"]
+        assert catalog.fetch_attr_defs("a") == [
+            AttrDef("id", "INTEGER", is_primary_key=True),
+            AttrDef("name", "TEXT", is_not_null=True),
+        ]
+
+        attr_defs = [AttrDef("value", "REAL")]
+        con.create_table("b", [attr_def.to_query() for attr_def in attr_defs])
+        catalog.add_table("b", attr_defs)
+
+        assert catalog.has_table("b")
+        assert catalog.fetch_attr_defs("b") == attr_defs
+
+    def test_normal_changed_by_others(self):
+        con = connect_memdb()
+        catalog = SchemaCatalog(con)
+
+        assert not catalog.has_table("a")
+
+        con.create_table("a", ["value REAL"])
+
+        assert catalog.has_table("a")
+        assert catalog.fetch_attr_defs("a") == [AttrDef("value", "REAL")]
+
+        con.drop_table("a")
+
+        assert not catalog.has_table("a")
+
+    def test_normal_fetch_table_schema(self):
+        con = connect_memdb()
+        con.create_table("a", ["id INTEGER PRIMARY KEY", "name TEXT NOT NULL"])
+        catalog = SchemaCatalog(con)
+        extractor = SQLiteSchemaExtractor(con)
+
+        for verbosity_level in range(5):
+            assert catalog.fetch_table_schema("a").dumps(
+                output_format="text", verbosity_level=verbosity_level
+            ) == extractor.fetch_table_schema("a").dumps(
+                output_format="text", verbosity_level=verbosity_level
+            )
@@ -0,0 +1,77 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+import time
+
+from sqlitebiter._stats import ConversionStats, Stage
+
+
+class Test_ConversionStats:
+    def test_normal_nested(self):
+        stats = ConversionStats()
+
+        with stats.measure(Stage.CREATE):
+            time.sleep(0.05)
+
+            with stats.measure(Stage.LOG):
+                time.sleep(0.1)
+
+        stages = stats.as_dict()["stages"]
+
+        assert 0.05 <= stages[Stage.CREATE] < 0.1
+        assert stages[Stage.LOG] >= 0.1
+
+    def test_normal_iter_measure(self):
+        stats = ConversionStats()
+
+        def load():
+            time.sleep(0.05)
+            yield from [1, 2]
+
+        for _ in stats.iter_measure(Stage.LOAD, load):
+            with stats.measure(Stage.CREATE):
+                time.sleep(0.05)
+
+            stats.add_record_count("a", 1)
+
+        result = stats.as_dict()
+
+        assert result["rows"] == 2
+        assert 0.05 <= result["stages"][Stage.LOAD] < 0.1
+        assert result["stages"][Stage.CREATE] >= 0.1
+
+    def test_normal_source(self):
+        db_sizes = iter([100, 100, 300, 500])
+        stats = ConversionStats(fetch_db_size=lambda: next(db_sizes))
+
+        with stats.measure_source("a.csv", bytes_read=10):
+            with stats.measure_table("a"):
+                stats.add_record_count("a", 3)
+
+            stats.add_record_count("b", 2)
+
+        with stats.measure_table("a", "index_elapsed"):
+            time.sleep(0.01)
+
+        stats.add_record_count("a", 1)
+        result = stats.as_dict(table_sizes={"a": 4096})
+
+        assert result["rows"] == 6
+        assert result["bytes_read"] == 10
+        assert result["bytes_written"] == 400
+        assert len(result["sources"]) == 1
+
+        source_stats = result["sources"][0]
+        assert source_stats["source"] == "a.csv"
+        assert source_stats["rows"] == 5
+        assert source_stats["bytes_read"] == 10
+        assert source_stats["bytes_written"] == 200
+        assert source_stats["tables"] == ["a", "b"]
+
+        table_stats_map = {table_stats["table"]: table_stats for table_stats in result["tables"]}
+        assert table_stats_map["a"]["rows"] == 4
+        assert table_stats_map["a"]["index_elapsed"] >= 0.01
+        assert table_stats_map["a"]["bytes"] == 4096
+        assert table_stats_map["b"]["rows"] == 2
+        assert table_stats_map["b"]["bytes"] is None
@@ -4,6 +4,7 @@
 
 from textwrap import dedent
 
+import pytest
 from click.testing import CliRunner
 from simplesqlite import SimpleSQLite
 
@@ -70,6 +71,50 @@ class Test_stdin_subcommand:
             assert tbldata.headers == ["a text", "b integer", "c real"]
             assert tbldata.rows == [("1", 1, 1.1), ("2", 2, 1.2), ("3", 3, 1.3)]
 
+    @pytest.mark.parametrize(
+        ["format_name", "text", "expected_table"],
+        [
+            ["csv", "a,b\n1,x\n2,y\n3,z\n4,w\n5,v\n", "csv1"],
+            ["tsv", "a\tb\n1\tx\n2\ty\n3\tz\n4\tw\n5\tv\n", "tsv1"],
+            [
+                "ldjson",
+                "\n".join(
+                    [
+                        '{"a": 1, "b": "x"}',
+                        '{"a": 2, "b": "y"}',
+                        '{"a": 3, "b": "z"}',
+                        '{"a": 4, "b": "w"}',
+                        '{"a": 5, "b": "v"}',
+                    ]
+                ),
+                "json_lines1",
+            ],
+        ],
+    )
+    def test_normal_chunk_rows(self, format_name, text, expected_table):
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            result = runner.invoke(
+                cmd,
+                ["-o", self.db_path, "-i", "a", "stdin", format_name, "--chunk-rows", "2"],
+                input=text,
+            )
+            print_traceback(result)
+            assert result.exit_code == ExitCode.SUCCESS
+
+            con = SimpleSQLite(self.db_path, "r")
+            assert set(con.fetch_table_names()) == {expected_table, SourceInfo.get_table_name()}
+
+            tbldata = con.select_as_tabledata(expected_table)
+            assert tbldata.headers == ["a", "b"]
+            assert tbldata.rows == [(1, "x"), (2, "y"), (3, "z"), (4, "w"), (5, "v")]
+
+            result = con.select(
+                "base_name,dst_table,format_name", table_name=SourceInfo.get_table_name()
+            )
+            assert result.fetchall() == [("stdin", expected_table, expected_table[:-1])]
+
     def test_smoke_max_workers(self):
         runner = CliRunner()
 
@@ -0,0 +1,99 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+import pickle
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+from tabledata import TableData
+from typepy import Integer, RealNumber, String
+
+from sqlitebiter.converter._table_creator import ColumnarRecords, TableRecords
+
+
+class Test_TableRecords_from_tabledata_columnar:
+    @pytest.mark.parametrize(
+        ["rows", "type_hints", "expected_types", "expected_records"],
+        [
+            [
+                [["1", "1.5", "a"], ["-2", "2", "b"]],
+                [Integer, RealNumber, String],
+                ["INTEGER", "REAL", "TEXT"],
+                [(1, 1.5, "a"), (-2, 2.0, "b")],
+            ],
+            [
+                [["1", "2.5", "1\n2"], ["2", "3.5", "3"]],
+                [RealNumber, RealNumber, Integer],
+                ["REAL", "REAL", "TEXT"],
+                [(1, 2.5, "1\n2"), (2, 3.5, "3")],
+            ],
+            [
+                [["1", "", "3"], ["2", "4", "99999999999999999999"]],
+                [RealNumber, RealNumber, String],
+                ["REAL", "REAL", "TEXT"],
+                [(1, "", "3"), (2, 4, "99999999999999999999")],
+            ],
+        ],
+    )
+    def test_normal(self, rows, type_hints, expected_types, expected_records):
+        table_records = TableRecords.from_tabledata(
+            TableData("a", ["x", "y", "z"], rows, type_hints=type_hints)
+        )
+
+        assert [attr_def.data_type for attr_def in table_records.attr_defs] == expected_types
+        assert isinstance(table_records.records, ColumnarRecords)
+        assert list(table_records.records) == expected_records
+
+    def test_normal_pickle(self):
+        table_records = TableRecords.from_tabledata(
+            TableData("a", ["x", "y"], [["1", "a"], ["2", "b"]], type_hints=[Integer, String])
+        ).to_picklable()
+
+        assert list(pickle.loads(pickle.dumps(table_records.records))) == [(1, "a"), (2, "b")]
+
+
+class Test_TableRecords_from_tabledata_type_hints:
+    @pytest.mark.parametrize(
+        ["rows"],
+        [
+            [[["1", "a"], ["", "b"]]],
+            [[[True, None], [False, "b"]]],
+            [[[None, 1], [1.5, True]]],
+        ],
+    )
+    def test_normal_string(self, rows):
+        def make_table_data():
+            return TableData("a", ["x", "y"], rows, type_hints=[String, String])
+
+        expected = [
+            tuple(value_dp.data for value_dp in value_dp_list)
+            for value_dp_list in make_table_data().value_dp_matrix
+        ]
+        table_records = TableRecords.from_tabledata(make_table_data())
+
+        assert [attr_def.data_type for attr_def in table_records.attr_defs] == ["TEXT", "TEXT"]
+        assert [tuple(record) for record in table_records.records] == expected
+
+    def test_normal_integer_real_values(self):
+        table_data = TableData("a", ["x"], [["1.5"], ["2"]], type_hints=[Integer])
+        table_records = TableRecords.from_tabledata(table_data)
+
+        assert [attr_def.data_type for attr_def in table_records.attr_defs] == ["REAL"]
+        assert [
+            tuple(type(value) for value in record) for record in table_records.records
+        ] == [(Decimal,), (int,)]
+        assert [tuple(record) for record in table_records.records] == [(Decimal("1.5"),), (2,)]
+
+    def test_normal_float_type(self):
+        table_data = TableData("a", ["x"], [["1.5"], ["2.25"]], type_hints=[RealNumber])
+        table_data.dp_extractor.float_type = Fraction
+        table_records = TableRecords.from_tabledata(table_data)
+
+        assert [attr_def.data_type for attr_def in table_records.attr_defs] == ["REAL"]
+        assert all(type(record[0]) is Fraction for record in table_records.records)
+        assert [tuple(record) for record in table_records.records] == [
+            (Fraction(3, 2),),
+            (Fraction(9, 4),),
+        ]
@@ -0,0 +1,50 @@
+"""
+.. codeauthor:: Tsuyoshi Hombashi <tsuyoshi.hombashi@gmail.com>
+"""
+
+from loguru import logger
+from tabledata import TableData
+
+from sqlitebiter.converter._table_creator import TableRecords
+from sqlitebiter.converter._type_cache import TypeCache, get_cached_types
+
+
+class Test_TypeCache:
+    def test_normal(self, tmpdir):
+        file_path = str(tmpdir.join("types.json"))
+        cache = TypeCache(logger, file_path)
+
+        assert get_cached_types(cache.types, "a", ["x", "y"]) is None
+
+        cache.update("a", ["x", "y"], ["INTEGER", "TEXT"])
+        cache.save()
+
+        cache = TypeCache(logger, file_path)
+        assert get_cached_types(cache.types, "a", ["x", "y"]) == ["INTEGER", "TEXT"]
+        assert get_cached_types(cache.types, "a", ["x", "z"]) is None
+        assert get_cached_types(cache.types, "b", ["x", "y"]) is None
+
+    def test_normal_broken_file(self, tmpdir):
+        file_path = str(tmpdir.join("types.json"))
+        with open(file_path, "w") as f:
+            f.write("{")
+
+        assert TypeCache(logger, file_path).types == {}
+
+
+class Test_TableRecords_from_tabledata_type_cache:
+    def test_normal(self, tmpdir):
+        cache = TypeCache(logger, str(tmpdir.join("types.json")))
+        cache.update("a", ["x", "y", "z"], ["INTEGER", "INTEGER", "TEXT"])
+
+        table_records = TableRecords.from_tabledata(
+            TableData("a", ["x", "y", "z"], [["1", "2", "3"], ["4", "5.5", "abc"]]),
+            type_cache=cache.types,
+        )
+
+        assert [attr_def.data_type for attr_def in table_records.attr_defs] == [
+            "INTEGER",
+            "REAL",
+            "TEXT",
+        ]
+        assert [list(record[:2]) for record in table_records.records] == [[1, 2], [4, 5.5]]